@@ -1,13 +1,17 @@
-"""Backend package initializer for LFIWEB.
+"""Backend package initializer.
 
-This file makes `backend` a proper Python package so imports like
-`from backend.app import app` work when the project root is on sys.path.
+Importing the package (e.g. for `backend.manage` or `backend.db`) no longer
+imports the Flask app; these helpers are loaded on first access:
+  from backend import init_db, get_db, create_app
+The Flask application itself: `from backend.app import app` (or
+`backend.wsgi:application` for WSGI servers).
 """
+import importlib
 
-__all__ = ["app"]
-"""Backend package initializer.
+_LAZY = ('init_db', 'get_db', 'create_app')
 
-Expose commonly used symbols for tests and imports:
-  from backend import app, init_db, get_db
-"""
-from .app import app, init_db, get_db
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module('backend.app'), name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
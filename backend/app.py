@@ -2,17 +2,32 @@
 
 Single-file Flask app implementing a stable base for articles, photos and videos.
 This file is an atomic replacement for a previously corrupted file.
+
+Importing the module only defines settings, helpers and views; `create_app()`
+builds the Flask application (routes, request hooks, session backend). The
+module-level `app` is created on first access, so scripts that only need
+helpers (init_db, get_db, ...) skip it. WSGI servers should use
+`backend.wsgi:application`.
 """
 
+import base64
+import json
+import logging
 import os
+import sys
 import sqlite3
 import secrets
 import hashlib
-from datetime import datetime, timedelta
+from datetime import datetime
 from urllib.parse import urlparse
 
 from flask import (
     Flask,
+    abort,
+    current_app,
+    Response,
+    g,
+    has_request_context,
     request,
     jsonify,
     session,
@@ -24,6 +39,17 @@ from flask import (
 )
 from werkzeug.utils import secure_filename
 
+try:
+    from backend import db as _dblib, metrics as _metrics, migrations as _migrations, snapshot as _snapshot
+    from backend import publish as _publish, bulk as _bulk, trash as _trash, streaming as _streaming
+    from backend import json_provider as _json_provider, invalidation as _invalidation, singleflight as _singleflight
+    from backend.redis_client import ManagedRedis, RedisUnavailable
+except ImportError:  # running as `python backend/app.py`
+    import db as _dblib, metrics as _metrics, migrations as _migrations, snapshot as _snapshot
+    import publish as _publish, bulk as _bulk, trash as _trash, streaming as _streaming
+    import json_provider as _json_provider, invalidation as _invalidation, singleflight as _singleflight
+    from redis_client import ManagedRedis, RedisUnavailable
+
 # Configuration
 BASE_DIR = os.path.dirname(__file__)
 DB_PATH = os.getenv('DB_PATH', os.path.join(BASE_DIR, '..', 'data.db'))
@@ -32,14 +58,22 @@ SECRET_KEY = os.getenv('SECRET_KEY', secrets.token_hex(32))
 UPLOAD_BASE = os.path.join(BASE_DIR, 'static', 'uploads')
 PHOTO_DIR = os.path.join(UPLOAD_BASE, 'photos')
 VIDEO_DIR = os.path.join(UPLOAD_BASE, 'videos')
-os.makedirs(PHOTO_DIR, exist_ok=True)
-os.makedirs(VIDEO_DIR, exist_ok=True)
 
 ALLOWED_IMAGE_EXT = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
 ALLOWED_VIDEO_EXT = {'.mp4', '.webm', '.ogg', '.mov', '.mkv'}
 
-app = Flask(__name__)
-app.secret_key = SECRET_KEY
+logger = logging.getLogger(__name__)  # same logger as app.logger
+
+# Views are collected here and registered on each app built by create_app(),
+# keeping the plain endpoint names (url_for('index'), metrics labels).
+_routes = []
+
+
+def route(rule, **options):
+    def decorator(view):
+        _routes.append((rule, options, view))
+        return view
+    return decorator
 
 # Upload/Quota configuration (bytes)
 # These can be tuned via environment variables on PythonAnywhere
@@ -47,16 +81,13 @@ IMAGE_MAX_BYTES = int(os.getenv('IMAGE_MAX_BYTES', str(5 * 1024 * 1024)))  # 5 M
 VIDEO_MAX_BYTES = int(os.getenv('VIDEO_MAX_BYTES', str(150 * 1024 * 1024)))  # 150 MB default
 MAX_TOTAL_UPLOAD_BYTES = int(os.getenv('MAX_TOTAL_UPLOAD_BYTES', str(2 * 1024 * 1024 * 1024)))  # 2 GB default
 
-# Prevent very large requests at the WSGI boundary (global cap)
-app.config['MAX_CONTENT_LENGTH'] = MAX_TOTAL_UPLOAD_BYTES
-
 # Simple in-memory rate limiter for demonstration.
 # NOTE: This is process-local and not suitable for multi-process deployments;
-# for production use Redis or another centralized store.
+# for production use Redis or another centralized store. Buckets are guarded by
+# a lock for threaded workers and start empty in each forked worker.
 from collections import deque
+import threading
 import time
-import smtplib
-from email.message import EmailMessage
 
 # rate-limiter settings
 RL_WINDOW_SECONDS = int(os.getenv('RL_WINDOW_SECONDS', str(60 * 60)))  # 1 hour window by default
@@ -64,6 +95,7 @@ RL_MAX_REQUESTS = int(os.getenv('RL_MAX_REQUESTS', '5'))  # default 5 requests p
 
 # Map key -> deque[timestamp]
 _rl_buckets = {}
+_rl_lock = threading.Lock()
 
 
 def _rl_key_for_request():
@@ -73,28 +105,50 @@ def _rl_key_for_request():
 
 def is_rate_limited(key: str) -> bool:
     now = time.time()
-    dq = _rl_buckets.get(key)
-    if dq is None:
-        dq = deque()
-        _rl_buckets[key] = dq
-    # pop old
-    while dq and dq[0] <= now - RL_WINDOW_SECONDS:
-        dq.popleft()
-    if len(dq) >= RL_MAX_REQUESTS:
-        return True
-    dq.append(now)
-    return False
+    with _rl_lock:
+        dq = _rl_buckets.get(key)
+        if dq is None:
+            dq = deque()
+            _rl_buckets[key] = dq
+        # pop old
+        while dq and dq[0] <= now - RL_WINDOW_SECONDS:
+            dq.popleft()
+        if len(dq) >= RL_MAX_REQUESTS:
+            return True
+        dq.append(now)
+        return False
+
+
+def _observe_redis(command, seconds, error):
+    labels = {'operation': f'redis_{command}'}
+    _metrics.registry.observe('lfiweb_operation_duration_seconds', seconds, labels)
+    if error is not None:
+        _metrics.registry.inc('lfiweb_operation_errors_total', labels)
 
 
 # Try to configure a Redis-backed rate limiter if REDIS_URL is provided.
+# The client is created lazily (no network I/O at import) with a bounded pool,
+# timeouts and a circuit breaker; see backend/redis_client.py.
 REDIS_URL = os.getenv('REDIS_URL')
 _redis = None
 if REDIS_URL:
     try:
-        import redis as _redislib
-        _redis = _redislib.from_url(REDIS_URL)
+        _redis = ManagedRedis(
+            REDIS_URL,
+            max_connections=int(os.getenv('REDIS_MAX_CONNECTIONS', '10')),
+            socket_timeout=float(os.getenv('REDIS_SOCKET_TIMEOUT', '0.5')),
+            connect_timeout=float(os.getenv('REDIS_CONNECT_TIMEOUT', '0.5')),
+            failure_threshold=int(os.getenv('REDIS_BREAKER_FAILURES', '5')),
+            reset_timeout=float(os.getenv('REDIS_BREAKER_RESET', '30')),
+        )
+        _redis.observer = _observe_redis
     except Exception:
-        app.logger.exception('Failed to initialize Redis client; falling back to in-memory rate limiter')
+        logger.exception('Failed to initialize Redis client; falling back to in-memory rate limiter')
+
+
+def redis_available() -> bool:
+    """True if a Redis client is configured and its circuit breaker is not open."""
+    return bool(_redis) and getattr(_redis, 'available', True)
 
 
 def is_rate_limited_redis(key: str) -> bool:
@@ -126,15 +180,17 @@ def is_rate_limited_redis(key: str) -> bool:
         res = _redis.eval(lua, 1, rkey, now - w, now, member, w + 10)
         cnt = int(res)
         return cnt > RL_MAX_REQUESTS
+    except RedisUnavailable:
+        return False
     except Exception:
-        app.logger.exception('Redis rate limiter failure; allowing request')
+        logger.exception('Redis rate limiter failure; allowing request')
         return False
 
 
 def check_rate_limit_for_request():
     key = _rl_key_for_request()
-    # try redis first
-    if _redis and is_rate_limited_redis(key):
+    # try redis first; skipped entirely while the circuit breaker is open
+    if redis_available() and is_rate_limited_redis(key):
         return True
     # fallback to in-memory
     return is_rate_limited(key)
@@ -150,6 +206,7 @@ SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', '1') not in ('0', 'false', 'False')
 FROM_EMAIL = os.getenv('FROM_EMAIL', SMTP_USER or f'no-reply@{urlparse(SITE_URL).hostname or "localhost"}')
 
 
+@_metrics.timed('send_magic_link')
 def send_magic_link(email: str, user_id: int, token: str) -> bool:
     """Send the magic-link email. Returns True on success, False on failure.
 
@@ -162,13 +219,15 @@ def send_magic_link(email: str, user_id: int, token: str) -> bool:
     # Read SMTP configuration at call time so tests can modify env vars after import
     smtp_host = os.getenv('SMTP_HOST')
     if not smtp_host:
-        app.logger.info('SMTP not configured; magic link for %s: %s', email, link)
+        logger.info('SMTP not configured; magic link for %s: %s', email, link)
         return True
     smtp_port = int(os.getenv('SMTP_PORT') or 0)
     smtp_user = os.getenv('SMTP_USER')
     smtp_pass = os.getenv('SMTP_PASS')
     smtp_use_tls = os.getenv('SMTP_USE_TLS', '1') not in ('0', 'false', 'False')
     from_email = os.getenv('FROM_EMAIL', smtp_user or f'no-reply@{urlparse(SITE_URL).hostname or "localhost"}')
+    import smtplib  # imported on first send: most workers never send mail
+    from email.message import EmailMessage
     try:
         msg = EmailMessage()
         msg['Subject'] = subject
@@ -183,70 +242,287 @@ def send_magic_link(email: str, user_id: int, token: str) -> bool:
             server.login(smtp_user, smtp_pass)
         server.send_message(msg)
         server.quit()
-        app.logger.info('Sent magic link to %s', email)
+        logger.info('Sent magic link to %s', email)
         return True
     except Exception:
-        app.logger.exception('Failed to send magic link email')
+        logger.exception('Failed to send magic link email')
         return False
 
 
+# SQLITE_JOURNAL_MODE=wal lets readers in several worker processes proceed
+# while one writer commits (backend/gunicorn_conf.py sets it). The journal mode
+# is persistent in the DB file, so it is set once per process; synchronous=NORMAL
+# is per connection and safe with WAL (a power loss can only drop the last
+# commits, never corrupt the file).
+SQLITE_JOURNAL_MODE = (os.getenv('SQLITE_JOURNAL_MODE') or '').lower()
+SQLITE_BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', '5'))
+_journal_mode_set = False
+
+
 def get_db():
-    conn = sqlite3.connect(DB_PATH)
+    global _journal_mode_set
+    conn = _dblib.connect(DB_PATH, timeout=SQLITE_BUSY_TIMEOUT)
+    conn.row_factory = sqlite3.Row
+    if SQLITE_JOURNAL_MODE:
+        if not _journal_mode_set:
+            conn.execute(f'PRAGMA journal_mode={SQLITE_JOURNAL_MODE}')
+            _journal_mode_set = True
+        if SQLITE_JOURNAL_MODE == 'wal':
+            conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+# READ_SNAPSHOT=1 serves the public GET views from a per-process in-memory copy
+# of the public tables (backend/snapshot.py), checked for content changes at
+# most every READ_SNAPSHOT_CHECK seconds. Content writes bump the `content`
+# row of cache_versions.
+READ_SNAPSHOT = os.getenv('READ_SNAPSHOT', '').lower() in ('1', 'true', 'yes')
+READ_SNAPSHOT_CHECK = float(os.getenv('READ_SNAPSHOT_CHECK', '1'))
+_read_snapshot = None
+
+
+def get_read_snapshot():
+    global _read_snapshot
+    if _read_snapshot is None:
+        _read_snapshot = _snapshot.ReadSnapshot(DB_PATH, check_interval=READ_SNAPSHOT_CHECK, connect=_dblib.connect,
+                                                on_swap=_read_cache.mark_stale)
+    return _read_snapshot
+
+
+def get_read_db():
+    """Connection for public reads: the snapshot with READ_SNAPSHOT=1, else get_db()."""
+    if not READ_SNAPSHOT:
+        return get_db()
+    conn = get_read_snapshot().connect()
     conn.row_factory = sqlite3.Row
     return conn
 
 
+# Request and SQL instrumentation, exposed on /metrics. With METRICS_DIR set,
+# each worker flushes its counters there at most every METRICS_FLUSH_INTERVAL
+# seconds and /metrics aggregates all workers.
+METRICS_DIR = os.getenv('METRICS_DIR') or os.getenv('PROMETHEUS_MULTIPROC_DIR')
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+
+def _endpoint_label():
+    return request.endpoint or 'unmatched'
+
+
+def _record_query(sql, params, seconds, conn):
+    if not has_request_context():
+        return
+    g.sql_queries = g.get('sql_queries', 0) + 1
+    labels = {'endpoint': _endpoint_label()}
+    _metrics.registry.inc('lfiweb_sql_queries_total', labels)
+    _metrics.registry.observe('lfiweb_sql_query_duration_seconds', seconds, labels)
+
+
+_dblib.add_query_hook(_record_query, 'app.metrics')
+
+# Opt-in slow-query log: statements slower than SLOW_QUERY_MS are kept (with
+# their query plan) in a ring buffer shown on /admin/slow-queries.
+SLOW_QUERY_MS = os.getenv('SLOW_QUERY_MS')
+slow_query_log = None
+if SLOW_QUERY_MS:
+    slow_query_log = _dblib.SlowQueryLog(float(SLOW_QUERY_MS), int(os.getenv('SLOW_QUERY_LOG_SIZE', '200')), logger)
+    slow_query_log.context = lambda: _endpoint_label() if has_request_context() else None
+    _dblib.add_query_hook(slow_query_log.hook, 'app.slow_query_log')
+else:
+    _dblib.remove_query_hook('app.slow_query_log')
+
+
+def _metrics_start():
+    g.metrics_t0 = time.perf_counter()
+    g.sql_queries = 0
+    _metrics.registry.gauge_add('lfiweb_http_requests_in_flight', value=1)
+
+
+def _metrics_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+
+def _metrics_finish(exc):
+    t0 = g.pop('metrics_t0', None)
+    if t0 is None:
+        return
+    endpoint = _endpoint_label()
+    status = g.pop('metrics_status', 500)
+    reg = _metrics.registry
+    reg.gauge_add('lfiweb_http_requests_in_flight', value=-1)
+    reg.inc('lfiweb_http_requests_total', {'endpoint': endpoint, 'method': request.method, 'status': str(status)})
+    reg.observe('lfiweb_http_request_duration_seconds', time.perf_counter() - t0, {'endpoint': endpoint})
+    reg.observe('lfiweb_sql_queries_per_request', g.get('sql_queries', 0), {'endpoint': endpoint},
+                buckets=_metrics.COUNT_BUCKETS)
+    if METRICS_DIR:
+        try:
+            reg.flush(METRICS_DIR, METRICS_FLUSH_INTERVAL)
+        except OSError:
+            logger.exception('Failed to flush metrics to %s', METRICS_DIR)
+
+
+# Session storage: 'cookie' (Flask default signed cookie), 'sqlite' or 'redis'.
+# Server-side backends allow revoking sessions (see backend/sessions.py).
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'cookie').lower()
+
+# JSON encoding: 'orjson' (backend/json_provider.py, falls back to the stdlib
+# provider when orjson is not installed) or 'stdlib'.
+JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'orjson').lower()
+
+
+def _session_interface(backend):
+    if backend not in ('sqlite', 'redis'):
+        return None
+    try:
+        from backend.sessions import ServerSideSessionInterface, SQLiteSessionStore, RedisSessionStore
+    except ImportError:  # running as `python backend/app.py`
+        from sessions import ServerSideSessionInterface, SQLiteSessionStore, RedisSessionStore
+    sqlite_store = SQLiteSessionStore(lambda: get_db())
+    if backend == 'redis' and _redis:
+        # sessions saved while Redis is down go to SQLite
+        return ServerSideSessionInterface(RedisSessionStore(_redis), fallback=sqlite_store)
+    if backend == 'redis':
+        logger.warning('SESSION_BACKEND=redis but Redis is unavailable; using SQLite sessions')
+    return ServerSideSessionInterface(sqlite_store)
+
+
 def init_db():
+    """Create or upgrade the schema by applying pending migrations (backend/migrations)."""
     conn = get_db()
-    conn.executescript('''
-    CREATE TABLE IF NOT EXISTS users (
-      id INTEGER PRIMARY KEY AUTOINCREMENT,
-      email TEXT NOT NULL UNIQUE,
-      role TEXT NOT NULL DEFAULT 'editor',
-      created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-    );
-    CREATE TABLE IF NOT EXISTS login_tokens (
-      id INTEGER PRIMARY KEY AUTOINCREMENT,
-      user_id INTEGER,
-      token_hash TEXT NOT NULL,
-      expires_at DATETIME NOT NULL,
-      used INTEGER NOT NULL DEFAULT 0,
-      created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-      ip TEXT,
-      user_agent TEXT,
-      FOREIGN KEY(user_id) REFERENCES users(id)
-    );
-    CREATE TABLE IF NOT EXISTS articles (
-      id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            author TEXT,
-            content TEXT,
-            image TEXT,
-            video TEXT,
-      created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-    );
-    CREATE TABLE IF NOT EXISTS photos (
-      id INTEGER PRIMARY KEY AUTOINCREMENT,
-      filename TEXT NOT NULL,
-      title TEXT,
-      description TEXT,
-      created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-    );
-    CREATE TABLE IF NOT EXISTS videos (
-      id INTEGER PRIMARY KEY AUTOINCREMENT,
-      filename TEXT NOT NULL,
-      title TEXT,
-      description TEXT,
-      created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-    );
-        CREATE TABLE IF NOT EXISTS site_meta (
-            key TEXT PRIMARY KEY,
-            value TEXT,
-            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        );
-    ''')
-    conn.commit()
-    conn.close()
+    try:
+        _migrations.migrate(conn, log=logger.info)
+    finally:
+        conn.close()
+
+
+# Per-process caches are dropped in every worker through the invalidation bus
+# (backend/invalidation.py) when one of their tags is invalidated: 'roles'
+# (role changes, e.g. `python -m backend.manage users set-role`), 'content'
+# (any public content write) and 'site' (site_meta). Other workers' changes
+# are picked up at most INVALIDATION_CHECK seconds later with the sqlite
+# transport (the default without REDIS_URL), almost at once with 'redis'.
+INVALIDATION_TRANSPORT = os.getenv('INVALIDATION_TRANSPORT', 'redis' if REDIS_URL else 'sqlite').lower()
+INVALIDATION_CHECK = float(os.getenv('INVALIDATION_CHECK', '1'))
+_invalidation_bus = None
+
+# Role lookups re-check the bus at least every ROLE_CACHE_CHECK seconds and
+# entries never outlive ROLE_CACHE_TTL.
+ROLE_CACHE_TTL = float(os.getenv('ROLE_CACHE_TTL', '60'))
+ROLE_CACHE_CHECK = float(os.getenv('ROLE_CACHE_CHECK', '1'))
+_role_cache = {}
+_site_meta_cache = _invalidation.LocalCache('site_meta')
+
+# Hot public reads (the home page for visitors without a session, article
+# lists) go through a single-flight cache per process: concurrent misses
+# share one query/render, and after a write one request refreshes an entry
+# while the others keep getting the previous one. READ_CACHE=0 turns it off.
+READ_CACHE = os.getenv('READ_CACHE', '1') not in ('0', 'false', 'False')
+_read_cache = _singleflight.SingleFlightCache(
+    'reads', count=lambda outcome: _metrics.registry.inc('lfiweb_read_cache_total', {'result': outcome}))
+
+
+def get_invalidation_bus():
+    global _invalidation_bus
+    if _invalidation_bus is None:
+        transport = _invalidation.SQLiteTransport(DB_PATH)
+        if INVALIDATION_TRANSPORT == 'redis' and _redis is not None:
+            transport = _invalidation.RedisTransport(
+                _redis, transport, fallback_interval=float(os.getenv('INVALIDATION_FALLBACK_CHECK', '5')))
+        _invalidation_bus = _invalidation.InvalidationBus(transport)
+        _invalidation_bus.register('roles', _role_cache.clear)
+        _invalidation_bus.register('site_meta', _site_meta_cache.clear, tags=('site',))
+        _invalidation_bus.register('reads', _read_cache.mark_stale, tags=('content', 'site'))
+    return _invalidation_bus
+
+
+def invalidate(conn, *tags):
+    """Invalidate the caches tagged ``tags`` in every worker, once ``conn`` commits.
+
+    Inside a request the caches are dropped after the view has returned (and
+    committed); elsewhere call `invalidation_committed` after the commit.
+    """
+    get_invalidation_bus().invalidate(conn, *tags)
+    if has_request_context():
+        g.setdefault('invalidated_tags', set()).update(tags)
+
+
+def invalidation_committed(*tags):
+    get_invalidation_bus().committed(*tags)
+
+
+def _publish_invalidations(response):
+    tags = g.pop('invalidated_tags', None)
+    if tags:
+        invalidation_committed(*tags)
+    return response
+
+
+def get_cache_version(conn, name: str) -> int:
+    row = conn.execute('SELECT version FROM cache_versions WHERE name=?', (name,)).fetchone()
+    return row[0] if row else 0
+
+
+# Static export (backend/publish.py): with PUBLISH_DIR set, every successful
+# content write re-exports the changed public pages in the background.
+PUBLISH_DIR = os.getenv('PUBLISH_DIR')
+_publisher = None
+
+
+def get_publisher():
+    global _publisher
+    if _publisher is None:
+        _publisher = _publish.Publisher(PUBLISH_DIR, log=logger.info, appmod=sys.modules[__name__])
+    return _publisher
+
+
+# Bulk media deletes move files to TRASH_DIR (outside static/); they can be
+# restored for TRASH_RETENTION seconds, then a background collector deletes them.
+TRASH_DIR = os.getenv('TRASH_DIR', os.path.join(BASE_DIR, '..', 'trash'))
+TRASH_RETENTION = int(os.getenv('TRASH_RETENTION', str(24 * 3600)))
+TRASH_COLLECT_INTERVAL = int(os.getenv('TRASH_COLLECT_INTERVAL', '600'))
+_trash_collector = None
+
+
+def get_trash_collector():
+    global _trash_collector
+    if _trash_collector is None:
+        _trash_collector = _trash.Collector(get_db, TRASH_DIR, TRASH_RETENTION, interval=TRASH_COLLECT_INTERVAL)
+    return _trash_collector
+
+
+def content_changed(conn, *tags):
+    """Record a write to public content. Caller commits.
+
+    Invalidates `content` (read snapshots reload) plus ``tags`` and flags the
+    request so the static site is re-published after it (PUBLISH_DIR).
+    """
+    invalidate(conn, 'content', *tags)
+    if has_request_context():
+        g.content_changed = True
+
+
+def _publish_after_write(response):
+    if g.pop('content_changed', False) and response.status_code < 400:
+        get_publisher().request()
+    return response
+
+
+def get_user_role(conn, user_id):
+    """Return the role of ``user_id`` (None if unknown), cached per process."""
+    if not user_id:
+        return None
+    get_invalidation_bus().poll(ROLE_CACHE_CHECK)
+    now = time.monotonic()
+    hit = _role_cache.get(user_id)
+    if hit and now - hit[1] < ROLE_CACHE_TTL:
+        return hit[0]
+    row = conn.execute('SELECT role FROM users WHERE id=?', (user_id,)).fetchone()
+    role = row[0] if row else None
+    if role is not None:
+        _role_cache[user_id] = (role, now)
+    return role
 
 
 def is_safe_url(url: str) -> bool:
@@ -289,6 +565,7 @@ def _ext(name: str) -> str:
     return os.path.splitext(name)[1].lower()
 
 
+@_metrics.timed('save_upload')
 def save_upload(field_name: str, dest_dir: str):
     """Stream-save an uploaded file while enforcing per-file and total quotas.
 
@@ -348,7 +625,7 @@ def save_upload(field_name: str, dest_dir: str):
 
         return name, None
     except Exception as e:
-        app.logger.exception('save_upload error: %s', e)
+        logger.exception('save_upload error: %s', e)
         try:
             if os.path.exists(target):
                 os.remove(target)
@@ -371,34 +648,201 @@ def get_total_upload_bytes() -> int:
     return total
 
 
-@app.route('/')
+# Public read queries, shared by the Flask views below and the async read API
+# (backend/asgi.py).
+
+def load_site_meta(conn) -> dict:
+    return {r['key']: r['value'] for r in conn.execute('SELECT key, value FROM site_meta')}
+
+
+def get_site_meta(conn) -> dict:
+    """`load_site_meta`, cached per process until the 'site' tag is invalidated."""
+    get_invalidation_bus().poll(INVALIDATION_CHECK)
+    return dict(_site_meta_cache.get_or_load('all', lambda: load_site_meta(conn)))
+
+
+def cached_read(key, load):
+    """``load()``, through the per-process read cache when READ_CACHE is on."""
+    if not current_app.config['READ_CACHE']:
+        return load()
+    return read_through(key, load)
+
+
+def read_through(key, load):
+    """``load()`` through the per-process read cache, shared with backend/asgi.py.
+
+    With READ_SNAPSHOT a (re)load first brings the snapshot up to date, so a
+    write that has just invalidated the entry is not reloaded from the old
+    copy; a later swap marks the cache stale again (``on_swap``).
+    """
+    def load_fresh():
+        if READ_SNAPSHOT:
+            get_read_snapshot().refresh()
+        return load()
+
+    get_invalidation_bus().poll(INVALIDATION_CHECK)
+    return _read_cache.get(key, load_fresh)
+
+
+def parse_article_query(args):
+    """(q, page, per_page) from the query string, falling back to the defaults."""
+    q = (args.get('q') or '').strip()
+    try:
+        page = int(args.get('page') or '1')
+        if page < 1:
+            page = 1
+    except ValueError:
+        page = 1
+    try:
+        per_page = int(args.get('per_page') or '10')
+        if per_page < 1 or per_page > 100:
+            per_page = 10
+    except ValueError:
+        per_page = 10
+    return q, page, per_page
+
+
+def query_articles(conn, q: str, page: int, per_page: int) -> dict:
+    cur = conn.cursor()
+    params = []
+    where = ''
+    if q:
+        where = "WHERE title LIKE ? OR content LIKE ?"
+        like = f"%{q}%"
+        params.extend([like, like])
+    cur.execute(f"SELECT COUNT(*) FROM articles {where}", params)
+    total = cur.fetchone()[0]
+    offset = (page - 1) * per_page
+    params.extend([per_page, offset])
+    cur.execute(f"SELECT id, title, author, content, image, video, created_at FROM articles {where} ORDER BY created_at DESC LIMIT ? OFFSET ?", params)
+    articles = _dblib.fetch_dicts(cur)
+    return {'articles': articles, 'total': total, 'page': page, 'per_page': per_page}
+
+
+def load_article(conn, article_id):
+    row = conn.execute('SELECT id, title, author, content, image, video, created_at FROM articles WHERE id=?',
+                       (article_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def media_query(table: str) -> str:
+    """SELECT for the rows of ``photos`` or ``videos``, newest first."""
+    if table not in ('photos', 'videos'):
+        raise ValueError(table)
+    return f'SELECT id, filename, title, description, created_at FROM {table} ORDER BY created_at DESC'
+
+
+def list_media(conn, table: str) -> list:
+    return _dblib.fetch_dicts(conn.execute(media_query(table)))
+
+
+# Public gallery: photos and videos interleaved newest first, keyset-paginated.
+# Each arm of the UNION ALL walks its created_at index and SQLite merges them,
+# so a page costs `limit` index steps whatever the library size.
+MEDIA_KINDS = (('photo', 'photos'), ('video', 'videos'))  # type -> table (and uploads subdirectory)
+_MEDIA_TABLE = dict(MEDIA_KINDS)
+MEDIA_PAGE_SIZE = 24
+MEDIA_MAX_PAGE_SIZE = 100
+
+
+def encode_media_cursor(item) -> str:
+    raw = json.dumps([item['created_at'], item['id'], item['type']], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_media_cursor(cursor: str):
+    """(created_at, id, type) from a `next_cursor` value; ValueError if it is not one."""
+    try:
+        created_at, item_id, kind = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError('invalid cursor')
+    if not isinstance(item_id, int) or kind not in _MEDIA_TABLE:
+        raise ValueError('invalid cursor')
+    return created_at, item_id, kind
+
+
+def parse_media_query(args):
+    """(after, limit) from the query string; ValueError for a bad cursor."""
+    try:
+        limit = int(args.get('limit') or MEDIA_PAGE_SIZE)
+        if limit < 1 or limit > MEDIA_MAX_PAGE_SIZE:
+            limit = MEDIA_PAGE_SIZE
+    except ValueError:
+        limit = MEDIA_PAGE_SIZE
+    cursor = args.get('cursor')
+    return (decode_media_cursor(cursor) if cursor else None), limit
+
+
+def query_media(conn, after=None, limit=MEDIA_PAGE_SIZE) -> dict:
+    """One page of photos and videos ordered by (created_at, id, type), newest first."""
+    arms, params = [], []
+    for kind, table in MEDIA_KINDS:
+        where = ''
+        if after is not None:
+            # rows sharing the cursor's (created_at, id) come after it only for a smaller type
+            where = f"WHERE (created_at, id) {'<=' if kind < after[2] else '<'} (?, ?)"
+            params.extend(after[:2])
+        arms.append(f"SELECT '{kind}' AS type, id, filename, title, description, created_at FROM {table} {where}")
+    sql = ' UNION ALL '.join(arms) + ' ORDER BY created_at DESC, id DESC, type DESC LIMIT ?'
+    rows = _dblib.fetch_dicts(conn.execute(sql, params + [limit + 1]))
+    for row in rows:
+        row['url'] = f"/static/uploads/{_MEDIA_TABLE[row['type']]}/{row.pop('filename')}"
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return {'media': rows, 'next_cursor': encode_media_cursor(rows[-1]) if more else None}
+
+
+def stream_query(conn, sql, params=(), key='rows', default_ndjson=False):
+    """Response streaming the rows of ``sql`` without loading them all.
+
+    The body is ``{"<key>": [...]}`` (byte-identical to jsonify's) or, when
+    the client asks for ``Accept: application/x-ndjson``, one object per
+    line. ``conn`` is closed once the response has been sent.
+    """
+    provider = current_app.json
+    ndjson = _streaming.wants_ndjson(request.accept_mimetypes, default=default_ndjson)
+    rows = _streaming.iter_rows(conn.execute(sql, params))
+    dumps = lambda obj: provider.dumps(obj, separators=(',', ':'))  # noqa: E731  (jsonify's compact form)
+    body = _streaming.ndjson_lines(rows, dumps) if ndjson else _streaming.json_document(key, rows, dumps)
+    response = Response(body, mimetype=_streaming.NDJSON if ndjson else 'application/json')
+    response.call_on_close(conn.close)
+    return response
+
+
+def load_user(conn, user_id):
+    if not user_id:
+        return None
+    row = conn.execute('SELECT id, email, role FROM users WHERE id=?', (user_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def render_index() -> str:
+    conn = get_read_db()
+    meta = get_site_meta(conn)
+    conn.close()
+    return render_template('lfi_municipal_site.html', site_meta=meta)
+
+
+@route('/')
 def index():
     try:
-        # load site meta values to pass to template
-        conn = get_db()
-        cur = conn.cursor()
-        cur.execute('SELECT key, value FROM site_meta')
-        rows = cur.fetchall()
-        meta = {r['key']: r['value'] for r in rows} if rows else {}
-        conn.close()
-        return render_template('lfi_municipal_site.html', site_meta=meta)
+        if session.get('csrf_token'):
+            return render_index()  # the page embeds the session's CSRF token
+        return cached_read(('index',), render_index)
     except Exception:
         return render_template_string('<p>Frontend template missing.</p>'), 500
 
 
 # Site meta endpoints
-@app.route('/api/site', methods=['GET'])
+@route('/api/site', methods=['GET'])
 def api_get_site():
-    conn = get_db()
-    cur = conn.cursor()
-    cur.execute('SELECT key, value FROM site_meta')
-    rows = cur.fetchall()
+    conn = get_read_db()
+    data = get_site_meta(conn)
     conn.close()
-    data = {r['key']: r['value'] for r in rows}
     return jsonify(data), 200
 
 
-@app.route('/api/site', methods=['PUT'])
+@route('/api/site', methods=['PUT'])
 def api_update_site():
     if not session.get('user_id'):
         return jsonify({'error': 'Unauthorized'}), 401
@@ -406,9 +850,7 @@ def api_update_site():
         return jsonify({'error': 'Invalid CSRF token'}), 403
     conn = get_db()
     cur = conn.cursor()
-    cur.execute('SELECT role FROM users WHERE id=?', (session.get('user_id'),))
-    user = cur.fetchone()
-    if not user or user['role'] != 'admin':
+    if get_user_role(conn, session.get('user_id')) != 'admin':
         conn.close()
         return jsonify({'error': 'Forbidden'}), 403
     data = request.get_json() or {}
@@ -432,6 +874,7 @@ def api_update_site():
         updates.append((val, k))
     for val, key in updates:
         cur.execute('INSERT OR REPLACE INTO site_meta (key, value, updated_at) VALUES (?,?,CURRENT_TIMESTAMP)', (key, val))
+    content_changed(conn, 'site')
     conn.commit()
     # return updated full object
     cur.execute('SELECT key, value FROM site_meta')
@@ -441,21 +884,19 @@ def api_update_site():
     return jsonify(data), 200
 
 
-@app.route('/admin/request')
+@route('/admin/request')
 def show_request_form():
     return render_template('admin_request.html')
 
 
-@app.route('/admin/manage')
+@route('/admin/manage')
 def admin_manage():
     if not session.get('user_id'):
         return redirect(url_for('show_request_form'))
     conn = get_db()
-    cur = conn.cursor()
-    cur.execute('SELECT role FROM users WHERE id=?', (session.get('user_id'),))
-    user = cur.fetchone()
+    role = get_user_role(conn, session.get('user_id'))
     conn.close()
-    if not user or user['role'] != 'admin':
+    if role != 'admin':
         return "Access denied", 403
     csrf = session.get('csrf_token', '')
     # pass upload limits to client for pre-upload validation
@@ -463,79 +904,193 @@ def admin_manage():
                            max_image=IMAGE_MAX_BYTES, max_video=VIDEO_MAX_BYTES)
 
 
-@app.route('/admin/status')
+@route('/admin/status')
 def admin_status():
     """Return simple admin-facing JSON with Redis connection status and storage usage."""
     if not session.get('user_id'):
         return jsonify({'error': 'Unauthorized'}), 401
     conn = get_db()
-    cur = conn.cursor()
-    cur.execute('SELECT role FROM users WHERE id=?', (session.get('user_id'),))
-    user = cur.fetchone()
+    role = get_user_role(conn, session.get('user_id'))
     conn.close()
-    if not user or user['role'] != 'admin':
+    if role != 'admin':
         return jsonify({'error': 'Forbidden'}), 403
     info = {'storage_bytes': get_total_upload_bytes()}
+    conn = get_db()
+    try:
+        # per-directory totals as of the last `manage reconcile` run
+        info['storage_usage'] = {r['name']: {'files': r['files'], 'bytes': r['bytes'], 'updated_at': r['updated_at']}
+                                 for r in conn.execute('SELECT name, files, bytes, updated_at FROM storage_usage')}
+    finally:
+        conn.close()
+    info['invalidation'] = get_invalidation_bus().stats()
+    info['read_cache'] = _read_cache.stats()
     if _redis:
         try:
             info['redis_ping'] = _redis.ping()
         except Exception as e:
             info['redis_error'] = str(e)
+        if hasattr(_redis, 'stats'):
+            info['redis_stats'] = _redis.stats()
     else:
         info['redis'] = 'not configured'
+    if READ_SNAPSHOT:
+        info['read_snapshot'] = get_read_snapshot().stats()
     return jsonify(info), 200
 
 
-@app.route('/api/me', methods=['GET'])
+@route('/metrics')
+def metrics():
+    """Prometheus text exposition; admin session or `Bearer METRICS_TOKEN`."""
+    auth = request.headers.get('Authorization', '')
+    if not (METRICS_TOKEN and secrets.compare_digest(auth, f'Bearer {METRICS_TOKEN}')):
+        if not session.get('user_id'):
+            return jsonify({'error': 'Unauthorized'}), 401
+        conn = get_db()
+        role = get_user_role(conn, session.get('user_id'))
+        conn.close()
+        if role != 'admin':
+            return jsonify({'error': 'Forbidden'}), 403
+    if METRICS_DIR:
+        _metrics.registry.flush(METRICS_DIR)
+        snapshots = _metrics.read_snapshots(METRICS_DIR)
+    else:
+        snapshots = [_metrics.registry.snapshot()]
+    body = _metrics.render_prometheus(_metrics.merge_snapshots(snapshots))
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+
+@route('/admin/slow-queries', methods=['GET', 'DELETE'])
+def admin_slow_queries():
+    """List (newest first) or clear the slow-query ring buffer."""
+    if not session.get('user_id'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    if not _check_csrf():
+        return jsonify({'error': 'Invalid CSRF token'}), 403
+    conn = get_db()
+    role = get_user_role(conn, session.get('user_id'))
+    conn.close()
+    if role != 'admin':
+        return jsonify({'error': 'Forbidden'}), 403
+    if slow_query_log is None:
+        return jsonify({'enabled': False, 'queries': []}), 200
+    if request.method == 'DELETE':
+        slow_query_log.clear()
+    entries = list(slow_query_log.entries)[::-1]  # copy first: other threads keep appending
+    return jsonify({'enabled': True, 'threshold_ms': slow_query_log.threshold_ms,
+                    'full_scans': sum(1 for e in entries if e['full_scan']), 'queries': entries}), 200
+
+
+@route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: the worker answers requests. No I/O, so it never flaps with the DB."""
+    return jsonify({'status': 'ok', 'pid': os.getpid()}), 200
+
+
+@route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness: the DB answers and its schema is current.
+
+    Redis is reported but does not fail readiness, since every Redis user
+    falls back to a local implementation.
+    """
+    checks = {}
+    ready = True
+    try:
+        conn = get_db()
+        try:
+            conn.execute('SELECT 1').fetchone()
+            todo = _migrations.pending(conn)
+        finally:
+            conn.close()
+        checks['db'] = 'ok'
+        if todo:
+            ready = False
+            checks['migrations'] = [f'{m.version:04d}_{m.name}' for m in todo]
+    except sqlite3.Error as e:
+        ready = False
+        checks['db'] = f'error: {e}'
+    if _redis:
+        checks['redis'] = 'ok' if redis_available() else 'unavailable'
+    return jsonify({'status': 'ready' if ready else 'unavailable', 'checks': checks}), 200 if ready else 503
+
+
+@route('/api/me', methods=['GET'])
 def api_me():
     if not session.get('user_id'):
         return jsonify({'user': None}), 200
     conn = get_db()
-    cur = conn.cursor()
-    cur.execute('SELECT id, email, role FROM users WHERE id=?', (session.get('user_id'),))
-    row = cur.fetchone()
+    user = load_user(conn, session.get('user_id'))
     conn.close()
-    if not row:
-        return jsonify({'user': None}), 200
-    return jsonify({'user': dict(row)}), 200
+    return jsonify({'user': user}), 200
 
 
 # Articles endpoints
-@app.route('/api/articles', methods=['GET'])
+def validate_article(data: dict):
+    """Return normalized (title, author, content, image, video) or raise ValueError."""
+    title = (data.get('title') or '').strip()
+    author = (data.get('author') or '').strip()
+    content = (data.get('content') or '').strip()
+    image = (data.get('image') or '').strip()
+    video = (data.get('video') or '').strip()
+    if not title:
+        raise ValueError('title required')
+    if len(title) > 200 or len(author) > 100 or len(content) > 10000:
+        raise ValueError('Input too long')
+    if image and not is_allowed_media_url(image):
+        raise ValueError('Invalid image URL')
+    if video and not is_allowed_media_url(video):
+        raise ValueError('Invalid video URL')
+    return title, author, content, image, video
+
+
+@route('/api/articles', methods=['GET'])
 def api_get_articles():
-    q = (request.args.get('q') or '').strip()
-    try:
-        page = int(request.args.get('page') or '1')
-        if page < 1:
-            page = 1
-    except ValueError:
-        page = 1
-    try:
-        per_page = int(request.args.get('per_page') or '10')
-        if per_page < 1 or per_page > 100:
-            per_page = 10
-    except ValueError:
-        per_page = 10
-    conn = get_db()
-    cur = conn.cursor()
-    params = []
-    where = ''
-    if q:
-        where = "WHERE title LIKE ? OR content LIKE ?"
-        like = f"%{q}%"
-        params.extend([like, like])
-    cur.execute(f"SELECT COUNT(*) FROM articles {where}", params)
-    total = cur.fetchone()[0]
-    offset = (page - 1) * per_page
-    params.extend([per_page, offset])
-    cur.execute(f"SELECT id, title, author, content, image, video, created_at FROM articles {where} ORDER BY created_at DESC LIMIT ? OFFSET ?", params)
-    rows = cur.fetchall()
-    articles = [dict(r) for r in rows]
+    q, page, per_page = parse_article_query(request.args)
+    return articles_response(q, page, per_page)
+
+
+def articles_response(q, page, per_page):
+    def load():
+        conn = get_read_db()
+        try:
+            return jsonify(query_articles(conn, q, page, per_page)).get_data()
+        finally:
+            conn.close()
+    return current_app.response_class(cached_read(('articles', q, page, per_page), load),
+                                      mimetype='application/json')
+
+
+@route('/api/articles/page/<int:page>', methods=['GET'])
+def api_get_articles_page(page):
+    """Path form of ``/api/articles?page=N`` (default page size), used by the static export."""
+    _, _, per_page = parse_article_query({})
+    return articles_response('', max(page, 1), per_page)
+
+
+@route('/api/articles/<int:article_id>', methods=['GET'])
+def api_get_article(article_id):
+    conn = get_read_db()
+    article = load_article(conn, article_id)
+    conn.close()
+    if article is None:
+        return jsonify({'error': 'not found'}), 404
+    return jsonify({'article': article}), 200
+
+
+@route('/articles/<int:article_id>')
+def article_page(article_id):
+    conn = get_read_db()
+    article = load_article(conn, article_id)
+    meta = get_site_meta(conn)
     conn.close()
-    return jsonify({'articles': articles, 'total': total, 'page': page, 'per_page': per_page}), 200
+    if article is None:
+        abort(404)
+    video = article['video'] if is_allowed_media_url(article['video']) else None
+    image = article['image'] if is_allowed_image_url(article['image']) else None
+    return render_template('article.html', article=article, site_meta=meta, video=video, image=image)
 
 
-@app.route('/api/articles', methods=['POST'])
+@route('/api/articles', methods=['POST'])
 def api_create_article():
     if not session.get('user_id'):
         return jsonify({'error': 'Unauthorized'}), 401
@@ -543,30 +1098,16 @@ def api_create_article():
         return jsonify({'error': 'Invalid CSRF token'}), 403
     conn = get_db()
     cur = conn.cursor()
-    cur.execute('SELECT role FROM users WHERE id=?', (session.get('user_id'),))
-    user = cur.fetchone()
-    if not user or user['role'] != 'admin':
+    if get_user_role(conn, session.get('user_id')) != 'admin':
         conn.close()
         return jsonify({'error': 'Forbidden'}), 403
-    data = request.get_json() or {}
-    title = (data.get('title') or '').strip()
-    author = (data.get('author') or '').strip()
-    content = (data.get('content') or '').strip()
-    image = (data.get('image') or '').strip()
-    video = (data.get('video') or '').strip()
-    if not title:
-        conn.close()
-        return jsonify({'error': 'title required'}), 400
-    if len(title) > 200 or len(author) > 100 or len(content) > 10000:
-        conn.close()
-        return jsonify({'error': 'Input too long'}), 400
-    if image and not is_allowed_media_url(image):
-        conn.close()
-        return jsonify({'error': 'Invalid image URL'}), 400
-    if video and not is_allowed_media_url(video):
+    try:
+        title, author, content, image, video = validate_article(request.get_json() or {})
+    except ValueError as e:
         conn.close()
-        return jsonify({'error': 'Invalid video URL'}), 400
+        return jsonify({'error': str(e)}), 400
     cur.execute('INSERT INTO articles (title, author, content, image, video) VALUES (?,?,?,?,?)', (title, author, content, image, video))
+    content_changed(conn)
     conn.commit()
     article_id = cur.lastrowid
     cur.execute('SELECT id, title, author, content, image, video, created_at FROM articles WHERE id=?', (article_id,))
@@ -575,7 +1116,7 @@ def api_create_article():
     return jsonify({'article': dict(row)}), 201
 
 
-@app.route('/api/articles/<int:article_id>', methods=['PUT'])
+@route('/api/articles/<int:article_id>', methods=['PUT'])
 def api_update_article(article_id):
     if not session.get('user_id'):
         return jsonify({'error': 'Unauthorized'}), 401
@@ -583,30 +1124,16 @@ def api_update_article(article_id):
         return jsonify({'error': 'Invalid CSRF token'}), 403
     conn = get_db()
     cur = conn.cursor()
-    cur.execute('SELECT role FROM users WHERE id=?', (session.get('user_id'),))
-    user = cur.fetchone()
-    if not user or user['role'] != 'admin':
+    if get_user_role(conn, session.get('user_id')) != 'admin':
         conn.close()
         return jsonify({'error': 'Forbidden'}), 403
-    data = request.get_json() or {}
-    title = (data.get('title') or '').strip()
-    author = (data.get('author') or '').strip()
-    content = (data.get('content') or '').strip()
-    image = (data.get('image') or '').strip()
-    video = (data.get('video') or '').strip()
-    if not title:
-        conn.close()
-        return jsonify({'error': 'title required'}), 400
-    if len(title) > 200 or len(author) > 100 or len(content) > 10000:
-        conn.close()
-        return jsonify({'error': 'Input too long'}), 400
-    if image and not is_allowed_media_url(image):
-        conn.close()
-        return jsonify({'error': 'Invalid image URL'}), 400
-    if video and not is_allowed_media_url(video):
+    try:
+        title, author, content, image, video = validate_article(request.get_json() or {})
+    except ValueError as e:
         conn.close()
-        return jsonify({'error': 'Invalid video URL'}), 400
+        return jsonify({'error': str(e)}), 400
     cur.execute('UPDATE articles SET title=?, author=?, content=?, image=?, video=? WHERE id=?', (title, author, content, image, video, article_id))
+    content_changed(conn)
     conn.commit()
     cur.execute('SELECT id, title, author, content, image, video, created_at FROM articles WHERE id=?', (article_id,))
     row = cur.fetchone()
@@ -616,7 +1143,7 @@ def api_update_article(article_id):
     return jsonify({'article': dict(row)}), 200
 
 
-@app.route('/api/articles/<int:article_id>', methods=['DELETE'])
+@route('/api/articles/<int:article_id>', methods=['DELETE'])
 def api_delete_article(article_id):
     if not session.get('user_id'):
         return jsonify({'error': 'Unauthorized'}), 401
@@ -624,29 +1151,80 @@ def api_delete_article(article_id):
         return jsonify({'error': 'Invalid CSRF token'}), 403
     conn = get_db()
     cur = conn.cursor()
-    cur.execute('SELECT role FROM users WHERE id=?', (session.get('user_id'),))
-    user = cur.fetchone()
-    if not user or user['role'] != 'admin':
+    if get_user_role(conn, session.get('user_id')) != 'admin':
         conn.close()
         return jsonify({'error': 'Forbidden'}), 403
     cur.execute('DELETE FROM articles WHERE id=?', (article_id,))
+    content_changed(conn)
     conn.commit()
     conn.close()
     return jsonify({'status': 'deleted'}), 200
 
 
+# Bulk JSONL import/export (backend/bulk.py)
+@route('/api/admin/articles/import', methods=['POST'])
+def api_import_articles():
+    """Import a JSONL request body; ``?dry_run=1`` only validates, ``?batch_size=N``."""
+    if not session.get('user_id'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    if not _check_csrf():
+        return jsonify({'error': 'Invalid CSRF token'}), 403
+    conn = get_db()
+    try:
+        if get_user_role(conn, session.get('user_id')) != 'admin':
+            return jsonify({'error': 'Forbidden'}), 403
+        try:
+            batch_size = min(max(int(request.args.get('batch_size') or _bulk.DEFAULT_BATCH_SIZE), 1), 5000)
+        except ValueError:
+            batch_size = _bulk.DEFAULT_BATCH_SIZE
+        dry_run = request.args.get('dry_run') in ('1', 'true')
+        # read the body line by line: memory stays bounded by one batch
+        report = _bulk.import_articles(conn, request.stream, validate_article, batch_size=batch_size,
+                                       dry_run=dry_run, on_batch=content_changed)
+    finally:
+        conn.close()
+    return jsonify(report), 200
+
+
+@route('/api/admin/articles/export', methods=['GET'])
+def api_export_articles():
+    """Stream every article, as JSONL by default."""
+    if not session.get('user_id'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    conn = get_db()
+    if get_user_role(conn, session.get('user_id')) != 'admin':
+        conn.close()
+        return jsonify({'error': 'Forbidden'}), 403
+
+    # NDJSON unless the client asks for application/json
+    response = stream_query(conn, _bulk.EXPORT_SQL, key='articles', default_ndjson=True)
+    if response.mimetype == _streaming.NDJSON:
+        response.headers['Content-Disposition'] = 'attachment; filename=articles.jsonl'
+    return response
+
+
 # Photos endpoints
-@app.route('/api/photos', methods=['GET'])
+@route('/api/photos', methods=['GET'])
 def photos_list():
-    conn = get_db()
-    cur = conn.cursor()
-    cur.execute('SELECT id, filename, title, description, created_at FROM photos ORDER BY created_at DESC')
-    rows = cur.fetchall()
-    conn.close()
-    return jsonify({'photos': [dict(r) for r in rows]}), 200
+    return stream_query(get_read_db(), media_query('photos'), key='photos')
+
+
+@route('/api/media', methods=['GET'])
+def media_list():
+    """Photos and videos newest first: ``?limit=N`` (max 100), then ``?cursor=<next_cursor>``."""
+    try:
+        after, limit = parse_media_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    conn = get_read_db()
+    try:
+        data = query_media(conn, after, limit)
+    finally:
+        conn.close()
+    return jsonify(data), 200
 
 
-@app.route('/api/photos', methods=['POST'])
+@route('/api/photos', methods=['POST'])
 def photos_create():
     if not session.get('user_id'):
         return jsonify({'error': 'Unauthorized'}), 401
@@ -654,9 +1232,7 @@ def photos_create():
         return jsonify({'error': 'Invalid CSRF token'}), 403
     conn = get_db()
     cur = conn.cursor()
-    cur.execute('SELECT role FROM users WHERE id=?', (session.get('user_id'),))
-    user = cur.fetchone()
-    if not user or user['role'] != 'admin':
+    if get_user_role(conn, session.get('user_id')) != 'admin':
         conn.close()
         return jsonify({'error': 'Forbidden'}), 403
     name, err = save_upload('file', PHOTO_DIR)
@@ -673,6 +1249,7 @@ def photos_create():
     title = (request.form.get('title') or '').strip()
     description = (request.form.get('description') or '').strip()
     cur.execute('INSERT INTO photos (filename, title, description, created_at) VALUES (?,?,?,?)', (name, title, description, datetime.utcnow().isoformat()))
+    content_changed(conn)
     conn.commit()
     pid = cur.lastrowid
     cur.execute('SELECT id, filename, title, description, created_at FROM photos WHERE id=?', (pid,))
@@ -681,7 +1258,7 @@ def photos_create():
     return jsonify({'photo': dict(row)}), 201
 
 
-@app.route('/api/photos/<int:photo_id>', methods=['DELETE'])
+@route('/api/photos/<int:photo_id>', methods=['DELETE'])
 def photos_delete(photo_id):
     if not session.get('user_id'):
         return jsonify({'error': 'Unauthorized'}), 401
@@ -696,6 +1273,7 @@ def photos_delete(photo_id):
         return jsonify({'error': 'not found'}), 404
     fname = r['filename']
     cur.execute('DELETE FROM photos WHERE id=?', (photo_id,))
+    content_changed(conn)
     conn.commit()
     conn.close()
     try:
@@ -705,23 +1283,67 @@ def photos_delete(photo_id):
     return jsonify({'status': 'deleted'}), 200
 
 
-@app.route('/static/uploads/photos/<path:filename>')
+def _bulk_delete_media(table):
+    if not session.get('user_id'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    if not _check_csrf():
+        return jsonify({'error': 'Invalid CSRF token'}), 403
+    ids = (request.get_json(silent=True) or {}).get('ids')
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, int) for i in ids):
+        return jsonify({'error': 'ids must be a non-empty list of integers'}), 400
+    conn = get_db()
+    try:
+        if get_user_role(conn, session.get('user_id')) != 'admin':
+            return jsonify({'error': 'Forbidden'}), 403
+        try:
+            result = _trash.move_to_trash(conn, table, ids, UPLOAD_BASE, TRASH_DIR, on_commit=content_changed)
+        except _trash.TrashError as e:
+            return jsonify({'error': str(e)}), 400
+    finally:
+        conn.close()
+    if result['batch']:
+        get_trash_collector().start()
+        result['undo_until'] = int(time.time()) + TRASH_RETENTION
+    return jsonify(result), 200
+
+
+@route('/api/photos/bulk-delete', methods=['POST'])
+def photos_bulk_delete():
+    """Delete many photos: {"ids": [...]}. The files stay restorable for TRASH_RETENTION seconds."""
+    return _bulk_delete_media('photos')
+
+
+@route('/api/media/trash/<batch>/restore', methods=['POST'])
+def media_trash_restore(batch):
+    if not session.get('user_id'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    if not _check_csrf():
+        return jsonify({'error': 'Invalid CSRF token'}), 403
+    conn = get_db()
+    try:
+        if get_user_role(conn, session.get('user_id')) != 'admin':
+            return jsonify({'error': 'Forbidden'}), 403
+        try:
+            result = _trash.restore(conn, batch, UPLOAD_BASE, TRASH_DIR, TRASH_RETENTION, on_commit=content_changed)
+        except _trash.TrashError as e:
+            return jsonify({'error': str(e)}), 404
+    finally:
+        conn.close()
+    return jsonify(result), 200
+
+
+@route('/static/uploads/photos/<path:filename>')
 def serve_photo(filename):
     return send_from_directory(PHOTO_DIR, filename)
 
 
 # Videos endpoints
-@app.route('/api/videos', methods=['GET'])
+@route('/api/videos', methods=['GET'])
 def videos_list():
-    conn = get_db()
-    cur = conn.cursor()
-    cur.execute('SELECT id, filename, title, description, created_at FROM videos ORDER BY created_at DESC')
-    rows = cur.fetchall()
-    conn.close()
-    return jsonify({'videos': [dict(r) for r in rows]}), 200
+    return stream_query(get_read_db(), media_query('videos'), key='videos')
 
 
-@app.route('/api/videos', methods=['POST'])
+@route('/api/videos', methods=['POST'])
 def videos_create():
     if not session.get('user_id'):
         return jsonify({'error': 'Unauthorized'}), 401
@@ -729,9 +1351,7 @@ def videos_create():
         return jsonify({'error': 'Invalid CSRF token'}), 403
     conn = get_db()
     cur = conn.cursor()
-    cur.execute('SELECT role FROM users WHERE id=?', (session.get('user_id'),))
-    user = cur.fetchone()
-    if not user or user['role'] != 'admin':
+    if get_user_role(conn, session.get('user_id')) != 'admin':
         conn.close()
         return jsonify({'error': 'Forbidden'}), 403
     name, err = save_upload('file', VIDEO_DIR)
@@ -748,6 +1368,7 @@ def videos_create():
     title = (request.form.get('title') or '').strip()
     description = (request.form.get('description') or '').strip()
     cur.execute('INSERT INTO videos (filename, title, description, created_at) VALUES (?,?,?,?)', (name, title, description, datetime.utcnow().isoformat()))
+    content_changed(conn)
     conn.commit()
     vid = cur.lastrowid
     cur.execute('SELECT id, filename, title, description, created_at FROM videos WHERE id=?', (vid,))
@@ -756,7 +1377,7 @@ def videos_create():
     return jsonify({'video': dict(row)}), 201
 
 
-@app.route('/api/videos/<int:video_id>', methods=['DELETE'])
+@route('/api/videos/<int:video_id>', methods=['DELETE'])
 def videos_delete(video_id):
     if not session.get('user_id'):
         return jsonify({'error': 'Unauthorized'}), 401
@@ -771,6 +1392,7 @@ def videos_delete(video_id):
         return jsonify({'error': 'not found'}), 404
     fname = r['filename']
     cur.execute('DELETE FROM videos WHERE id=?', (video_id,))
+    content_changed(conn)
     conn.commit()
     conn.close()
     try:
@@ -780,12 +1402,17 @@ def videos_delete(video_id):
     return jsonify({'status': 'deleted'}), 200
 
 
-@app.route('/static/uploads/videos/<path:filename>')
+@route('/api/videos/bulk-delete', methods=['POST'])
+def videos_bulk_delete():
+    return _bulk_delete_media('videos')
+
+
+@route('/static/uploads/videos/<path:filename>')
 def serve_video(filename):
     return send_from_directory(VIDEO_DIR, filename)
 
 
-@app.route('/admin/logout')
+@route('/admin/logout')
 def admin_logout():
     session.clear()
     return redirect(url_for('show_request_form'))
@@ -801,10 +1428,91 @@ def gen_token():
     return secrets.token_urlsafe(32)
 
 
+# Magic-link lifetime. expires_at is stored as an integer UNIX epoch so the
+# expiry check is a plain indexed comparison done by SQLite.
+TOKEN_TTL_SECONDS = int(os.getenv('TOKEN_TTL_SECONDS', str(2 * 60 * 60)))
+
+# UPDATE ... RETURNING needs SQLite 3.35+
+_SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+
+def consume_login_token(conn, token_hash: str):
+    """Atomically mark an unused, unexpired token as used.
+
+    Returns the owning user_id, or None if the token is unknown, already used
+    or expired. Only one of several concurrent callers can succeed.
+    """
+    now = int(time.time())
+    cur = conn.cursor()
+    if _SQLITE_HAS_RETURNING:
+        cur.execute('UPDATE login_tokens SET used=1 WHERE token_hash=? AND used=0 AND expires_at > ? RETURNING user_id', (token_hash, now))
+        row = cur.fetchone()
+        conn.commit()
+        return row[0] if row else None
+    # Older SQLite: the guarded UPDATE is still the arbiter; rowcount tells
+    # whether this caller won.
+    cur.execute('SELECT id, user_id FROM login_tokens WHERE token_hash=? AND used=0 AND expires_at > ?', (token_hash, now))
+    row = cur.fetchone()
+    if not row:
+        return None
+    cur.execute('UPDATE login_tokens SET used=1 WHERE id=? AND used=0', (row[0],))
+    conn.commit()
+    return row[1] if cur.rowcount == 1 else None
+
+
+# Login-token table compaction. Consumed and expired rows are deleted in
+# bounded batches so a single request never holds the write lock for long.
+TOKEN_PURGE_BATCH = int(os.getenv('TOKEN_PURGE_BATCH', '500'))
+TOKEN_PURGE_INTERVAL = int(os.getenv('TOKEN_PURGE_INTERVAL', '600'))  # seconds between opportunistic runs
+_last_token_purge = 0.0
+
+
+def purge_login_tokens(conn, batch_size: int = TOKEN_PURGE_BATCH, max_batches: int = 1) -> int:
+    """Delete used and expired login tokens, at most ``batch_size`` rows per batch.
+
+    Each batch is committed separately; ``max_batches`` applies to the used and
+    the expired pass independently. Pass ``max_batches=None`` to loop until
+    nothing is left. Returns the number of deleted rows.
+    """
+    now = int(time.time())
+    cur = conn.cursor()
+    deleted = 0
+    # Two range scans on idx_login_tokens_used_expires rather than an OR that
+    # would defeat the index.
+    queries = (
+        ('SELECT id FROM login_tokens WHERE used=1 LIMIT ?', ()),
+        ('SELECT id FROM login_tokens WHERE used=0 AND expires_at < ? LIMIT ?', (now,)),
+    )
+    for select_sql, params in queries:
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            cur.execute(f'DELETE FROM login_tokens WHERE id IN ({select_sql})', params + (batch_size,))
+            conn.commit()
+            batches += 1
+            deleted += cur.rowcount
+            if cur.rowcount < batch_size:
+                break
+    return deleted
+
+
+def maybe_purge_login_tokens(conn) -> int:
+    """Run one purge batch if TOKEN_PURGE_INTERVAL has elapsed in this process."""
+    global _last_token_purge
+    now = time.time()
+    if now - _last_token_purge < TOKEN_PURGE_INTERVAL:
+        return 0
+    _last_token_purge = now
+    try:
+        return purge_login_tokens(conn)
+    except Exception:
+        logger.exception('Login token purge failed')
+        return 0
+
+
 def hash_token(token: str) -> str:
     return hashlib.sha256(token.encode('utf-8')).hexdigest()
 
-@app.route('/auth/request-token', methods=['POST'])
+@route('/auth/request-token', methods=['POST'])
 def auth_request_token():
     data = request.get_json() or {}
     email = (data.get('email') or '').strip().lower()
@@ -813,7 +1521,7 @@ def auth_request_token():
 
     # Rate limit requests per IP/address
     if check_rate_limit_for_request():
-        app.logger.warning('Rate limited request-token from %s', _rl_key_for_request())
+        logger.warning('Rate limited request-token from %s', _rl_key_for_request())
         # Return OK to avoid leaking rate-limit state
         return jsonify({'status': 'ok'}), 200
 
@@ -830,54 +1538,108 @@ def auth_request_token():
     user_id = user['id']
     token = gen_token()
     th = hash_token(token)
-    expires = (datetime.utcnow() + timedelta(hours=2)).isoformat()
+    expires = int(time.time()) + TOKEN_TTL_SECONDS
     cur.execute('INSERT INTO login_tokens (user_id, token_hash, expires_at, used, ip, user_agent) VALUES (?,?,?,?,?,?)', (user_id, th, expires, 0, request.remote_addr, request.headers.get('User-Agent')))
     conn.commit()
+    maybe_purge_login_tokens(conn)
     conn.close()
 
     sent = send_magic_link(email, user_id, token)
     if not sent:
-        app.logger.warning('Failed to send magic link to %s; token=%s', email, token)
+        logger.warning('Failed to send magic link to %s; token=%s', email, token)
     else:
-        app.logger.info('Generated token for %s (id=%s) token=%s', email, user_id, token)
+        logger.info('Generated token for %s (id=%s) token=%s', email, user_id, token)
     # Always return OK to avoid enumerating emails
     return jsonify({'status': 'ok'}), 200
 
 
-@app.route('/auth/consume', methods=['GET'])
+@route('/auth/consume', methods=['GET'])
 def auth_consume():
     token = request.args.get('token')
     uid = request.args.get('uid')
     if not token or not uid:
         return redirect(url_for('show_request_form'))
     conn = get_db()
-    cur = conn.cursor()
-    th = hash_token(token)
-    cur.execute('SELECT id, user_id, expires_at, used FROM login_tokens WHERE token_hash=?', (th,))
-    row = cur.fetchone()
-    if not row:
-        return redirect(url_for('show_request_form'))
-    if row['used']:
+    user_id = consume_login_token(conn, hash_token(token))
+    if user_id is not None:
+        conn.execute('UPDATE users SET last_login_at=? WHERE id=?', (datetime.utcnow().isoformat(), user_id))
+        conn.commit()
+    conn.close()
+    if user_id is None:
         return redirect(url_for('show_request_form'))
-    # check expiry
-    try:
-        exp = datetime.fromisoformat(row['expires_at'])
-        if datetime.utcnow() > exp:
-            return redirect(url_for('show_request_form'))
-    except Exception:
-        pass
-    # mark used
-    cur.execute('UPDATE login_tokens SET used=1 WHERE id=?', (row['id'],))
-    conn.commit()
     # create session
     session.clear()
-    session['user_id'] = row['user_id']
+    session['user_id'] = user_id
     session['csrf_token'] = secrets.token_hex(16)
-    conn.close()
     return redirect(url_for('admin_manage'))
 
 
+def create_app(config=None):
+    """Build the Flask application.
+
+    ``config`` is a mapping applied to ``app.config`` over the defaults below;
+    ``SESSION_BACKEND`` may be given there to override the environment.
+    """
+    app = Flask(__name__)
+    app.secret_key = SECRET_KEY
+    # Prevent very large requests at the WSGI boundary (global cap)
+    app.config['MAX_CONTENT_LENGTH'] = MAX_TOTAL_UPLOAD_BYTES
+    app.config['SESSION_BACKEND'] = SESSION_BACKEND
+    app.config['JSON_PROVIDER'] = JSON_PROVIDER
+    app.config['READ_CACHE'] = READ_CACHE
+    if config:
+        app.config.update(config)
+    app.json = _json_provider.make_provider(app, app.config['JSON_PROVIDER'])
+    app.logger  # installs Flask's default handler on the shared logger
+    for rule, options, view in _routes:
+        app.add_url_rule(rule, view_func=view, **options)
+    app.before_request(_metrics_start)
+    app.after_request(_metrics_status)
+    if PUBLISH_DIR:
+        app.after_request(_publish_after_write)
+    app.after_request(_publish_invalidations)  # registered last: runs first
+    app.teardown_request(_metrics_finish)
+    interface = _session_interface(app.config['SESSION_BACKEND'])
+    if interface is not None:
+        app.session_interface = interface
+    return app
+
+
+def _reinit_after_fork():
+    """Reset per-process state in a forked worker (gunicorn --preload, os.fork).
+
+    Locks may have been held by another thread of the parent at fork time, and
+    the parent's caches, counters and Redis sockets must not leak into workers.
+    """
+    global _rl_lock, _read_snapshot, _publisher, _trash_collector
+    _rl_lock = threading.Lock()
+    _rl_buckets.clear()
+    _role_cache.clear()
+    _site_meta_cache.clear()
+    _read_cache.after_fork()
+    if _invalidation_bus is not None:
+        _invalidation_bus.after_fork()
+    _read_snapshot = None  # the parent's connections are not usable here
+    _publisher = None
+    _trash_collector = None  # its thread did not survive the fork
+    if _redis is not None and hasattr(_redis, 'after_fork'):
+        _redis.after_fork()
+    _metrics.registry.after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reinit_after_fork)
+
+
+def __getattr__(name):
+    # `from backend.app import app` (and the tests) get a default app built on first use
+    if name == 'app':
+        app = globals()['app'] = create_app()
+        return app
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
 # Initialize DB when run directly
 if __name__ == '__main__':
         init_db()
-        app.run(host='0.0.0.0', port=5000, debug=True)
+        create_app().run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,250 @@
+"""Async (ASGI) variant of the public read API.
+
+  uvicorn backend.asgi:application --workers 2
+
+Serves GET/HEAD for /, /api/site, /api/articles, /api/photos, /api/videos,
+/api/media and /api/me with the same query functions as the Flask views
+(load_site_meta, query_articles, list_media, query_media, load_user) and the same JSON provider, templates
+and session backend. Put it behind the proxy for those paths and keep sending
+everything else (writes, admin, uploads) to the WSGI app; other requests get
+404/405 here.
+
+/ (for visitors without a session) and /api/articles go through the same
+per-process read cache as the Flask views (`app.read_through`, READ_CACHE):
+concurrent misses share one query and render, and after a write one request
+refreshes while the others get the previous body.
+
+Blocking work (SQLite, JSON encoding, template rendering) runs on a dedicated
+pool of ASGI_DB_THREADS threads, each keeping its own connection, so a slow
+disk read holds one pool thread while the event loop keeps accepting and
+answering other visitors. At most ASGI_MAX_CONCURRENCY requests are admitted
+at once; a request that cannot get a slot within ASGI_QUEUE_TIMEOUT seconds
+gets 503 with Retry-After instead of queueing without bound.
+
+Compare with the WSGI handlers using scripts/bench_async_reads.py.
+"""
+
+import asyncio
+import io
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+import flask
+
+import backend.app as appmod
+from backend import metrics as _metrics
+
+ASGI_DB_THREADS = int(os.getenv('ASGI_DB_THREADS', '4'))
+ASGI_MAX_CONCURRENCY = int(os.getenv('ASGI_MAX_CONCURRENCY', '64'))
+ASGI_QUEUE_TIMEOUT = float(os.getenv('ASGI_QUEUE_TIMEOUT', '5'))
+
+
+def _environ(scope) -> dict:
+    """Minimal WSGI environ for an ASGI http scope (used to open the session)."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client')
+    env = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0] or 'localhost',
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0] if client else '',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(b''),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', ()):
+        key = name.decode('latin-1').upper().replace('-', '_')
+        if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            key = 'HTTP_' + key
+        value = value.decode('latin-1')
+        env[key] = f'{env[key]},{value}' if key in env else value
+    return env
+
+
+def _query_args(scope) -> dict:
+    qs = scope.get('query_string', b'').decode('latin-1')
+    return {k: v[0] for k, v in parse_qs(qs, keep_blank_values=True).items()}
+
+
+class AsyncReadAPI:
+    """ASGI application serving the public read endpoints."""
+
+    def __init__(self, flask_app=None, db_threads=ASGI_DB_THREADS, max_concurrency=ASGI_MAX_CONCURRENCY,
+                 queue_timeout=ASGI_QUEUE_TIMEOUT):
+        self.flask_app = flask_app or appmod.create_app()
+        self.db_threads = db_threads
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        # path -> (endpoint, handler, reads only public tables)
+        self.routes = {
+            '/': ('index', self._index, True),
+            '/api/site': ('api_get_site', self._site, True),
+            '/api/articles': ('api_get_articles', self._articles, True),
+            '/api/photos': ('photos_list', self._photos, True),
+            '/api/videos': ('videos_list', self._videos, True),
+            '/api/media': ('media_list', self._media, True),
+            '/api/me': ('api_me', self._me, False),
+        }
+        self._local = threading.local()
+        self._executor = None
+        self._slots = None
+        self._pid = None
+
+    # Per-process resources, created on first use (and again in a forked child)
+
+    def _ensure_pool(self):
+        if self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(self.db_threads, thread_name_prefix='asgi-db')
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._pid = os.getpid()
+
+    def close(self):
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=False)
+        self._executor = self._slots = self._pid = None
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = appmod.get_db()
+        return conn
+
+    def _run(self, handler, scope, public):
+        """Run ``handler(conn, scope)`` on a pool thread with its own connection.
+
+        Public reads use the in-memory snapshot when READ_SNAPSHOT is on.
+        """
+        if public and appmod.READ_SNAPSHOT:
+            conn = appmod.get_read_db()
+            try:
+                return handler(conn, scope)
+            finally:
+                conn.close()
+        try:
+            return handler(self._conn(), scope)
+        except sqlite3.Error:
+            conn, self._local.conn = self._local.conn, None
+            conn.close()
+            raise
+
+    # Handlers: (conn, scope) -> (status, content type, body), run on the pool
+
+    def _json(self, data, status=200):
+        resp = self.flask_app.json.response(data)
+        return status, resp.content_type, resp.get_data()
+
+    def _cached(self, key, load):
+        if not self.flask_app.config['READ_CACHE']:
+            return load()
+        return appmod.read_through(key, load)
+
+    def _index(self, conn, scope):
+        try:
+            with self.flask_app.request_context(_environ(scope)):
+                def render():
+                    return flask.render_template('lfi_municipal_site.html', site_meta=appmod.load_site_meta(conn))
+                # the page embeds the session's CSRF token: only anonymous renderings are shared
+                html = render() if flask.session.get('csrf_token') else self._cached(('index',), render)
+            return 200, 'text/html; charset=utf-8', html.encode('utf-8')
+        except Exception:
+            return 500, 'text/html; charset=utf-8', b'<p>Frontend template missing.</p>'
+
+    def _site(self, conn, scope):
+        return self._json(appmod.load_site_meta(conn))
+
+    def _articles(self, conn, scope):
+        q, page, per_page = appmod.parse_article_query(_query_args(scope))
+        # same key and value (the encoded body) as the Flask view
+        body = self._cached(('articles', q, page, per_page),
+                            lambda: self._json(appmod.query_articles(conn, q, page, per_page))[2])
+        return 200, self.flask_app.json.mimetype, body
+
+    def _photos(self, conn, scope):
+        return self._json({'photos': appmod.list_media(conn, 'photos')})
+
+    def _videos(self, conn, scope):
+        return self._json({'videos': appmod.list_media(conn, 'videos')})
+
+    def _media(self, conn, scope):
+        try:
+            after, limit = appmod.parse_media_query(_query_args(scope))
+        except ValueError as e:
+            return self._json({'error': str(e)}, 400)
+        return self._json(appmod.query_media(conn, after, limit))
+
+    def _me(self, conn, scope):
+        # opening a request context runs the configured session interface
+        with self.flask_app.request_context(_environ(scope)):
+            user_id = flask.session.get('user_id')
+        return self._json({'user': appmod.load_user(conn, user_id)})
+
+    # ASGI
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        t0 = time.perf_counter()
+        route = self.routes.get(scope['path'])
+        headers = []
+        if route is None:
+            endpoint, result = 'unmatched', self._json({'error': 'Not found'}, 404)
+        elif scope['method'] not in ('GET', 'HEAD'):
+            endpoint, result = route[0], self._json({'error': 'Method not allowed'}, 405)
+            headers.append((b'allow', b'GET, HEAD'))
+        else:
+            endpoint = route[0]
+            result = await self._handle(route[1], route[2], scope, headers)
+        status, content_type, body = result
+        headers.append((b'content-type', content_type.encode('latin-1')))
+        headers.append((b'content-length', str(len(body)).encode('latin-1')))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b'' if scope['method'] == 'HEAD' else body})
+        reg = _metrics.registry
+        reg.inc('lfiweb_http_requests_total', {'endpoint': endpoint, 'method': scope['method'], 'status': str(status)})
+        reg.observe('lfiweb_http_request_duration_seconds', time.perf_counter() - t0, {'endpoint': endpoint})
+
+    async def _handle(self, handler, public, scope, headers):
+        self._ensure_pool()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            headers.append((b'retry-after', b'1'))
+            return self._json({'error': 'Server busy'}, 503)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._run, handler, scope, public)
+        except Exception:
+            appmod.logger.exception('Async read handler failed: %s', scope['path'])
+            return self._json({'error': 'Internal server error'}, 500)
+        finally:
+            self._slots.release()
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self._ensure_pool()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+application = AsyncReadAPI()
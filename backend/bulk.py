@@ -0,0 +1,100 @@
+"""Bulk article import/export as JSONL (one JSON object per line).
+
+Import reads lines lazily, validates each record with the same rules as
+``POST /api/articles`` (`app.validate_article`) and inserts valid rows with
+``executemany`` in chunks of ``batch_size``, one transaction per chunk, so a
+long import never holds the write lock for long and memory stays bounded by
+one chunk. Invalid lines are skipped and reported with their line number.
+An optional ``created_at`` is kept (it must parse with
+``datetime.fromisoformat``); ``id`` is ignored, so re-importing an export
+duplicates its articles.
+
+Export streams rows from one cursor in ``fetchmany`` batches (backend/streaming.py),
+so memory use does not grow with the number of articles.
+
+Used by ``/api/admin/articles/import``, ``/api/admin/articles/export`` and
+``python -m backend.manage articles import|export``.
+"""
+
+import json
+from datetime import datetime
+
+try:
+    from backend.streaming import iter_rows, ndjson_lines
+except ImportError:  # imported as a top-level module by `python backend/app.py`
+    from streaming import iter_rows, ndjson_lines
+
+EXPORT_FIELDS = ('id', 'title', 'author', 'content', 'image', 'video', 'created_at')
+TEXT_FIELDS = ('title', 'author', 'content', 'image', 'video', 'created_at')
+DEFAULT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+EXPORT_SQL = f"SELECT {', '.join(EXPORT_FIELDS)} FROM articles ORDER BY id"
+_INSERT = ('INSERT INTO articles (title, author, content, image, video, created_at) '
+           'VALUES (?,?,?,?,?,COALESCE(?, CURRENT_TIMESTAMP))')
+
+
+def _parse(line, validate):
+    try:
+        rec = json.loads(line)
+    except ValueError as e:
+        raise ValueError(f'invalid JSON: {e}')
+    if not isinstance(rec, dict):
+        raise ValueError('expected a JSON object')
+    for field in TEXT_FIELDS:
+        if rec.get(field) is not None and not isinstance(rec[field], str):
+            raise ValueError(f'{field} must be a string')
+    created_at = (rec.get('created_at') or '').strip() or None
+    if created_at:
+        try:
+            datetime.fromisoformat(created_at)
+        except ValueError:
+            raise ValueError(f'invalid created_at: {created_at!r}')
+    return validate(rec) + (created_at,)
+
+
+def import_articles(conn, lines, validate, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, on_batch=None):
+    """Import JSONL ``lines`` (str or bytes); returns counts and per-line errors.
+
+    ``on_batch(conn)`` runs inside each chunk's transaction before it commits
+    (the app passes `content_changed`).
+    """
+    valid = imported = lines_read = error_count = 0
+    errors = []
+    batch = []
+
+    def flush():
+        nonlocal valid, imported
+        valid += len(batch)
+        if batch and not dry_run:
+            with conn:
+                conn.executemany(_INSERT, batch)
+                if on_batch:
+                    on_batch(conn)
+            imported += len(batch)
+        batch.clear()
+
+    for lineno, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        if not line.strip():
+            continue
+        lines_read += 1
+        try:
+            batch.append(_parse(line, validate))
+        except ValueError as e:
+            error_count += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({'line': lineno, 'error': str(e)})
+            continue
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return {'lines': lines_read, 'valid': valid, 'imported': imported, 'error_count': error_count,
+            'errors': errors, 'dry_run': dry_run}
+
+
+def iter_export(conn, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield one JSONL line per article, oldest first."""
+    rows = iter_rows(conn.execute(EXPORT_SQL), batch_size)
+    return ndjson_lines(rows, lambda row: json.dumps(row, ensure_ascii=False))
@@ -0,0 +1,183 @@
+"""Instrumented SQLite connections.
+
+`connect()` returns a regular sqlite3 connection whose cursors time every
+execute/executemany and report (sql, params, seconds) to the registered query
+hooks. Metrics and the slow-query log subscribe with `add_query_hook`.
+The module also provides EXPLAIN QUERY PLAN helpers used by the slow-query
+log and by tests that guard against table scans.
+"""
+
+import sqlite3
+import time
+from collections import deque
+
+_query_hooks = {}
+
+
+def add_query_hook(fn, name=None):
+    """Register ``fn(sql, params, seconds, conn)``; called after each statement.
+
+    Hooks are keyed by ``name`` (default: the function's module and name), so
+    re-importing the app (as the tests do) replaces its hook instead of adding
+    a second one.
+    """
+    _query_hooks[name or f'{fn.__module__}.{fn.__qualname__}'] = fn
+    return fn
+
+
+def remove_query_hook(name):
+    _query_hooks.pop(name, None)
+
+
+def _notify(sql, params, seconds, conn):
+    for hook in list(_query_hooks.values()):
+        try:
+            hook(sql, params, seconds, conn)
+        except Exception:
+            pass
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    def execute(self, sql, params=()):
+        t0 = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            _notify(sql, params, time.perf_counter() - t0, self.connection)
+
+    def executemany(self, sql, seq_of_params):
+        t0 = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_params)
+        finally:
+            _notify(sql, None, time.perf_counter() - t0, self.connection)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # sqlite3.Connection.execute* bypass Python-level cursor overrides
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+
+def connect(path: str, **kwargs):
+    return sqlite3.connect(path, factory=InstrumentedConnection, **kwargs)
+
+
+def fetch_dicts(cursor, size=None):
+    """Remaining rows of ``cursor`` (or the next ``size``) as plain dicts.
+
+    Rows are fetched as tuples and zipped with the column names, skipping the
+    sqlite3.Row objects and the `dict(row)` copy made of each of them.
+    """
+    cursor.row_factory = None
+    names = [d[0] for d in cursor.description]
+    rows = cursor.fetchall() if size is None else cursor.fetchmany(size)
+    return [dict(zip(names, row)) for row in rows]
+
+
+# Query plans and the slow-query log
+
+_EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE', 'INSERT', 'REPLACE', 'WITH')
+
+
+def param_shape(params):
+    """Describe bound parameters without their values (e.g. ['str:5', 'int'])."""
+    if params is None:
+        return None
+    values = params.values() if isinstance(params, dict) else params
+    out = []
+    for v in values:
+        if isinstance(v, (str, bytes)):
+            out.append(f'{type(v).__name__}:{len(v)}')
+        else:
+            out.append(type(v).__name__)
+    return out
+
+
+def explain_query(conn, sql, params=()):
+    """Return EXPLAIN QUERY PLAN detail lines for ``sql`` ([] if not explainable)."""
+    if not sql.lstrip().upper().startswith(_EXPLAINABLE) or params is None:
+        return []
+    try:
+        # sqlite3.Connection.execute runs in C and does not re-enter the hooks
+        rows = sqlite3.Connection.execute(conn, 'EXPLAIN QUERY PLAN ' + sql, params).fetchall()
+    except sqlite3.Error:
+        return []
+    return [r[3] for r in rows]
+
+
+def table_scans(plan):
+    """Tables read with a full scan (SCAN without an index) in a query plan."""
+    scans = []
+    for line in plan:
+        if line.startswith('SCAN ') and 'USING' not in line:
+            scans.append(line.split()[1])
+    return scans
+
+
+class SlowQueryLog:
+    """Ring buffer of statements slower than ``threshold_ms``.
+
+    Each entry records the SQL, the parameter shapes (never the values), the
+    duration and the EXPLAIN QUERY PLAN output, flagging full table scans.
+    """
+
+    def __init__(self, threshold_ms: float, maxlen: int = 200, logger=None):
+        self.threshold_ms = threshold_ms
+        self.entries = deque(maxlen=maxlen)
+        self.logger = logger
+        self.context = None  # optional callable returning e.g. the endpoint
+
+    def hook(self, sql, params, seconds, conn):
+        ms = seconds * 1000
+        if ms < self.threshold_ms:
+            return
+        plan = explain_query(conn, sql, params)
+        scans = table_scans(plan)
+        entry = {
+            'at': time.time(),
+            'duration_ms': round(ms, 3),
+            'sql': ' '.join(sql.split()),
+            'params': param_shape(params),
+            'plan': plan,
+            'full_scan': bool(scans),
+            'tables_scanned': scans,
+            'context': self.context() if self.context else None,
+        }
+        self.entries.append(entry)
+        if self.logger:
+            self.logger.warning('Slow query (%.1f ms%s): %s', ms, ', full scan of ' + ','.join(scans) if scans else '', entry['sql'])
+
+    def clear(self):
+        self.entries.clear()
+
+
+class QueryPlanRecorder:
+    """Context manager recording the plan of every statement run meanwhile.
+
+    Used by tests to assert that endpoints do not fall back to table scans.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def hook(self, sql, params, seconds, conn):
+        plan = explain_query(conn, sql, params)
+        self.queries.append({'sql': ' '.join(sql.split()), 'plan': plan, 'tables_scanned': table_scans(plan)})
+
+    def scans(self, ignore_tables=()):
+        return [q for q in self.queries if set(q['tables_scanned']) - set(ignore_tables)]
+
+    def __enter__(self):
+        add_query_hook(self.hook, 'query_plan_recorder')
+        return self
+
+    def __exit__(self, *exc):
+        remove_query_hook('query_plan_recorder')
+        return False
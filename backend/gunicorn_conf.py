@@ -0,0 +1,40 @@
+"""gunicorn settings for LFIWEB.
+
+  gunicorn -c backend/gunicorn_conf.py backend.wsgi:application
+
+SQLite allows one writer at a time, and in WAL mode readers never block it.
+The defaults below therefore favour a few processes with a handful of threads
+each: enough parallel readers to keep the CPUs busy, and few enough writers
+that lock waits stay well under SQLITE_BUSY_TIMEOUT. Every value can be
+overridden from the environment:
+
+  BIND              address to listen on (default 127.0.0.1:8000)
+  WEB_CONCURRENCY   worker processes (default min(4, CPUs + 1))
+  WEB_THREADS       threads per worker (default 4)
+  WEB_TIMEOUT       seconds before a silent worker is restarted (default 60)
+  WEB_PRELOAD       1 to import the app in the master before forking; per-process
+                    state is reset in each worker (see app._reinit_after_fork)
+
+Set METRICS_DIR so /metrics aggregates all workers.
+"""
+
+import multiprocessing
+import os
+
+# WAL is what makes several worker processes on one SQLite file viable
+os.environ.setdefault('SQLITE_JOURNAL_MODE', 'wal')
+
+bind = os.getenv('BIND', '127.0.0.1:8000')
+workers = int(os.getenv('WEB_CONCURRENCY', str(min(4, multiprocessing.cpu_count() + 1))))
+worker_class = 'gthread'
+threads = int(os.getenv('WEB_THREADS', '4'))
+timeout = int(os.getenv('WEB_TIMEOUT', '60'))
+graceful_timeout = 30
+keepalive = 5
+# recycle workers now and then so slow leaks never accumulate; jitter avoids
+# restarting all of them at once
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', '2000'))
+max_requests_jitter = 200
+preload_app = os.getenv('WEB_PRELOAD') == '1'
+accesslog = '-'
+errorlog = '-'
@@ -0,0 +1,272 @@
+"""Cross-process invalidation of per-worker caches.
+
+Workers keep small in-process caches (role lookups, site_meta). Each one is
+registered with an `InvalidationBus` under one or more tags. A write calls
+``bus.invalidate(conn, *tags)`` before committing and ``bus.committed(*tags)``
+after, and every worker drops the caches carrying those tags: the writing
+worker at once, the others on their next `poll()`. Dropping before the commit
+would let a concurrent reload cache the old rows as fresh.
+
+Tag versions live in the cache_versions table and are bumped inside the
+writer's transaction, so an invalidation commits or rolls back together with
+the write it describes. The transport decides how other workers learn about
+it:
+
+  SQLiteTransport  a poll runs ``PRAGMA data_version`` on a private
+                   connection and re-reads cache_versions only if another
+                   connection has committed since the last poll. Polls are
+                   throttled by the caller's ``max_age``.
+  RedisTransport   the writer also PUBLISHes the tags once the write is
+                   committed. A subscriber thread per worker queues incoming
+                   tags, so a poll is a set swap. cache_versions is still
+                   checked every ``fallback_interval`` seconds, and on every
+                   poll while the subscriber is disconnected. That catches
+                   messages lost while Redis was down and writes made outside
+                   the app (manage commands).
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_BUMP = ('INSERT INTO cache_versions (name, version) VALUES (?, 1) '
+         'ON CONFLICT(name) DO UPDATE SET version=version+1')
+
+
+class LocalCache:
+    """Per-process dict with an optional TTL, cleared by the bus."""
+
+    def __init__(self, name, ttl=None):
+        self.name = name
+        self.ttl = ttl
+        self._data = {}
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        if self.ttl is not None and time.monotonic() - entry[1] >= self.ttl:
+            self._data.pop(key, None)
+            return default
+        return entry[0]
+
+    def set(self, key, value):
+        self._data[key] = (value, time.monotonic())
+
+    def get_or_load(self, key, load):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = load()
+            self.set(key, value)
+        return value
+
+    def pop(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteTransport:
+    name = 'sqlite'
+
+    def __init__(self, db_path, connect=sqlite3.connect):
+        self.db_path = db_path
+        self.connect = connect
+        self._conn = None
+        self._data_version = None
+        self._versions = None
+
+    def stage(self, conn, tags):
+        conn.executemany(_BUMP, [(tag,) for tag in tags])
+
+    def publish(self, tags):
+        pass  # other workers see the committed version rows
+
+    def changed(self) -> set:
+        """Tags whose version changed since the previous call."""
+        if self._conn is None:
+            self._conn = self.connect(self.db_path, check_same_thread=False)
+        data_version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+        if data_version == self._data_version:
+            return set()
+        self._data_version = data_version
+        versions = dict(self._conn.execute('SELECT name, version FROM cache_versions').fetchall())
+        previous, self._versions = self._versions, versions
+        if previous is None:
+            return set()
+        return {name for name in versions.keys() | previous.keys() if versions.get(name) != previous.get(name)}
+
+    def after_fork(self):
+        self._conn = None  # the parent's connection is not used or closed here
+        self._data_version = self._versions = None
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class RedisTransport:
+    name = 'redis'
+
+    def __init__(self, redis, fallback, channel='lfiweb:invalidate', fallback_interval=5.0, retry_delay=1.0):
+        self.redis = redis
+        self.fallback = fallback
+        self.channel = channel
+        self.fallback_interval = fallback_interval
+        self.retry_delay = retry_delay
+        self.connected = False
+        self.received = 0
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._last_fallback = 0.0
+
+    def stage(self, conn, tags):
+        self.fallback.stage(conn, tags)
+
+    def publish(self, tags):
+        try:
+            self.redis.publish(self.channel, json.dumps(sorted(tags)))
+        except Exception as e:
+            # the other workers catch up from cache_versions within fallback_interval
+            logger.warning('Could not publish cache invalidation %s: %s', sorted(tags), e)
+
+    def changed(self) -> set:
+        self._start()
+        with self._lock:
+            tags, self._pending = self._pending, set()
+        now = time.monotonic()
+        if not self.connected or now - self._last_fallback >= self.fallback_interval:
+            self._last_fallback = now
+            tags |= self.fallback.changed()
+        return tags
+
+    def _start(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._listen, name='invalidation-listener', daemon=True)
+                    self._thread.start()
+
+    def _listen(self):
+        while not self._stop.is_set():
+            pubsub = None
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                self.connected = True
+                self._last_fallback = 0.0  # messages sent while we were away: check the version rows
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get('type') == 'message':
+                        tags = json.loads(message['data'])
+                        with self._lock:
+                            self._pending.update(tags)
+                            self.received += 1
+            except Exception as e:
+                if self.connected:
+                    logger.warning('Invalidation listener lost Redis: %s', e)
+                self.connected = False
+                self._stop.wait(self.retry_delay)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+        self.connected = False
+
+    def after_fork(self):
+        # the listener thread did not survive the fork; the next poll starts one
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._thread = None
+        self._stop = threading.Event()
+        self.connected = False
+        self.fallback.after_fork()
+
+    def close(self):
+        self._stop.set()
+        self.fallback.close()
+
+
+class InvalidationBus:
+    def __init__(self, transport):
+        self.transport = transport
+        self.invalidations = 0
+        self.drops = 0
+        self._caches = {}
+        self._lock = threading.Lock()
+        self._checked = float('-inf')
+
+    def register(self, name, clear, tags=None):
+        """Call ``clear()`` whenever one of ``tags`` (default: ``name``) is invalidated."""
+        self._caches[name] = (clear, frozenset(tags or (name,)))
+
+    def cache(self, name, tags=None, ttl=None) -> LocalCache:
+        cache = LocalCache(name, ttl)
+        self.register(name, cache.clear, tags)
+        return cache
+
+    def drop(self, tags):
+        """Clear this worker's caches carrying any of ``tags``."""
+        tags = set(tags)
+        for clear, cache_tags in list(self._caches.values()):
+            if cache_tags & tags:
+                clear()
+                self.drops += 1
+
+    def invalidate(self, conn, *tags):
+        """Bump ``tags`` in ``conn``'s transaction. Caller commits, then calls `committed`."""
+        self.transport.stage(conn, tags)
+        self.invalidations += 1
+
+    def committed(self, *tags):
+        """Drop this worker's caches for ``tags`` and tell the other workers."""
+        self.drop(tags)
+        self.transport.publish(tags)
+
+    def poll(self, max_age=0.0):
+        """Apply other workers' invalidations, unless the bus was checked less than ``max_age`` seconds ago."""
+        now = time.monotonic()
+        if now - self._checked < max_age:
+            return
+        with self._lock:
+            if now - self._checked < max_age:
+                return
+            try:
+                tags = self.transport.changed()
+            except sqlite3.Error:
+                logger.exception('Cache invalidation check failed')
+                return
+            self._checked = now
+        if tags:
+            self.drop(tags)
+
+    def stats(self) -> dict:
+        info = {'transport': self.transport.name, 'caches': {name: sorted(tags) for name, (_, tags) in self._caches.items()},
+                'invalidations': self.invalidations, 'drops': self.drops}
+        if isinstance(self.transport, RedisTransport):
+            info.update(connected=self.transport.connected, received=self.transport.received)
+        return info
+
+    def after_fork(self):
+        self._lock = threading.Lock()
+        self._checked = float('-inf')
+        for clear, _ in self._caches.values():
+            clear()
+        self.transport.after_fork()
+
+    def close(self):
+        self.transport.close()
@@ -0,0 +1,53 @@
+"""Flask JSON provider backed by orjson, when it is installed.
+
+`OrjsonProvider` keeps the behaviour of Flask's default provider: sorted
+keys, compact output unless the app is in debug mode (``JSONIFY`` pretty
+printing), and the same `default` hook, so dates are still HTTP dates and
+decimals/UUIDs strings. The only visible difference is that non-ASCII text
+is written as UTF-8 instead of ``\\uXXXX`` escapes. `response()` encodes
+straight to bytes, skipping the str round trip.
+
+`make_provider(app, name)` returns the provider to install on ``app.json``:
+``'orjson'`` falls back to the stdlib provider when orjson is missing,
+``'stdlib'`` forces it (JSON_PROVIDER in app.py).
+"""
+
+import typing as t
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+_OPTIONS = 0
+if orjson is not None:
+    # datetime/date go through `default` like with the stdlib provider (HTTP dates)
+    _OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    def _encode(self, obj: t.Any, indent: bool = False) -> bytes:
+        options = _OPTIONS if self.sort_keys else _OPTIONS & ~orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=options)
+
+    def dumps(self, obj: t.Any, **kwargs: t.Any) -> str:
+        # separators/ensure_ascii only shape whitespace and escaping: orjson is always compact UTF-8
+        return self._encode(obj, indent=bool(kwargs.get('indent'))).decode('utf-8')
+
+    def loads(self, s: t.Any, **kwargs: t.Any) -> t.Any:
+        return orjson.loads(s)
+
+    def response(self, *args: t.Any, **kwargs: t.Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self._encode(obj, indent) + b'\n', mimetype=self.mimetype)
+
+
+def make_provider(app, name: str = 'orjson'):
+    if name == 'orjson' and orjson is not None:
+        return OrjsonProvider(app)
+    return DefaultJSONProvider(app)
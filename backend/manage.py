@@ -0,0 +1,545 @@
+#!/usr/bin/env python3
+"""Management CLI for LFIWEB.
+
+Usage (from the project root):
+  python -m backend.manage users export [--format csv|jsonl] [--out FILE]
+  python -m backend.manage users import FILE [--update] [--dry-run]
+  python -m backend.manage users set-role EMAIL ROLE
+  python -m backend.manage users prune [--older-than-days 7] [--batch-size 500] [--dry-run]
+  python -m backend.manage migrate [--dry-run] [--batch-size 1000] [--status]
+  python -m backend.manage backup create [--dest DIR] [--pages 256] [--pause 0.005] [--no-uploads]
+  python -m backend.manage backup list [--dest DIR]
+  python -m backend.manage backup restore-uploads [MANIFEST] [--dest DIR] [--target DIR]
+  python -m backend.manage reconcile [--quarantine] [--min-age 3600] [--json]
+  python -m backend.manage articles export [--out FILE]
+  python -m backend.manage articles import FILE|- [--batch-size 500] [--dry-run] [--json]
+  python -m backend.manage trash list|collect [--retention S]|restore BATCH
+
+All commands use DB_PATH (or --db) and apply pending schema migrations first,
+except `migrate`, which reports or applies them explicitly. Imports run in a single transaction with
+executemany; role changes and pruning bump the `roles` cache version so every
+worker drops its cached role lookups.
+"""
+
+import argparse
+import csv
+import importlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+from backend import backup, bulk, migrations, publish, reconcile, snapshot, trash
+from backend.app import DB_PATH, UPLOAD_BASE, get_invalidation_bus
+
+ROLES = ('admin', 'editor')
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKUP_DIR = os.getenv('BACKUP_DIR') or os.path.join(PROJECT_ROOT, 'backups')
+QUARANTINE_DIR = os.getenv('QUARANTINE_DIR') or os.path.join(PROJECT_ROOT, 'quarantine')
+PUBLISH_DIR = os.getenv('PUBLISH_DIR') or os.path.join(PROJECT_ROOT, 'public')
+USER_FIELDS = ('email', 'role', 'created_at', 'last_login_at')
+
+
+def connect(db_path: str):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def announce(*tags):
+    """Push committed invalidations to running workers (INVALIDATION_TRANSPORT=redis).
+
+    The bumped cache_versions rows reach them anyway, only later.
+    """
+    get_invalidation_bus().committed(*tags)
+
+
+# Users
+
+def read_user_records(path: str):
+    """Yield dicts from a .csv or .jsonl file (format chosen by extension)."""
+    with open(path, newline='', encoding='utf-8') as fh:
+        if path.endswith('.csv'):
+            yield from csv.DictReader(fh)
+        else:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def validate_user(rec: dict):
+    """Return a normalized (email, role, created_at) tuple or raise ValueError."""
+    email = (rec.get('email') or '').strip().lower()
+    if not email or '@' not in email or len(email) > 254:
+        raise ValueError(f'invalid email: {email!r}')
+    role = (rec.get('role') or 'editor').strip().lower()
+    if role not in ROLES:
+        raise ValueError(f'invalid role for {email}: {role!r}')
+    return email, role, (rec.get('created_at') or None)
+
+
+def import_users(conn, records, update: bool = False) -> dict:
+    """Insert (or with update=True upsert the role of) users in one transaction."""
+    rows, errors = [], []
+    for i, rec in enumerate(records, 1):
+        try:
+            rows.append(validate_user(rec))
+        except ValueError as e:
+            errors.append(f'record {i}: {e}')
+    if errors:
+        return {'imported': 0, 'errors': errors}
+    if update:
+        sql = ('INSERT INTO users (email, role, created_at) VALUES (?,?,COALESCE(?, CURRENT_TIMESTAMP)) '
+               'ON CONFLICT(email) DO UPDATE SET role=excluded.role')
+    else:
+        sql = 'INSERT OR IGNORE INTO users (email, role, created_at) VALUES (?,?,COALESCE(?, CURRENT_TIMESTAMP))'
+    with conn:
+        imported = conn.executemany(sql, rows).rowcount
+        if update:
+            get_invalidation_bus().invalidate(conn, 'roles')
+    return {'imported': imported, 'errors': []}
+
+
+def export_users(conn, out, fmt: str = 'jsonl') -> int:
+    cur = conn.execute(f"SELECT {', '.join(USER_FIELDS)} FROM users ORDER BY id")
+    n = 0
+    if fmt == 'csv':
+        w = csv.writer(out)
+        w.writerow(USER_FIELDS)
+        for row in cur:
+            w.writerow(tuple(row))
+            n += 1
+    else:
+        for row in cur:
+            out.write(json.dumps(dict(row)) + '\n')
+            n += 1
+    return n
+
+
+def set_role(conn, email: str, role: str) -> bool:
+    if role not in ROLES:
+        raise ValueError(f'role must be one of {ROLES}')
+    with conn:
+        cur = conn.execute('UPDATE users SET role=? WHERE email=?', (role, email.strip().lower()))
+        if cur.rowcount:
+            get_invalidation_bus().invalidate(conn, 'roles')
+    return cur.rowcount == 1
+
+
+# Editor accounts created by /auth/request-token that never consumed a link.
+_PRUNE_WHERE = ("role='editor' AND last_login_at IS NULL AND datetime(created_at) < datetime(?) "
+                "AND NOT EXISTS (SELECT 1 FROM login_tokens t WHERE t.user_id=users.id AND t.used=1)")
+
+
+def count_prunable(conn, cutoff: str) -> int:
+    return conn.execute(f'SELECT COUNT(*) FROM users WHERE {_PRUNE_WHERE}', (cutoff,)).fetchone()[0]
+
+
+def prune_users(conn, cutoff: str, batch_size: int = 500, pause: float = 0.05) -> int:
+    """Delete never-logged-in editor accounts older than ``cutoff`` in batches."""
+    deleted = 0
+    while True:
+        with conn:
+            ids = [r[0] for r in conn.execute(f'SELECT id FROM users WHERE {_PRUNE_WHERE} LIMIT ?', (cutoff, batch_size))]
+            if not ids:
+                break
+            marks = ','.join('?' * len(ids))
+            conn.execute(f'DELETE FROM login_tokens WHERE user_id IN ({marks})', ids)
+            conn.execute(f'DELETE FROM users WHERE id IN ({marks})', ids)
+            get_invalidation_bus().invalidate(conn, 'roles')
+        deleted += len(ids)
+        print(f'  pruned {deleted} users so far...')
+        if len(ids) < batch_size:
+            break
+        time.sleep(pause)
+    return deleted
+
+
+def cmd_users(args):
+    conn = connect(args.db)
+    try:
+        if args.action == 'export':
+            out = open(args.out, 'w', newline='', encoding='utf-8') if args.out else sys.stdout
+            try:
+                n = export_users(conn, out, args.format)
+            finally:
+                if args.out:
+                    out.close()
+            print(f'Exported {n} users', file=sys.stderr)
+        elif args.action == 'import':
+            records = list(read_user_records(args.file))
+            if args.dry_run:
+                errors = []
+                for i, rec in enumerate(records, 1):
+                    try:
+                        validate_user(rec)
+                    except ValueError as e:
+                        errors.append(f'record {i}: {e}')
+                print(f'Dry-run: {len(records)} records, {len(errors)} errors')
+                for e in errors:
+                    print(' ', e)
+                return 1 if errors else 0
+            res = import_users(conn, records, update=args.update)
+            for e in res['errors']:
+                print(' ', e)
+            if res['errors']:
+                print('Import aborted; nothing written.')
+                return 1
+            print(f"Imported/updated {res['imported']} of {len(records)} users")
+            announce('roles')
+        elif args.action == 'set-role':
+            if not set_role(conn, args.email, args.role):
+                print(f'Unknown user: {args.email}')
+                return 1
+            announce('roles')
+            print(f'{args.email} is now {args.role}')
+        elif args.action == 'prune':
+            cutoff = (datetime.utcnow() - timedelta(days=args.older_than_days)).isoformat()
+            n = count_prunable(conn, cutoff)
+            print(f'Never-logged-in editor accounts older than {args.older_than_days} days: {n}')
+            if args.dry_run or not n:
+                return 0
+            print(f'Deleted {prune_users(conn, cutoff, args.batch_size)} users')
+            announce('roles')
+        return 0
+    finally:
+        conn.close()
+
+
+# Schema
+
+def cmd_migrate(args):
+    conn = connect(args.db)
+    try:
+        if args.status:
+            done = migrations.applied_versions(conn)
+            for mig in migrations.discover():
+                at = done.get(mig.version)
+                state = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(at)) if at else 'pending'
+                print(f'{mig.version:04d}_{mig.name:40} {state}')
+            return 0
+        try:
+            applied = migrations.migrate(conn, dry_run=args.dry_run, batch_size=args.batch_size, log=print)
+        except migrations.MigrationError as e:
+            print(e, file=sys.stderr)
+            return 1
+        if not args.dry_run:
+            print(f'Applied {len(applied)} migrations, schema version {migrations.current_version(conn)}')
+        return 0
+    finally:
+        conn.close()
+
+
+# Backups
+
+def _print_stats(stats):
+    rate = f", {stats['mb_per_s']} MB/s" if stats.get('mb_per_s') is not None else ''
+    if stats['kind'] == 'db':
+        print(f"DB backup: {stats['dest']} ({stats['bytes']} bytes in {stats['seconds']}s{rate})")
+    elif stats['kind'] == 'uploads':
+        print(f"Uploads snapshot: {stats['manifest']} ({stats['files']} files, {stats['files_copied']} new, "
+              f"{stats['bytes_copied']} bytes copied in {stats['seconds']}s{rate})")
+    else:
+        print(f"Restored {stats['files_restored']} files ({stats['files_skipped']} unchanged) "
+              f"to {stats['target']} in {stats['seconds']}s{rate}")
+
+
+def cmd_backup(args):
+    if args.action == 'create':
+        for stats in backup.run_backup(args.db, args.uploads, args.dest, pages=args.pages,
+                                       pause=args.pause, uploads=not args.no_uploads):
+            _print_stats(stats)
+        return 0
+    if args.action == 'list':
+        for stats in backup.read_history(args.dest):
+            _print_stats(stats)
+        return 0
+    manifests = backup.list_manifests(args.dest)
+    manifest = args.manifest or (manifests[-1] if manifests else None)
+    if not manifest:
+        print(f'No upload snapshots in {args.dest}', file=sys.stderr)
+        return 1
+    stats = backup.restore_uploads(args.dest, manifest, args.target)
+    stats['at'] = backup._ts()
+    backup.record_run(args.dest, stats)
+    _print_stats(stats)
+    return 0
+
+
+# Uploads
+
+def cmd_reconcile(args):
+    conn = connect(args.db)
+    try:
+        report = reconcile.reconcile(conn, args.uploads, args.quarantine_dir if args.quarantine else None,
+                                     min_age=args.min_age)
+    finally:
+        conn.close()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"Scanned {report['files_scanned']} files against {report['db_references']} references "
+              f"in {report['seconds']}s")
+        print(f"Orphans: {len(report['orphans'])} ({report['orphan_bytes']} bytes)"
+              + (f", quarantined to {report['quarantined_to']}" if report['quarantined_to'] else ''))
+        for path in report['orphans'][:args.limit]:
+            print(f'  {path}')
+        print(f"Media rows without a file: {len(report['missing_media'])}")
+        for m in report['missing_media'][:args.limit]:
+            print(f"  {m['table']} #{m['id']}: {m['file']}")
+        print(f"Broken article references: {len(report['broken_refs'])}")
+        for b in report['broken_refs'][:args.limit]:
+            print(f"  article #{b['article_id']} {b['field']}: {b['url']}")
+        usage = report['storage_usage']['total']
+        print(f"Storage usage: {usage['files']} files, {usage['bytes']} bytes")
+    return 1 if report['missing_media'] or report['broken_refs'] else 0
+
+
+def _time_public_reads(connect, rounds):
+    """Seconds per round of the public GET queries, each on a new connection."""
+    appmod = importlib.import_module('backend.app')
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for read in (appmod.load_site_meta, lambda c: appmod.query_articles(c, '', 1, 10),
+                     lambda c: appmod.list_media(c, 'photos'), lambda c: appmod.list_media(c, 'videos')):
+            conn = connect()
+            conn.row_factory = sqlite3.Row
+            read(conn)
+            conn.close()
+    return (time.perf_counter() - t0) / rounds
+
+
+def cmd_snapshot(args):
+    snap = snapshot.ReadSnapshot(args.db)
+    try:
+        snap.refresh()
+        info = snap.stats()
+        if args.bench:
+            file_s = _time_public_reads(lambda: sqlite3.connect(args.db), args.bench)
+            snap_s = _time_public_reads(snap.connect, args.bench)
+            info['bench'] = {'rounds': args.bench, 'file_ms': round(file_s * 1000, 3),
+                             'snapshot_ms': round(snap_s * 1000, 3),
+                             'speedup': round(file_s / snap_s, 2) if snap_s else None}
+    finally:
+        snap.close()
+    if args.json:
+        print(json.dumps(info, indent=2))
+        return 0
+    print(f"Snapshot of {', '.join(info['rows'])}: {info['bytes']} bytes in memory per worker "
+          f"(DB file {info['db_file_bytes']} bytes), loaded in {info['load_seconds']}s")
+    for table, rows in info['rows'].items():
+        print(f'  {table}: {rows} rows')
+    if 'bench' in info:
+        b = info['bench']
+        print(f"Public reads per page view: file {b['file_ms']} ms, snapshot {b['snapshot_ms']} ms "
+              f"(x{b['speedup']}, {b['rounds']} rounds)")
+    return 0
+
+
+def cmd_publish(args):
+    try:
+        stats = publish.publish(args.out, full=args.full, keep=args.keep, dry_run=args.dry_run,
+                                appmod=importlib.import_module('backend.app'))
+    except publish.PublishError as e:
+        print(f'Error: {e}', file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(stats, indent=2))
+        return 0
+    verb = 'Would render' if args.dry_run else 'Rendered'
+    print(f"{verb} {stats['rendered']} of {stats['pages']} pages, removed {stats['removed']}"
+          f"{' (full rebuild)' if stats['full'] else ''} in {stats['seconds']}s")
+    for url in stats['changed_urls'][:args.limit]:
+        print(f'  {url}')
+    if stats.get('release'):
+        print(f"{args.out} -> {stats['release']}")
+    return 0
+
+
+def cmd_articles(args):
+    conn = connect(args.db)
+    try:
+        if args.action == 'export':
+            out = open(args.out, 'w', encoding='utf-8') if args.out else sys.stdout
+            try:
+                n = 0
+                for line in bulk.iter_export(conn):
+                    out.write(line)
+                    n += 1
+            finally:
+                if args.out:
+                    out.close()
+            print(f'Exported {n} articles', file=sys.stderr)
+            return 0
+
+        appmod = importlib.import_module('backend.app')
+        fh = sys.stdin if args.file == '-' else open(args.file, encoding='utf-8')
+        try:
+            report = bulk.import_articles(conn, fh, appmod.validate_article, batch_size=args.batch_size,
+                                          dry_run=args.dry_run, on_batch=lambda c: get_invalidation_bus().invalidate(c, 'content'))
+        finally:
+            if fh is not sys.stdin:
+                fh.close()
+    finally:
+        conn.close()
+    if report['imported']:
+        announce('content')
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        verb = 'Would import' if args.dry_run else 'Imported'
+        print(f"{verb} {report['valid'] if args.dry_run else report['imported']} of {report['lines']} articles, "
+              f"{report['error_count']} invalid")
+        for err in report['errors']:
+            print(f"  line {err['line']}: {err['error']}")
+    return 1 if report['error_count'] else 0
+
+
+def cmd_trash(args):
+    appmod = importlib.import_module('backend.app')
+    retention = appmod.TRASH_RETENTION if args.retention is None else args.retention
+    conn = connect(args.db)
+    try:
+        if args.action == 'list':
+            now = time.time()
+            for b in trash.list_batches(conn):
+                left = b['deleted_at'] + retention - now
+                state = f'restorable for {int(left)}s' if left > 0 else 'due for collection'
+                print(f"{b['batch']}  {b['table']}: {b['files']} files, {b['bytes'] or 0} bytes ({state})")
+        elif args.action == 'collect':
+            stats = trash.collect(conn, args.trash_dir, retention, batch_size=args.batch_size)
+            print(f"Collected {stats['files']} files ({stats['bytes']} bytes) from {stats['batches']} batches "
+                  f"in {stats['seconds']}s")
+        else:
+            try:
+                res = trash.restore(conn, args.batch, args.uploads, args.trash_dir, retention,
+                                    on_commit=lambda c: get_invalidation_bus().invalidate(c, 'content'))
+            except trash.TrashError as e:
+                print(f'Error: {e}', file=sys.stderr)
+                return 1
+            announce('content')
+            for table, ids in res['restored'].items():
+                print(f'Restored {len(ids)} {table}')
+    finally:
+        conn.close()
+    return 0
+
+
+def build_parser():
+    p = argparse.ArgumentParser(prog='python -m backend.manage', description='LFIWEB management commands')
+    p.add_argument('--db', default=os.getenv('DB_PATH', DB_PATH), help='Path to SQLite DB')
+    sub = p.add_subparsers(dest='command', required=True)
+
+    users = sub.add_parser('users', help='Bulk user provisioning and role management')
+    usub = users.add_subparsers(dest='action', required=True)
+    ex = usub.add_parser('export', help='Export users as CSV or JSONL')
+    ex.add_argument('--format', choices=('csv', 'jsonl'), default='jsonl')
+    ex.add_argument('--out', help='Output file (default stdout)')
+    im = usub.add_parser('import', help='Import users from a .csv or .jsonl file')
+    im.add_argument('file')
+    im.add_argument('--update', action='store_true', help='Update the role of existing users')
+    im.add_argument('--dry-run', action='store_true')
+    sr = usub.add_parser('set-role', help="Change a user's role")
+    sr.add_argument('email')
+    sr.add_argument('role', choices=ROLES)
+    pr = usub.add_parser('prune', help='Delete never-logged-in auto-created editor accounts')
+    pr.add_argument('--older-than-days', type=int, default=7)
+    pr.add_argument('--batch-size', type=int, default=500)
+    pr.add_argument('--dry-run', action='store_true')
+    users.set_defaults(func=cmd_users)
+
+    mg = sub.add_parser('migrate', help='Apply pending schema migrations')
+    mg.add_argument('--dry-run', action='store_true', help='Print the plan without changing the DB')
+    mg.add_argument('--batch-size', type=int, default=migrations.DEFAULT_BATCH_SIZE,
+                    help='Rows per backfill transaction')
+    mg.add_argument('--status', action='store_true', help='List migrations and when they were applied')
+    mg.set_defaults(func=cmd_migrate, init_db=False)
+
+    bk = sub.add_parser('backup', help='Online DB backup and incremental upload snapshots')
+    dest = argparse.ArgumentParser(add_help=False)
+    dest.add_argument('--dest', default=BACKUP_DIR, help='Backup directory (default BACKUP_DIR or ./backups)')
+    bsub = bk.add_subparsers(dest='action', required=True)
+    cr = bsub.add_parser('create', parents=[dest], help='Back up the DB and snapshot new upload files')
+    cr.add_argument('--uploads', default=UPLOAD_BASE, help='Uploads directory')
+    cr.add_argument('--pages', type=int, default=256, help='DB pages copied per step')
+    cr.add_argument('--pause', type=float, default=0.005, help='Seconds to sleep between steps')
+    cr.add_argument('--no-uploads', action='store_true')
+    bsub.add_parser('list', parents=[dest], help='Show previous runs and their throughput')
+    rs = bsub.add_parser('restore-uploads', parents=[dest], help='Restore upload files from a snapshot manifest')
+    rs.add_argument('manifest', nargs='?', help='Manifest path (default: latest)')
+    rs.add_argument('--target', default=UPLOAD_BASE, help='Directory to restore into')
+    bk.set_defaults(func=cmd_backup, init_db=False)
+
+    rc = sub.add_parser('reconcile', help='Find orphaned uploads and broken media references')
+    rc.add_argument('--uploads', default=UPLOAD_BASE, help='Uploads directory')
+    rc.add_argument('--quarantine', action='store_true', help='Move orphaned files to --quarantine-dir')
+    rc.add_argument('--quarantine-dir', default=QUARANTINE_DIR)
+    rc.add_argument('--min-age', type=float, default=3600,
+                    help='Ignore orphans modified less than this many seconds ago')
+    rc.add_argument('--limit', type=int, default=20, help='Entries listed per category')
+    rc.add_argument('--json', action='store_true', help='Print the full report as JSON')
+    rc.set_defaults(func=cmd_reconcile)
+
+    sn = sub.add_parser('snapshot', help='Memory footprint of the READ_SNAPSHOT copy of the public tables')
+    sn.add_argument('--bench', type=int, default=0, metavar='ROUNDS',
+                    help='Also time the public reads against the file and the snapshot')
+    sn.add_argument('--json', action='store_true')
+    sn.set_defaults(func=cmd_snapshot)
+
+    pb = sub.add_parser('publish', help='Export the public site as static files (incremental, atomic swap)')
+    pb.add_argument('--out', default=PUBLISH_DIR, help='Output symlink (releases go to OUT.releases/)')
+    pb.add_argument('--full', action='store_true', help='Render every page, not just changed ones')
+    pb.add_argument('--keep', type=int, default=2, help='Releases to keep, the live one included')
+    pb.add_argument('--dry-run', action='store_true', help='List the pages that would be rendered')
+    pb.add_argument('--limit', type=int, default=20, help='Changed URLs listed')
+    pb.add_argument('--json', action='store_true')
+    pb.set_defaults(func=cmd_publish)
+
+    ar = sub.add_parser('articles', help='Bulk article import/export as JSONL')
+    asub = ar.add_subparsers(dest='action', required=True)
+    ae = asub.add_parser('export', help='Write every article as JSONL')
+    ae.add_argument('--out', help='Output file (default stdout)')
+    ai = asub.add_parser('import', help='Import articles from a JSONL file (- for stdin)')
+    ai.add_argument('file')
+    ai.add_argument('--batch-size', type=int, default=bulk.DEFAULT_BATCH_SIZE, help='Rows per transaction')
+    ai.add_argument('--dry-run', action='store_true', help='Validate only')
+    ai.add_argument('--json', action='store_true', help='Print the report as JSON')
+    ar.set_defaults(func=cmd_articles)
+
+    tr = sub.add_parser('trash', help='Bulk-deleted media waiting for collection')
+    tr.add_argument('--trash-dir', default=os.getenv('TRASH_DIR') or os.path.join(PROJECT_ROOT, 'trash'))
+    tr.add_argument('--retention', type=int, help='Undo window in seconds (default TRASH_RETENTION)')
+    tsub = tr.add_subparsers(dest='action', required=True)
+    tsub.add_parser('list', help='Show trash batches and their undo window')
+    tc = tsub.add_parser('collect', help='Delete files whose undo window has passed')
+    tc.add_argument('--batch-size', type=int, default=200, help='Files per transaction')
+    trs = tsub.add_parser('restore', help='Put a batch back in place')
+    trs.add_argument('batch')
+    trs.add_argument('--uploads', default=UPLOAD_BASE, help='Uploads directory')
+    tr.set_defaults(func=cmd_trash)
+    return p
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    os.environ['DB_PATH'] = args.db
+    if getattr(args, 'init_db', True):
+        init_db_at(args.db)
+    return args.func(args)
+
+
+def init_db_at(db_path: str):
+    """Run init_db() against ``db_path`` (creates missing tables/columns)."""
+    appmod = importlib.import_module('backend.app')
+    previous, appmod.DB_PATH = appmod.DB_PATH, db_path
+    try:
+        # the module's own init_db: tests may have re-imported backend.app since
+        appmod.init_db()
+    finally:
+        appmod.DB_PATH = previous
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
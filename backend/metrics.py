@@ -0,0 +1,218 @@
+"""In-process metrics with Prometheus text exposition.
+
+A small dependency-free registry of counters, gauges and histograms keyed by
+(name, labels). With METRICS_DIR set, each worker process periodically writes
+its snapshot to `METRICS_DIR/metrics-<pid>.json` (atomic rename) and
+`/metrics` merges every file, so multi-worker deployments report totals
+rather than whichever worker answered the scrape.
+"""
+
+import functools
+import glob
+import json
+import os
+import threading
+import time
+
+# Latency buckets in seconds (Prometheus defaults, trimmed).
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+HELP = {
+    'lfiweb_http_requests_total': 'HTTP requests by endpoint, method and status.',
+    'lfiweb_http_request_duration_seconds': 'HTTP request latency by endpoint.',
+    'lfiweb_http_requests_in_flight': 'Requests currently being handled.',
+    'lfiweb_sql_queries_total': 'SQL statements executed, by endpoint.',
+    'lfiweb_sql_query_duration_seconds': 'SQL statement latency, by endpoint.',
+    'lfiweb_sql_queries_per_request': 'SQL statements per HTTP request, by endpoint.',
+    'lfiweb_operation_duration_seconds': 'Latency of instrumented helpers (uploads, email, Redis).',
+    'lfiweb_operation_errors_total': 'Failures of instrumented helpers.',
+    'lfiweb_read_cache_total': 'Read cache lookups by result (hit, miss, coalesced, stale, error).',
+}
+
+
+def _key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self._buckets = {}
+        self._last_flush = 0.0
+
+    def inc(self, name, labels=None, value=1.0):
+        k = (name, _key(labels))
+        with self._lock:
+            self.counters[k] = self.counters.get(k, 0.0) + value
+
+    def gauge_add(self, name, labels=None, value=1.0):
+        k = (name, _key(labels))
+        with self._lock:
+            self.gauges[k] = self.gauges.get(k, 0.0) + value
+
+    def observe(self, name, value, labels=None, buckets=DEFAULT_BUCKETS):
+        k = (name, _key(labels))
+        with self._lock:
+            h = self.histograms.get(k)
+            if h is None:
+                self._buckets[name] = buckets
+                h = self.histograms[k] = {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+            for i, b in enumerate(self._buckets[name]):
+                if value <= b:
+                    h['buckets'][i] += 1
+            h['sum'] += value
+            h['count'] += 1
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+    def after_fork(self):
+        """Start a forked child with empty series and a fresh lock.
+
+        Otherwise every worker would re-report the parent's counts under its
+        own pid and multiprocess totals would be inflated.
+        """
+        self._lock = threading.Lock()
+        self.counters, self.gauges, self.histograms = {}, {}, {}
+        self._last_flush = 0.0
+
+    def snapshot(self) -> dict:
+        """JSON-serializable copy of all series."""
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'counters': [[n, list(map(list, l)), v] for (n, l), v in self.counters.items()],
+                'gauges': [[n, list(map(list, l)), v] for (n, l), v in self.gauges.items()],
+                'histograms': [[n, list(map(list, l)), list(self._buckets[n]), dict(h, buckets=list(h['buckets']))]
+                               for (n, l), h in self.histograms.items()],
+            }
+
+    # Multiprocess support
+
+    def flush(self, directory: str, min_interval: float = 0.0):
+        """Write this process's snapshot to ``directory`` (rate limited)."""
+        now = time.monotonic()
+        if now - self._last_flush < min_interval:
+            return
+        self._last_flush = now
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'metrics-{os.getpid()}.json')
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump(self.snapshot(), fh)
+        os.replace(tmp, path)
+
+
+def _pid_alive(pid) -> bool:
+    if pid is None or pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def merge_snapshots(snapshots) -> dict:
+    """Sum counters, gauges and histogram buckets across process snapshots.
+
+    Counters and histograms of exited workers are kept (they are cumulative);
+    gauges are only summed over live processes.
+    """
+    counters, gauges, hists, bucket_defs = {}, {}, {}, {}
+    for snap in snapshots:
+        for n, l, v in snap.get('counters', []):
+            k = (n, tuple(map(tuple, l)))
+            counters[k] = counters.get(k, 0.0) + v
+        for n, l, v in (snap.get('gauges', []) if _pid_alive(snap.get('pid')) else []):
+            k = (n, tuple(map(tuple, l)))
+            gauges[k] = gauges.get(k, 0.0) + v
+        for n, l, b, h in snap.get('histograms', []):
+            k = (n, tuple(map(tuple, l)))
+            bucket_defs[n] = b
+            cur = hists.setdefault(k, {'buckets': [0] * len(b), 'sum': 0.0, 'count': 0})
+            cur['buckets'] = [x + y for x, y in zip(cur['buckets'], h['buckets'])]
+            cur['sum'] += h['sum']
+            cur['count'] += h['count']
+    return {'counters': counters, 'gauges': gauges, 'histograms': hists, 'buckets': bucket_defs}
+
+
+def read_snapshots(directory: str):
+    out = []
+    for path in glob.glob(os.path.join(directory, 'metrics-*.json')):
+        try:
+            with open(path) as fh:
+                out.append(json.load(fh))
+        except (OSError, ValueError):
+            continue
+    return out
+
+
+def _fmt_labels(labels, extra=None):
+    items = list(labels) + (list(extra) if extra else [])
+    if not items:
+        return ''
+    esc = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{esc(v)}"' for k, v in items) + '}'
+
+
+def _fmt_num(v):
+    if v == float('inf'):
+        return '+Inf'
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+def render_prometheus(merged: dict) -> str:
+    lines = []
+    seen = set()
+
+    def header(name, kind):
+        if name not in seen:
+            seen.add(name)
+            if name in HELP:
+                lines.append(f'# HELP {name} {HELP[name]}')
+            lines.append(f'# TYPE {name} {kind}')
+
+    for (n, l), v in sorted(merged['counters'].items()):
+        header(n, 'counter')
+        lines.append(f'{n}{_fmt_labels(l)} {_fmt_num(v)}')
+    for (n, l), v in sorted(merged['gauges'].items()):
+        header(n, 'gauge')
+        lines.append(f'{n}{_fmt_labels(l)} {_fmt_num(v)}')
+    for (n, l), h in sorted(merged['histograms'].items()):
+        header(n, 'histogram')
+        for b, c in zip(merged['buckets'][n], h['buckets']):
+            lines.append(f'{n}_bucket{_fmt_labels(l, [("le", _fmt_num(b))])} {c}')
+        lines.append(f'{n}_bucket{_fmt_labels(l, [("le", "+Inf")])} {h["count"]}')
+        lines.append(f'{n}_sum{_fmt_labels(l)} {_fmt_num(h["sum"])}')
+        lines.append(f'{n}_count{_fmt_labels(l)} {h["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def timed(operation: str):
+    """Decorator recording latency (and raised exceptions) of a helper."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                registry.inc('lfiweb_operation_errors_total', {'operation': operation})
+                raise
+            finally:
+                registry.observe('lfiweb_operation_duration_seconds', time.perf_counter() - t0, {'operation': operation})
+        return wrapper
+    return deco
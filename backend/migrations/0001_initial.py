@@ -0,0 +1,56 @@
+"""Baseline schema: users, login tokens, articles, photos, videos, site meta."""
+
+STATEMENTS = [
+    '''CREATE TABLE IF NOT EXISTS users (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      email TEXT NOT NULL UNIQUE,
+      role TEXT NOT NULL DEFAULT 'editor',
+      created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )''',
+    '''CREATE TABLE IF NOT EXISTS login_tokens (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      user_id INTEGER,
+      token_hash TEXT NOT NULL,
+      expires_at DATETIME NOT NULL,
+      used INTEGER NOT NULL DEFAULT 0,
+      created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+      ip TEXT,
+      user_agent TEXT,
+      FOREIGN KEY(user_id) REFERENCES users(id)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS articles (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      title TEXT NOT NULL,
+      author TEXT,
+      content TEXT,
+      image TEXT,
+      video TEXT,
+      created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )''',
+    '''CREATE TABLE IF NOT EXISTS photos (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      filename TEXT NOT NULL,
+      title TEXT,
+      description TEXT,
+      created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )''',
+    '''CREATE TABLE IF NOT EXISTS videos (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      filename TEXT NOT NULL,
+      title TEXT,
+      description TEXT,
+      created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )''',
+    '''CREATE TABLE IF NOT EXISTS site_meta (
+      key TEXT PRIMARY KEY,
+      value TEXT,
+      updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )''',
+]
+
+
+def up(conn):
+    """add articles.video on databases created before the column existed"""
+    cols = {r[1] for r in conn.execute('PRAGMA table_info(articles)')}
+    if 'video' not in cols:
+        conn.execute('ALTER TABLE articles ADD COLUMN video TEXT')
@@ -0,0 +1,8 @@
+"""Index login_tokens on token_hash (unique) and (used, expires_at)."""
+
+STATEMENTS = [
+    # older copies of a duplicated hash (should never exist) would block the unique index
+    '''DELETE FROM login_tokens WHERE id NOT IN (SELECT MAX(id) FROM login_tokens GROUP BY token_hash)''',
+    'CREATE UNIQUE INDEX IF NOT EXISTS idx_login_tokens_token_hash ON login_tokens(token_hash)',
+    'CREATE INDEX IF NOT EXISTS idx_login_tokens_used_expires ON login_tokens(used, expires_at)',
+]
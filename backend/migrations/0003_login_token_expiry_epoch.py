@@ -0,0 +1,19 @@
+"""Store login_tokens.expires_at as an integer UNIX epoch instead of ISO text.
+
+Values that cannot be parsed are set to 0 and marked used so they can never be
+consumed.
+"""
+
+
+def estimate(conn):
+    return conn.execute("SELECT COUNT(*) FROM login_tokens WHERE typeof(expires_at)='text'").fetchone()[0]
+
+
+def backfill(conn, batch_size):
+    cur = conn.execute(
+        "UPDATE login_tokens SET "
+        "used=CASE WHEN strftime('%s', expires_at) IS NULL THEN 1 ELSE used END, "
+        "expires_at=COALESCE(CAST(strftime('%s', expires_at) AS INTEGER), 0) "
+        "WHERE id IN (SELECT id FROM login_tokens WHERE typeof(expires_at)='text' LIMIT ?)",
+        (batch_size,))
+    return cur.rowcount
@@ -0,0 +1,16 @@
+"""Server-side sessions table and the cross-process cache_versions table."""
+
+STATEMENTS = [
+    '''CREATE TABLE IF NOT EXISTS sessions (
+      sid_hash TEXT PRIMARY KEY,
+      user_id INTEGER,
+      data TEXT NOT NULL,
+      expires_at INTEGER NOT NULL
+    )''',
+    'CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at)',
+    'CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions(user_id)',
+    '''CREATE TABLE IF NOT EXISTS cache_versions (
+      name TEXT PRIMARY KEY,
+      version INTEGER NOT NULL DEFAULT 0
+    )''',
+]
@@ -0,0 +1,31 @@
+"""Add users.last_login_at, backfilled from consumed login tokens."""
+
+STATEMENTS = [
+    'CREATE INDEX IF NOT EXISTS idx_login_tokens_user ON login_tokens(user_id, used)',
+]
+
+# tokens without created_at cannot date a login: a user with only those would
+# stay NULL after the UPDATE and be selected again forever
+_TODO = ('SELECT u.id FROM users u WHERE u.last_login_at IS NULL AND EXISTS '
+         '(SELECT 1 FROM login_tokens t WHERE t.user_id=u.id AND t.used=1 AND t.created_at IS NOT NULL)')
+
+
+def up(conn):
+    """add the column if missing"""
+    cols = {r[1] for r in conn.execute('PRAGMA table_info(users)')}
+    if 'last_login_at' not in cols:
+        conn.execute('ALTER TABLE users ADD COLUMN last_login_at DATETIME')
+
+
+def estimate(conn):
+    cols = {r[1] for r in conn.execute('PRAGMA table_info(users)')}
+    todo = _TODO if 'last_login_at' in cols else _TODO.replace('u.last_login_at IS NULL AND ', '')
+    return conn.execute(f'SELECT COUNT(*) FROM ({todo})').fetchone()[0]
+
+
+def backfill(conn, batch_size):
+    cur = conn.execute(
+        'UPDATE users SET last_login_at=(SELECT MAX(created_at) FROM login_tokens t '
+        'WHERE t.user_id=users.id AND t.used=1) '
+        f'WHERE id IN ({_TODO} LIMIT ?)', (batch_size,))
+    return cur.rowcount
@@ -0,0 +1,7 @@
+"""Index created_at on articles, photos and videos for the newest-first listings."""
+
+STATEMENTS = [
+    'CREATE INDEX IF NOT EXISTS idx_articles_created_at ON articles(created_at)',
+    'CREATE INDEX IF NOT EXISTS idx_photos_created_at ON photos(created_at)',
+    'CREATE INDEX IF NOT EXISTS idx_videos_created_at ON videos(created_at)',
+]
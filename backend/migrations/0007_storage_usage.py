@@ -0,0 +1,10 @@
+"""Storage-usage totals per uploads subdirectory, refreshed by the reconciler."""
+
+STATEMENTS = [
+    '''CREATE TABLE IF NOT EXISTS storage_usage (
+      name TEXT PRIMARY KEY,
+      files INTEGER NOT NULL DEFAULT 0,
+      bytes INTEGER NOT NULL DEFAULT 0,
+      updated_at INTEGER NOT NULL
+    )''',
+]
@@ -0,0 +1,18 @@
+"""Rows of bulk-deleted photos/videos, kept until their files are collected (undo window)."""
+
+STATEMENTS = [
+    '''CREATE TABLE IF NOT EXISTS media_trash (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      batch TEXT NOT NULL,
+      media_table TEXT NOT NULL,
+      row_id INTEGER NOT NULL,
+      filename TEXT NOT NULL,
+      title TEXT,
+      description TEXT,
+      created_at DATETIME,
+      bytes INTEGER NOT NULL DEFAULT 0,
+      deleted_at INTEGER NOT NULL
+    )''',
+    'CREATE INDEX IF NOT EXISTS idx_media_trash_batch ON media_trash(batch)',
+    'CREATE INDEX IF NOT EXISTS idx_media_trash_deleted_at ON media_trash(deleted_at)',
+]
@@ -0,0 +1,193 @@
+"""Versioned schema migrations.
+
+Migrations are the ``NNNN_name.py`` modules of this package, applied in
+version order and recorded in the ``schema_version`` table. A migration module
+may define:
+
+  STATEMENTS   list of SQL statements, run first
+  up(conn)     Python step for anything conditional (e.g. ALTER TABLE only if
+               the column is missing)
+  backfill(conn, batch_size) -> int
+               data migration run in batches until it returns 0; it must only
+               touch rows still needing work, so every call makes progress
+  estimate(conn) -> int
+               rows the backfill will touch, shown by --dry-run
+
+STATEMENTS and up() run in one BEGIN IMMEDIATE transaction. Each backfill
+batch commits separately, so a large table never holds the write lock for long;
+the version row is only written once the backfill is done. A migration
+interrupted mid-backfill is simply re-run, hence STATEMENTS/up() must be
+idempotent (IF NOT EXISTS, column checks).
+
+Apply with ``init_db()`` or ``python -m backend.manage migrate [--dry-run]``.
+"""
+
+import importlib
+import os
+import re
+import sqlite3
+import time
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BATCH_SIZE = int(os.getenv('MIGRATION_BATCH_SIZE', '1000'))
+_FILE_RE = re.compile(r'^(\d{4})_(\w+)\.py$')
+_discovered = None
+
+
+class MigrationError(Exception):
+    pass
+
+
+class Migration:
+    def __init__(self, version, name, module):
+        self.version = version
+        self.name = name
+        self.module = module
+
+    @property
+    def description(self):
+        doc = (self.module.__doc__ or '').strip()
+        return doc.splitlines()[0] if doc else self.name
+
+    def __repr__(self):
+        return f'<Migration {self.version:04d}_{self.name}>'
+
+
+def discover():
+    """Return all migrations of this package, ordered by version."""
+    global _discovered
+    if _discovered is None:
+        found = []
+        for fn in sorted(os.listdir(MIGRATIONS_DIR)):
+            m = _FILE_RE.match(fn)
+            if m:
+                module = importlib.import_module(f'{__name__}.{fn[:-3]}')
+                found.append(Migration(int(m.group(1)), m.group(2), module))
+        versions = [mig.version for mig in found]
+        if len(versions) != len(set(versions)):
+            raise MigrationError(f'duplicate migration versions in {MIGRATIONS_DIR}')
+        _discovered = found
+    return list(_discovered)
+
+
+def ensure_version_table(conn):
+    conn.execute('CREATE TABLE IF NOT EXISTS schema_version ('
+                 'version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at INTEGER NOT NULL)')
+
+
+def applied_versions(conn):
+    """Map of applied version -> applied_at (empty if the table is missing)."""
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='schema_version'").fetchone()
+    if not row:
+        return {}
+    return {r[0]: r[1] for r in conn.execute('SELECT version, applied_at FROM schema_version')}
+
+
+def current_version(conn):
+    versions = applied_versions(conn)
+    return max(versions) if versions else 0
+
+
+def pending(conn):
+    done = applied_versions(conn)
+    return [m for m in discover() if m.version not in done]
+
+
+def plan(conn, batch_size=DEFAULT_BATCH_SIZE):
+    """Human-readable description of what ``migrate`` would do."""
+    todo = pending(conn)
+    if not todo:
+        return [f'schema is up to date (version {current_version(conn)})']
+    lines = [f'current version {current_version(conn)}, {len(todo)} pending:']
+    for mig in todo:
+        mod = mig.module
+        lines.append(f'{mig.version:04d}_{mig.name}: {mig.description}')
+        for sql in getattr(mod, 'STATEMENTS', ()):
+            lines.append('    ' + ' '.join(sql.split()))
+        if hasattr(mod, 'up'):
+            lines.append(f'    up(): {(mod.up.__doc__ or "").strip() or "python step"}')
+        if hasattr(mod, 'backfill'):
+            try:
+                est = mod.estimate(conn) if hasattr(mod, 'estimate') else None
+            except sqlite3.Error:  # e.g. the table is created by an earlier pending migration
+                est = None
+            rows = f'~{est} rows' if est is not None else 'rows'
+            lines.append(f'    backfill {rows} in batches of {batch_size}')
+    return lines
+
+
+def _is_applied(conn, version):
+    return conn.execute('SELECT 1 FROM schema_version WHERE version=?', (version,)).fetchone() is not None
+
+
+def _apply(conn, mig, batch_size, log):
+    mod = mig.module
+    has_backfill = hasattr(mod, 'backfill')
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        # another worker may have applied it while we waited for the lock
+        if _is_applied(conn, mig.version):
+            conn.execute('ROLLBACK')
+            return False
+        for sql in getattr(mod, 'STATEMENTS', ()):
+            conn.execute(sql)
+        if hasattr(mod, 'up'):
+            mod.up(conn)
+        if not has_backfill:
+            conn.execute('INSERT INTO schema_version (version, name, applied_at) VALUES (?,?,?)',
+                         (mig.version, mig.name, int(time.time())))
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    if not has_backfill:
+        return True
+
+    total = 0
+    while True:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            n = mod.backfill(conn, batch_size)
+            if not n:
+                if not _is_applied(conn, mig.version):
+                    conn.execute('INSERT INTO schema_version (version, name, applied_at) VALUES (?,?,?)',
+                                 (mig.version, mig.name, int(time.time())))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        if not n:
+            break
+        total += n
+        log(f'  {mig.version:04d}_{mig.name}: backfilled {total} rows')
+    return True
+
+
+def migrate(conn, dry_run=False, batch_size=DEFAULT_BATCH_SIZE, log=None):
+    """Apply pending migrations; returns the list of migrations applied.
+
+    With ``dry_run`` nothing is written and the plan is passed to ``log``.
+    """
+    log = log or (lambda msg: None)
+    if dry_run:
+        for line in plan(conn, batch_size):
+            log(line)
+        return []
+    previous = conn.isolation_level
+    conn.isolation_level = None  # explicit BEGIN/COMMIT below
+    applied = []
+    try:
+        if not conn.execute('SELECT 1 FROM sqlite_master LIMIT 1').fetchone():
+            # only possible before the first table exists; lets purges use incremental_vacuum
+            conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        ensure_version_table(conn)
+        for mig in pending(conn):
+            log(f'applying {mig.version:04d}_{mig.name}: {mig.description}')
+            try:
+                if _apply(conn, mig, batch_size, log):
+                    applied.append(mig)
+            except Exception as e:
+                raise MigrationError(f'migration {mig.version:04d}_{mig.name} failed: {e}') from e
+    finally:
+        conn.isolation_level = previous
+    return applied
@@ -0,0 +1,307 @@
+"""Static export of the public site.
+
+`publish(out_dir)` renders the public pages through the Flask app (test
+client, anonymous visitor) into plain files, so any static file server can
+host the site while the Flask app only serves /admin and the write API:
+
+  /                          index.html
+  /articles/<id>             articles/<id>/index.html
+  /api/site, /api/me, /api/photos, /api/videos, /api/media, /api/articles
+  /api/articles/<id>, /api/articles/page/<n>
+                             <path>/index.json
+
+``out_dir`` is a symlink to a release directory next to it
+(``<out_dir>.releases/<stamp>``). A publish hard-links the previous release
+into a new one, re-renders only the pages whose inputs changed, and then
+swaps the symlink with one rename, so visitors never see a half-written site.
+Each page's inputs (the rows it shows, templates and static assets) are
+fingerprinted in ``.publish-manifest.json``. A page is rendered again only
+when its fingerprint changes, and pages of deleted rows are removed.
+
+static/ is copied into each release except static/uploads, which is a
+symlink to the live uploads directory.
+
+The server must map a directory request to its index.html or index.json
+(nginx: ``index index.html index.json;``); see README.
+"""
+
+import hashlib
+import importlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+MANIFEST = '.publish-manifest.json'
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class PublishError(Exception):
+    pass
+
+
+def _digest(*parts) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(json.dumps(part, sort_keys=True, default=str).encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def url_to_path(url: str, is_json: bool) -> str:
+    """Relative file path of ``url`` inside a release."""
+    rel = url.strip('/')
+    index = 'index.json' if is_json else 'index.html'
+    return os.path.join(*rel.split('/'), index) if rel else index
+
+
+def _tree_digest(root, skip=()):
+    h = hashlib.sha256()
+    for dirpath, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if os.path.join(dirpath, d) not in skip)
+        for fn in sorted(files):
+            full = os.path.join(dirpath, fn)
+            h.update(os.path.relpath(full, root).encode('utf-8'))
+            with open(full, 'rb') as fh:
+                h.update(hashlib.sha256(fh.read()).digest())
+    return h.hexdigest()
+
+
+def build_key(static_dir, template_dir) -> str:
+    """Fingerprint of everything besides the DB that shapes the output."""
+    skip = {os.path.join(static_dir, 'uploads')}
+    return _digest(_tree_digest(static_dir, skip), _tree_digest(template_dir))
+
+
+def plan_pages(conn, per_page: int) -> dict:
+    """Map of url -> (fingerprint, is_json) for every public page, from the DB rows."""
+    site = sorted(tuple(r) for r in conn.execute('SELECT key, value FROM site_meta'))
+    articles = [tuple(r) for r in conn.execute(
+        'SELECT id, title, author, content, image, video, created_at FROM articles ORDER BY created_at DESC')]
+    photos = [tuple(r) for r in conn.execute('SELECT id, filename, title, description, created_at FROM photos')]
+    videos = [tuple(r) for r in conn.execute('SELECT id, filename, title, description, created_at FROM videos')]
+    pages = {
+        '/': (_digest('index', site), False),
+        '/api/site': (_digest('site', site), True),
+        '/api/me': (_digest('me'), True),
+        '/api/photos': (_digest('photos', photos), True),
+        '/api/videos': (_digest('videos', videos), True),
+        # first gallery page only: a static server cannot answer ?cursor= queries
+        '/api/media': (_digest('media', photos, videos), True),
+    }
+    total = len(articles)
+    npages = max(1, -(-total // per_page))
+    for n in range(1, npages + 1):
+        fp = _digest('articles', total, n, articles[(n - 1) * per_page:n * per_page])
+        pages[f'/api/articles/page/{n}'] = (fp, True)
+        if n == 1:
+            pages['/api/articles'] = (fp, True)
+    for row in articles:
+        pages[f'/api/articles/{row[0]}'] = (_digest('article', row), True)
+        pages[f'/articles/{row[0]}'] = (_digest('article_page', row, site), False)
+    return pages
+
+
+def _link_tree(src, dst):
+    """Recreate ``src`` under ``dst`` with hard links (copies if linking fails)."""
+    for dirpath, dirs, files in os.walk(src):
+        rel = os.path.relpath(dirpath, src)
+        target_dir = os.path.join(dst, rel) if rel != '.' else dst
+        os.makedirs(target_dir, exist_ok=True)
+        for d in list(dirs):
+            full = os.path.join(dirpath, d)
+            if os.path.islink(full):  # static/uploads
+                os.symlink(os.readlink(full), os.path.join(target_dir, d))
+                dirs.remove(d)
+        for fn in files:
+            s, d = os.path.join(dirpath, fn), os.path.join(target_dir, fn)
+            if os.path.islink(s):
+                os.symlink(os.readlink(s), d)
+                continue
+            try:
+                os.link(s, d)
+            except OSError:
+                shutil.copy2(s, d)
+
+
+def _write(release, rel, data: bytes):
+    path = os.path.join(release, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as fh:
+        fh.write(data)
+    os.replace(tmp, path)  # never writes through a hard link shared with the previous release
+
+
+def _remove(release, rel):
+    path = os.path.join(release, rel)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return
+    parent = os.path.dirname(path)
+    while parent != release and not os.listdir(parent):
+        os.rmdir(parent)
+        parent = os.path.dirname(parent)
+
+
+def _install_static(release, static_dir, uploads_dir):
+    target = os.path.join(release, 'static')
+    if os.path.islink(target) or os.path.exists(target):
+        shutil.rmtree(target)
+    shutil.copytree(static_dir, target, ignore=lambda d, names: ['uploads'] if d == static_dir else [])
+    os.symlink(os.path.abspath(uploads_dir), os.path.join(target, 'uploads'))
+
+
+def _releases(out_dir):
+    base = out_dir.rstrip(os.sep) + '.releases'
+    if not os.path.isdir(base):
+        return base, []
+    return base, sorted(os.path.join(base, d) for d in os.listdir(base) if not d.startswith('.'))
+
+
+class _FileLock:
+    def __init__(self, path):
+        self.path = path
+        self.fh = None
+
+    def __enter__(self):
+        self.fh = open(self.path, 'a')
+        if fcntl is not None:
+            fcntl.flock(self.fh, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.fh, fcntl.LOCK_UN)
+        self.fh.close()
+
+
+def publish(out_dir, full=False, keep=2, dry_run=False, uploads_dir=None, static_dir=None,
+            template_dir=None, log=None, appmod=None):
+    """Export the public site to ``out_dir``; returns run stats.
+
+    Only pages whose fingerprint changed are rendered unless ``full``. With
+    ``dry_run`` nothing is written and the stats list what would change.
+    ``appmod`` is the app module to render with (default ``backend.app``).
+    """
+    appmod = appmod or importlib.import_module('backend.app')
+    log = log or (lambda msg: None)
+    out_dir = os.path.abspath(out_dir)
+    static_dir = static_dir or os.path.join(BACKEND_DIR, 'static')
+    template_dir = template_dir or os.path.join(BACKEND_DIR, 'templates')
+    uploads_dir = uploads_dir or appmod.UPLOAD_BASE
+    if os.path.exists(out_dir) and not os.path.islink(out_dir):
+        raise PublishError(f'{out_dir} exists and is not a symlink made by publish; move it away first')
+
+    with _FileLock(out_dir.rstrip(os.sep) + '.lock'):
+        t0 = time.perf_counter()
+        per_page = appmod.parse_article_query({})[2]
+        conn = appmod.get_db()
+        try:
+            pages = plan_pages(conn, per_page)
+        finally:
+            conn.close()
+        key = _digest(build_key(static_dir, template_dir), os.path.abspath(uploads_dir))
+        current = os.path.realpath(out_dir) if os.path.islink(out_dir) else None
+        previous = {}
+        if current and not full:
+            try:
+                with open(os.path.join(current, MANIFEST), encoding='utf-8') as fh:
+                    previous = json.load(fh)
+            except (OSError, ValueError):
+                previous = {}
+        rebuild = full or previous.get('build_key') != key
+        old_pages = {} if rebuild else previous.get('pages', {})
+        changed = sorted(url for url, (fp, _) in pages.items() if old_pages.get(url, {}).get('fingerprint') != fp)
+        removed = sorted(url for url in old_pages if url not in pages)
+        stats = {'out': out_dir, 'pages': len(pages), 'rendered': len(changed), 'removed': len(removed),
+                 'full': rebuild, 'changed_urls': changed, 'removed_urls': removed}
+        if dry_run or (current and not changed and not removed and not rebuild):
+            stats.update({'release': current, 'seconds': round(time.perf_counter() - t0, 3)})
+            return stats
+
+        base, existing = _releases(out_dir)
+        os.makedirs(base, exist_ok=True)
+        stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S%fZ')
+        release = os.path.join(base, stamp)
+        tmp_release = os.path.join(base, '.' + stamp)
+        if current and not rebuild:
+            _link_tree(current, tmp_release)
+        else:
+            os.makedirs(tmp_release)
+            _install_static(tmp_release, static_dir, uploads_dir)
+
+        if appmod.READ_SNAPSHOT:
+            appmod.get_read_snapshot().refresh()  # render what plan_pages just read
+        # READ_CACHE off: a worker's cached pages may predate the fingerprints just taken
+        client = appmod.create_app({'SESSION_BACKEND': 'cookie', 'READ_CACHE': False}).test_client()
+        manifest_pages = {}
+        for url, (fp, is_json) in pages.items():
+            rel = url_to_path(url, is_json)
+            if url in changed:
+                resp = client.get(url)
+                if resp.status_code != 200:
+                    shutil.rmtree(tmp_release, ignore_errors=True)
+                    raise PublishError(f'GET {url} returned {resp.status_code}')
+                _write(tmp_release, rel, resp.get_data())
+            manifest_pages[url] = {'fingerprint': fp, 'path': rel}
+        for url in removed:
+            _remove(tmp_release, old_pages[url]['path'])
+        _write(tmp_release, MANIFEST, json.dumps(
+            {'build_key': key, 'published_at': stamp, 'pages': manifest_pages}, sort_keys=True).encode('utf-8'))
+        os.rename(tmp_release, release)
+
+        link_tmp = out_dir.rstrip(os.sep) + '.swap'
+        if os.path.lexists(link_tmp):
+            os.remove(link_tmp)
+        os.symlink(release, link_tmp)
+        os.replace(link_tmp, out_dir)
+        for old in existing[:max(0, len(existing) + 1 - keep)]:
+            if old != release:
+                shutil.rmtree(old, ignore_errors=True)
+        stats.update({'release': release, 'seconds': round(time.perf_counter() - t0, 3)})
+        log(f"published {stats['rendered']} pages ({stats['removed']} removed) to {release} in {stats['seconds']}s")
+        return stats
+
+
+class Publisher:
+    """Runs `publish` in a background thread; requests made while it runs coalesce into one more run."""
+
+    def __init__(self, out_dir, log=None, **options):
+        self.out_dir = out_dir
+        self.options = options
+        self.log = log
+        self.last = None
+        self._lock = threading.Lock()
+        self._pending = False
+        self._running = False
+
+    def request(self):
+        with self._lock:
+            self._pending = True
+            if self._running:
+                return
+            self._running = True
+        threading.Thread(target=self._loop, name='publisher', daemon=True).start()
+
+    def _loop(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._running = False
+                    return
+                self._pending = False
+            try:
+                self.last = publish(self.out_dir, log=self.log, **self.options)
+            except Exception:
+                logger.exception('Static publish to %s failed', self.out_dir)
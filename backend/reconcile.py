@@ -0,0 +1,139 @@
+"""Reconcile upload files with the rows that reference them.
+
+One pass over the uploads tree (os.scandir) and one query per table build two
+sets, disk files and DB references, keyed by (subdir, filename); everything
+else is set arithmetic, so the cost is a directory walk plus a few table
+reads regardless of the number of files. It reports:
+
+  orphans        files no photos/videos row or article URL references
+  missing_media  photos/videos rows whose file is gone
+  broken_refs    article image/video URLs pointing at a file that is gone
+
+Orphans younger than ``min_age`` seconds are left out (an upload may be
+between save_upload and its INSERT). Orphans can be quarantined, i.e. moved
+outside the served static tree, and the per-subdirectory totals are written
+to the storage_usage table.
+"""
+
+import os
+import shutil
+import time
+from datetime import datetime
+
+MEDIA_TABLES = {'photos': 'photos', 'videos': 'videos'}  # table -> uploads subdirectory
+_SUBDIR_TABLE = {sub: table for table, sub in MEDIA_TABLES.items()}
+URL_PREFIX = '/static/uploads/'
+
+
+def scan_disk(uploads_dir: str, subdirs=tuple(MEDIA_TABLES.values())):
+    """Return {(subdir, filename): (size, mtime)} for the files of each subdir."""
+    files = {}
+    for sub in subdirs:
+        try:
+            it = os.scandir(os.path.join(uploads_dir, sub))
+        except FileNotFoundError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_file(follow_symlinks=False):
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except FileNotFoundError:
+                        continue
+                    files[(sub, entry.name)] = (st.st_size, st.st_mtime)
+    return files
+
+
+def parse_upload_url(url):
+    """'/static/uploads/photos/x.jpg' -> ('photos', 'x.jpg'); None for other URLs."""
+    if not url or not url.startswith(URL_PREFIX):
+        return None
+    parts = url[len(URL_PREFIX):].split('?', 1)[0].split('/')
+    if len(parts) != 2 or not parts[1]:
+        return None
+    return parts[0], parts[1]
+
+
+def db_references(conn):
+    """Return (media, article_refs).
+
+    ``media`` maps (subdir, filename) -> row id for photos/videos rows;
+    ``article_refs`` lists (article_id, field, (subdir, filename)).
+    """
+    media = {}
+    for table, sub in MEDIA_TABLES.items():
+        for rid, fn in conn.execute(f'SELECT id, filename FROM {table}'):
+            media[(sub, fn)] = rid
+    refs = []
+    for aid, image, video in conn.execute('SELECT id, image, video FROM articles'):
+        for field, url in (('image', image), ('video', video)):
+            key = parse_upload_url(url)
+            if key:
+                refs.append((aid, field, key))
+    return media, refs
+
+
+def quarantine(uploads_dir: str, quarantine_dir: str, keys):
+    """Move files to ``quarantine_dir/<timestamp>/<subdir>/``; returns the batch dir."""
+    dest_root = os.path.join(quarantine_dir, datetime.utcnow().strftime('%Y%m%dT%H%M%SZ'))
+    for sub, fn in keys:
+        dest = os.path.join(dest_root, sub)
+        os.makedirs(dest, exist_ok=True)
+        try:
+            shutil.move(os.path.join(uploads_dir, sub, fn), os.path.join(dest, fn))
+        except FileNotFoundError:
+            pass
+    return dest_root
+
+
+def update_storage_usage(conn, totals: dict):
+    now = int(time.time())
+    conn.executemany(
+        'INSERT INTO storage_usage (name, files, bytes, updated_at) VALUES (?,?,?,?) '
+        'ON CONFLICT(name) DO UPDATE SET files=excluded.files, bytes=excluded.bytes, updated_at=excluded.updated_at',
+        [(name, t['files'], t['bytes'], now) for name, t in totals.items()])
+    conn.commit()
+
+
+def reconcile(conn, uploads_dir: str, quarantine_dir: str = None, min_age: float = 3600,
+              update_usage: bool = True) -> dict:
+    """Compare disk and DB; quarantine orphans if ``quarantine_dir`` is given."""
+    t0 = time.perf_counter()
+    disk = scan_disk(uploads_dir)
+    media, article_refs = db_references(conn)
+    referenced = set(media) | {key for _, _, key in article_refs}
+    cutoff = time.time() - min_age
+    orphans = sorted(k for k in disk.keys() - referenced if disk[k][1] < cutoff)
+    missing = sorted(set(media) - disk.keys())
+    broken = [{'article_id': aid, 'field': field, 'url': f'{URL_PREFIX}{key[0]}/{key[1]}'}
+              for aid, field, key in article_refs if key not in disk]
+
+    totals = {sub: {'files': 0, 'bytes': 0} for sub in MEDIA_TABLES.values()}
+    for (sub, _), (size, _) in disk.items():
+        totals[sub]['files'] += 1
+        totals[sub]['bytes'] += size
+    orphan_bytes = sum(disk[k][0] for k in orphans)
+
+    quarantined_to = None
+    if quarantine_dir and orphans:
+        quarantined_to = quarantine(uploads_dir, quarantine_dir, orphans)
+        for sub, fn in orphans:
+            totals[sub]['files'] -= 1
+            totals[sub]['bytes'] -= disk[(sub, fn)][0]
+    totals['total'] = {'files': sum(t['files'] for t in totals.values()),
+                       'bytes': sum(t['bytes'] for t in totals.values())}
+    if update_usage:
+        update_storage_usage(conn, totals)
+
+    return {
+        'files_scanned': len(disk),
+        'db_references': len(referenced),
+        'orphans': [f'{sub}/{fn}' for sub, fn in orphans],
+        'orphan_bytes': orphan_bytes,
+        'quarantined_to': quarantined_to,
+        'missing_media': [{'table': _SUBDIR_TABLE[sub], 'id': media[(sub, fn)],
+                           'file': f'{sub}/{fn}'} for sub, fn in missing],
+        'broken_refs': broken,
+        'storage_usage': totals,
+        'seconds': round(time.perf_counter() - t0, 3),
+    }
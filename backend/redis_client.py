@@ -0,0 +1,203 @@
+"""Managed Redis client shared by the rate limiter, sessions and status page.
+
+The underlying `redis.Redis` client is created lazily on first use (importing
+the app never blocks on the network) with a bounded connection pool and
+connect/socket timeouts. A circuit breaker stops calling Redis after repeated
+failures so callers fall back to their in-memory paths quickly instead of
+waiting on timeouts; after `reset_timeout` seconds one trial call is let
+through to probe recovery.
+"""
+
+import threading
+import time
+
+
+class RedisUnavailable(Exception):
+    """Raised instead of calling Redis while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                # let exactly one probe through
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def is_open(self) -> bool:
+        with self._lock:
+            return self.state == self.OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class _Pipeline:
+    """Pipeline wrapper whose execute() goes through the breaker and metrics."""
+
+    def __init__(self, owner, pipe):
+        self._owner = owner
+        self._pipe = pipe
+
+    def __getattr__(self, name):
+        attr = getattr(self._pipe, name)
+        if not callable(attr):
+            return attr
+
+        def queue(*args, **kwargs):
+            attr(*args, **kwargs)
+            return self
+        return queue
+
+    def execute(self):
+        return self._owner._run('pipeline', self._pipe.execute)
+
+
+class ManagedRedis:
+    """Lazily connected Redis client with pooling, timeouts and a circuit breaker.
+
+    Any Redis command is available as a method (`client.eval(...)`,
+    `client.ping()`...) and is routed through `_run`, which records latency
+    and errors and raises RedisUnavailable while the breaker is open.
+    """
+
+    def __init__(self, url: str, max_connections: int = 10, socket_timeout: float = 0.5,
+                 connect_timeout: float = 0.5, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.url = url
+        self.max_connections = max_connections
+        self.socket_timeout = socket_timeout
+        self.connect_timeout = connect_timeout
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._client = None
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._errors = 0
+        self._rejected = 0
+        self._total_seconds = 0.0
+        self._max_seconds = 0.0
+        self._last_error = None
+        # optional callable(command, seconds, error) used for app metrics
+        self.observer = None
+
+    def _get_client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import redis
+                    pool = redis.ConnectionPool.from_url(
+                        self.url,
+                        max_connections=self.max_connections,
+                        socket_timeout=self.socket_timeout,
+                        socket_connect_timeout=self.connect_timeout,
+                    )
+                    self._client = redis.Redis(connection_pool=pool)
+        return self._client
+
+    def reset(self):
+        """Drop the pool (e.g. in a forked child) so connections are not shared."""
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            try:
+                client.connection_pool.disconnect()
+            except Exception:
+                pass
+
+    def after_fork(self):
+        """Forget the parent's pool and locks in a forked child (no I/O).
+
+        The parent's sockets must not be used or closed by the child, and a
+        lock held by another thread at fork time would never be released.
+        """
+        self._lock = threading.Lock()
+        self.breaker._lock = threading.Lock()
+        self._client = None
+
+    @property
+    def available(self) -> bool:
+        """False while the breaker is open and not yet due for a probe."""
+        return not self.breaker.is_open()
+
+    def _run(self, name, fn, *args, **kwargs):
+        if not self.breaker.allow():
+            with self._lock:
+                self._rejected += 1
+            raise RedisUnavailable(f'circuit open; skipped {name}')
+        t0 = time.perf_counter()
+        try:
+            res = fn(*args, **kwargs)
+        except Exception as e:
+            self._record(name, time.perf_counter() - t0, e)
+            self.breaker.record_failure()
+            raise
+        self._record(name, time.perf_counter() - t0, None)
+        self.breaker.record_success()
+        return res
+
+    def _record(self, name, seconds, error):
+        with self._lock:
+            self._calls += 1
+            self._total_seconds += seconds
+            self._max_seconds = max(self._max_seconds, seconds)
+            if error is not None:
+                self._errors += 1
+                self._last_error = f'{type(error).__name__}: {error}'
+        if self.observer is not None:
+            try:
+                self.observer(name, seconds, error)
+            except Exception:
+                pass
+
+    def pipeline(self, *args, **kwargs):
+        return _Pipeline(self, self._get_client().pipeline(*args, **kwargs))
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def command(*args, **kwargs):
+            return self._run(name, lambda: getattr(self._get_client(), name)(*args, **kwargs))
+        return command
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'connected': self._client is not None,
+                'calls': self._calls,
+                'errors': self._errors,
+                'rejected_by_breaker': self._rejected,
+                'avg_latency_ms': round(self._total_seconds / self._calls * 1000, 3) if self._calls else None,
+                'max_latency_ms': round(self._max_seconds * 1000, 3),
+                'last_error': self._last_error,
+                'breaker_state': self.breaker.state,
+                'breaker_consecutive_failures': self.breaker.consecutive_failures,
+                'breaker_times_opened': self.breaker.times_opened,
+                'max_connections': self.max_connections,
+            }
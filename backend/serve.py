@@ -0,0 +1,33 @@
+"""Serve the app with waitress (single process, thread pool).
+
+  python -m backend.serve [--host 0.0.0.0] [--port 8000] [--threads 8]
+
+For hosts without fork (Windows) or where gunicorn is not available. One
+process means the in-memory rate limiter and caches are shared by all threads;
+SQLite still runs in WAL mode so readers never wait for a writer.
+"""
+
+import argparse
+import os
+import sys
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=os.getenv('HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', '8000')))
+    parser.add_argument('--threads', type=int, default=int(os.getenv('WEB_THREADS', '8')))
+    args = parser.parse_args(argv)
+    try:
+        from waitress import serve
+    except ImportError:
+        print('waitress is not installed: pip install waitress', file=sys.stderr)
+        return 1
+    os.environ.setdefault('SQLITE_JOURNAL_MODE', 'wal')
+    from backend.app import create_app
+    serve(create_app(), host=args.host, port=args.port, threads=args.threads)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""Server-side session storage for LFIWEB.
+
+Flask's default session keeps everything in a signed cookie, so logging out
+cannot revoke a copied cookie. With SESSION_BACKEND=sqlite or redis the cookie
+only carries a random session id; the data lives server-side keyed by the
+SHA-256 of that id (a leaked store does not yield usable cookies) and can be
+revoked per session or per user.
+"""
+
+import hashlib
+import json
+import secrets
+import time
+
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+
+SESSION_TTL_SECONDS = 7 * 24 * 60 * 60
+SWEEP_INTERVAL_SECONDS = 300
+SWEEP_BATCH = 500
+
+
+def hash_sid(sid: str) -> str:
+    return hashlib.sha256(sid.encode('utf-8')).hexdigest()
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+        CallbackDict.__init__(self, initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+
+class SQLiteSessionStore:
+    """Sessions in the `sessions` table created by init_db().
+
+    Expired rows are swept opportunistically, at most once per
+    SWEEP_INTERVAL_SECONDS per process and SWEEP_BATCH rows at a time.
+    """
+
+    def __init__(self, connect):
+        self.connect = connect
+        self._last_sweep = 0.0
+
+    def load(self, key: str):
+        conn = self.connect()
+        try:
+            cur = conn.cursor()
+            cur.execute('SELECT data FROM sessions WHERE sid_hash=? AND expires_at > ?', (key, int(time.time())))
+            row = cur.fetchone()
+        finally:
+            conn.close()
+        return json.loads(row[0]) if row else None
+
+    def save(self, key: str, user_id, data: dict, ttl: int):
+        conn = self.connect()
+        try:
+            conn.execute('INSERT OR REPLACE INTO sessions (sid_hash, user_id, data, expires_at) VALUES (?,?,?,?)',
+                         (key, user_id, json.dumps(data), int(time.time()) + ttl))
+            conn.commit()
+            self.maybe_sweep(conn)
+        finally:
+            conn.close()
+
+    def delete(self, key: str):
+        conn = self.connect()
+        try:
+            conn.execute('DELETE FROM sessions WHERE sid_hash=?', (key,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def delete_user(self, user_id) -> int:
+        conn = self.connect()
+        try:
+            cur = conn.cursor()
+            cur.execute('DELETE FROM sessions WHERE user_id=?', (user_id,))
+            conn.commit()
+            return cur.rowcount
+        finally:
+            conn.close()
+
+    def sweep(self, conn, batch_size: int = SWEEP_BATCH) -> int:
+        cur = conn.cursor()
+        cur.execute('DELETE FROM sessions WHERE sid_hash IN (SELECT sid_hash FROM sessions WHERE expires_at <= ? LIMIT ?)',
+                    (int(time.time()), batch_size))
+        conn.commit()
+        return cur.rowcount
+
+    def maybe_sweep(self, conn) -> int:
+        now = time.time()
+        if now - self._last_sweep < SWEEP_INTERVAL_SECONDS:
+            return 0
+        self._last_sweep = now
+        return self.sweep(conn)
+
+
+class RedisSessionStore:
+    """Sessions as `sess:<hash>` strings with a TTL.
+
+    `sess_user:<user_id>` is a set of the user's session hashes so all of them
+    can be revoked in one pipeline. Redis expiry handles sweeping; stale
+    members of the per-user set are harmless and expire with the set.
+    """
+
+    def __init__(self, client, prefix: str = 'sess:'):
+        self.client = client
+        self.prefix = prefix
+
+    def _user_key(self, user_id) -> str:
+        return f'{self.prefix[:-1]}_user:{user_id}'
+
+    def load(self, key: str):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw else None
+
+    def save(self, key: str, user_id, data: dict, ttl: int):
+        pipe = self.client.pipeline()
+        pipe.setex(self.prefix + key, ttl, json.dumps(data))
+        if user_id is not None:
+            pipe.sadd(self._user_key(user_id), key)
+            pipe.expire(self._user_key(user_id), ttl)
+        pipe.execute()
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def delete_user(self, user_id) -> int:
+        ukey = self._user_key(user_id)
+        members = self.client.smembers(ukey) or ()
+        keys = [self.prefix + (m.decode() if isinstance(m, bytes) else m) for m in members]
+        pipe = self.client.pipeline()
+        if keys:
+            pipe.delete(*keys)
+        pipe.delete(ukey)
+        res = pipe.execute()
+        return int(res[0]) if keys else 0
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Flask session interface storing session data in a SQLite or Redis store.
+
+    Store errors are logged, never raised into the request. When ``store``
+    fails to save (Redis down, breaker open), the session goes to
+    ``fallback`` if there is one, and is looked up there when ``store`` does
+    not have it; without a fallback the response sets no cookie.
+    """
+
+    def __init__(self, store, ttl: int = SESSION_TTL_SECONDS, fallback=None):
+        self.store = store
+        self.ttl = ttl
+        self.fallback = fallback
+
+    def _stores(self):
+        return (self.store,) if self.fallback is None else (self.store, self.fallback)
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            for store in self._stores():
+                try:
+                    data = store.load(hash_sid(sid))
+                except Exception:
+                    app.logger.exception('Session store read failed')
+                    data = None
+                if data is not None:
+                    return ServerSession(data, sid=sid)
+        return ServerSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def _delete(self, app, key):
+        for store in self._stores():
+            try:
+                store.delete(key)
+            except Exception:
+                app.logger.exception('Session store delete failed')
+
+    def _save(self, app, key, user_id, data) -> bool:
+        for store in self._stores():
+            try:
+                store.save(key, user_id, data, self.ttl)
+                return True
+            except Exception:
+                app.logger.exception('Session store write failed')
+        return False
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if not session:
+            if session.modified and not session.new:
+                self._delete(app, hash_sid(session.sid))
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if session.modified and not session.new:
+            # rotate the id on changes (login/logout/CSRF refresh) to avoid fixation
+            self._delete(app, hash_sid(session.sid))
+            session.sid = secrets.token_urlsafe(32)
+        elif not session.modified and not self.should_set_cookie(app, session):
+            return
+        if not self._save(app, hash_sid(session.sid), session.get('user_id'), dict(session)):
+            return
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
@@ -0,0 +1,128 @@
+"""Single-flight read cache with stale-while-revalidate.
+
+`SingleFlightCache.get(key, load)` returns the cached value for ``key`` and
+makes sure that, in this process, at most one thread runs ``load()`` for a
+key at any time:
+
+  hit        a fresh entry is returned as is.
+  miss       no entry: this thread loads it. Threads arriving meanwhile
+             wait for that result instead of loading it again (coalesced).
+  stale      the entry was invalidated (`mark_stale`, wired to the
+             invalidation bus) or is older than ``ttl``. The first thread
+             to notice reloads it; the others get the previous value at
+             once instead of queueing behind the reload.
+
+A failed reload of a stale entry keeps serving the previous value (logged),
+so a burst of errors does not turn into a burst of 500s. A failed miss is
+raised in the loading thread and in every thread waiting on it.
+
+A value loaded while an invalidation happens is stored as already stale, so
+the next request reloads it rather than serving it until the next write.
+Entries are kept in LRU order, at most ``max_entries`` of them.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# a stale entry's reload counts as a miss
+OUTCOMES = ('hit', 'miss', 'coalesced', 'stale', 'error')
+
+
+class _Flight:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlightCache:
+    def __init__(self, name, ttl=None, max_entries=256, wait_timeout=30.0, count=None):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.wait_timeout = wait_timeout
+        self.count = count  # count(outcome), e.g. a metrics counter
+        self.stats_by_outcome = dict.fromkeys(OUTCOMES, 0)
+        self._entries = OrderedDict()  # key -> (value, generation, stored_at)
+        self._flights = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, load):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                value, generation, stored_at = entry
+                if generation == self._generation and (self.ttl is None or time.monotonic() - stored_at < self.ttl):
+                    self._record('hit')
+                    return value
+                if key in self._flights:
+                    self._record('stale')
+                    return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                generation = self._generation
+            self._record('miss' if leader else 'coalesced')
+        if not leader:
+            if not flight.done.wait(self.wait_timeout):
+                raise TimeoutError(f'{self.name}: timed out waiting for {key!r}')
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            value = load()
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self._record('error')
+            if entry is None:
+                raise
+            logger.exception('%s: reload of %r failed, serving the previous value', self.name, key)
+            return entry[0]
+        else:
+            flight.value = value
+            with self._lock:
+                self._entries[key] = (value, generation, time.monotonic())
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return value
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _record(self, outcome):
+        self.stats_by_outcome[outcome] += 1
+        if self.count is not None:
+            self.count(outcome)
+
+    def mark_stale(self):
+        """Keep the entries for stale-while-revalidate, but reload each on its next use."""
+        with self._lock:
+            self._generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return dict(self.stats_by_outcome, entries=len(self._entries), in_flight=len(self._flights))
+
+    def after_fork(self):
+        # a flight owned by another thread of the parent would never finish here
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,157 @@
+"""In-memory read snapshot of the public tables.
+
+With READ_SNAPSHOT=1 each worker process keeps a copy of articles, photos,
+videos and site_meta in a shared-cache in-memory SQLite database, and the
+public GET views read from it (`app.get_read_db()`), so page views do no disk
+I/O.
+
+A snapshot is loaded with the online backup API (one consistent read of the
+file), private tables are dropped and the copy is compacted. Freshness is
+checked at most every ``check_interval`` seconds: ``PRAGMA data_version`` on
+a long-lived connection to the file says whether anyone committed since the
+last check, and only then the ``content`` row of cache_versions (bumped by
+every content write) is compared with the snapshot's. On a change the new copy
+is loaded aside and swapped in with one assignment; the previous copy stays
+open until the next swap so requests that already picked it up can finish.
+``on_swap()`` is then called, so caches filled from the old copy can go.
+"""
+
+import itertools
+import os
+import sqlite3
+import threading
+import time
+
+PUBLIC_TABLES = ('articles', 'photos', 'videos', 'site_meta')
+CONTENT_VERSION = 'content'
+
+_names = itertools.count(1)
+
+
+class _Generation:
+    def __init__(self, uri, keeper, content_version, stats):
+        self.uri = uri
+        self.keeper = keeper  # keeps the shared in-memory DB alive
+        self.content_version = content_version
+        self.stats = stats
+
+
+def _content_version(conn):
+    try:
+        row = conn.execute('SELECT version FROM cache_versions WHERE name=?', (CONTENT_VERSION,)).fetchone()
+    except sqlite3.OperationalError:  # schema not migrated yet
+        return 0
+    return row[0] if row else 0
+
+
+class ReadSnapshot:
+    def __init__(self, db_path, tables=PUBLIC_TABLES, check_interval=1.0, connect=sqlite3.connect, on_swap=None):
+        self.db_path = db_path
+        self.on_swap = on_swap
+        self.tables = tuple(tables)
+        self.check_interval = check_interval
+        self._connect = connect
+        self._lock = threading.Lock()
+        self._watch = None
+        self._data_version = None
+        self._checked = 0.0
+        self._current = None
+        self._previous = None
+        self.reloads = 0
+        self.checks = 0
+
+    def _load(self):
+        uri = f'file:lfiweb-snapshot-{os.getpid()}-{next(_names)}?mode=memory&cache=shared'
+        t0 = time.perf_counter()
+        src = sqlite3.connect(self.db_path, timeout=30)
+        keeper = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        try:
+            src.backup(keeper)
+        finally:
+            src.close()
+        version = _content_version(keeper)
+        names = [r[0] for r in keeper.execute("SELECT name FROM sqlite_master WHERE type='table' "
+                                              "AND name NOT LIKE 'sqlite_%'")]
+        for name in names:
+            if name not in self.tables:
+                keeper.execute(f'DROP TABLE "{name}"')
+        if 'sqlite_sequence' in {r[0] for r in keeper.execute("SELECT name FROM sqlite_master")}:
+            placeholders = ','.join('?' * len(self.tables))
+            keeper.execute(f'DELETE FROM sqlite_sequence WHERE name NOT IN ({placeholders})', self.tables)
+        keeper.commit()
+        keeper.execute('VACUUM')
+        page_size = keeper.execute('PRAGMA page_size').fetchone()[0]
+        page_count = keeper.execute('PRAGMA page_count').fetchone()[0]
+        stats = {
+            'uri': uri,
+            'loaded_at': time.time(),
+            'load_seconds': round(time.perf_counter() - t0, 4),
+            'bytes': page_size * page_count,
+            'db_file_bytes': os.path.getsize(self.db_path),
+            'content_version': version,
+            'rows': {t: keeper.execute(f'SELECT COUNT(*) FROM "{t}"').fetchone()[0]
+                     for t in self.tables if t in names},
+        }
+        return _Generation(uri, keeper, version, stats)
+
+    def _stale(self):
+        """True if the file's content version moved since the current snapshot."""
+        if self._watch is None:
+            self._watch = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self.checks += 1
+        data_version = self._watch.execute('PRAGMA data_version').fetchone()[0]
+        if data_version == self._data_version:
+            return False
+        self._data_version = data_version
+        return _content_version(self._watch) != self._current.content_version
+
+    def refresh(self, force=False, blocking=True):
+        """Reload if the content changed (or ``force``); returns True on a swap.
+
+        With ``blocking=False`` the call returns at once if another thread is
+        already checking or loading.
+        """
+        if not self._lock.acquire(blocking=blocking):
+            return False
+        try:
+            self._checked = time.monotonic()
+            if not force and self._current is not None and not self._stale():
+                return False
+            new = self._load()
+            retired, self._previous = self._previous, self._current
+            self._current = new
+            self.reloads += 1
+        finally:
+            self._lock.release()
+        if retired is not None:
+            retired.keeper.close()  # the memory is freed once its last reader closes
+        if self.on_swap is not None:
+            self.on_swap()
+        return True
+
+    def connect(self):
+        """A read-only connection to the current snapshot, refreshed if due. Caller closes."""
+        if self._current is None:
+            self.refresh()
+        elif time.monotonic() - self._checked >= self.check_interval:
+            self.refresh(blocking=False)
+        current = self._current
+        conn = self._connect(current.uri, uri=True)
+        conn.execute('PRAGMA query_only=1')
+        return conn
+
+    def stats(self) -> dict:
+        current = self._current
+        info = dict(current.stats) if current else {}
+        info.update({'reloads': self.reloads, 'checks': self.checks, 'check_interval': self.check_interval})
+        return info
+
+    def close(self):
+        with self._lock:
+            for gen in (self._current, self._previous):
+                if gen is not None:
+                    gen.keeper.close()
+            self._current = self._previous = None
+            if self._watch is not None:
+                self._watch.close()
+                self._watch = None
@@ -19,8 +19,9 @@ let articles = [
     }
 ];
 
-// mediaItems will be populated from the server (/api/photos and /api/videos)
+// mediaItems will be populated from the server (/api/media, newest first, one page at a time)
 let mediaItems = [];
+let mediaCursor = null; // next_cursor of the last page loaded, null once everything is shown
 
 let socialLinks = {
     facebook: "https://facebook.com/lafranceinsoumise",
@@ -102,6 +103,48 @@ function renderArticles() {
     });
 }
 
+function mediaFromApi(m) {
+    const item = {type: m.type, title: m.title || '', description: m.description || ''};
+    if (m.type === 'video') item.video = m.url; else item.image = m.url;
+    return item;
+}
+
+// Fetch one page of /api/media; resolves to the items of that page
+function loadMedia(cursor) {
+    const url = '/api/media' + (cursor ? '?cursor=' + encodeURIComponent(cursor) : '');
+    return fetch(url).then(r => r.ok ? r.json() : {media: [], next_cursor: null}).then(data => {
+        // a static export serves the first page for every ?cursor=: treat a repeated cursor as the end
+        if (cursor && data.next_cursor === cursor) {
+            mediaCursor = null;
+            return [];
+        }
+        mediaCursor = data.next_cursor || null;
+        return Array.isArray(data.media) ? data.media.filter(m => m.url).map(mediaFromApi) : [];
+    });
+}
+
+function updateMediaMoreButton() {
+    const container = document.getElementById('media-container');
+    let more = document.getElementById('media-more');
+    if (!more && container) {
+        more = document.createElement('button');
+        more.id = 'media-more';
+        more.type = 'button';
+        more.className = 'admin-btn';
+        more.textContent = 'Voir plus de médias';
+        more.addEventListener('click', function () {
+            more.disabled = true;
+            loadMedia(mediaCursor).then(items => {
+                mediaItems = mediaItems.concat(items);
+                renderMedia();
+            }).catch(err => console.warn('Could not load more media:', err))
+              .finally(() => { more.disabled = false; updateMediaMoreButton(); });
+        });
+        container.insertAdjacentElement('afterend', more);
+    }
+    if (more) more.style.display = mediaCursor ? '' : 'none';
+}
+
 function renderMedia() {
     const container = document.getElementById('media-container');
     container.innerHTML = '';
@@ -261,35 +304,9 @@ document.addEventListener('DOMContentLoaded', function() {
             }));
         }
         renderArticles();
-        // Fetch media (photos + videos) from server so uploaded files show on public page
-        return Promise.all([
-            fetch('/api/photos').then(r => r.ok ? r.json() : {photos: []}).catch(() => ({photos: []})),
-            fetch('/api/videos').then(r => r.ok ? r.json() : {videos: []}).catch(() => ({videos: []}))
-        ]);
-    }).then(([photosResp, videosResp]) => {
-        const items = [];
-        if (photosResp && Array.isArray(photosResp.photos)){
-            photosResp.photos.forEach(p => {
-                if (!p.filename) return;
-                items.push({
-                    type: 'photo',
-                    title: p.title || '',
-                    description: p.description || '',
-                    image: '/static/uploads/photos/' + p.filename
-                });
-            });
-        }
-        if (videosResp && Array.isArray(videosResp.videos)){
-            videosResp.videos.forEach(v => {
-                if (!v.filename) return;
-                items.push({
-                    type: 'video',
-                    title: v.title || '',
-                    description: v.description || '',
-                    video: '/static/uploads/videos/' + v.filename
-                });
-            });
-        }
+        // First page of the gallery (photos and videos merged by the server, newest first)
+        return loadMedia(null).catch(() => []);
+    }).then(items => {
         // Fallback to existing static mediaItems only if server returned nothing
         if (items.length === 0) {
             // keep current static fallback (if any) - existing mediaItems variable already has fallback content removed
@@ -297,6 +314,7 @@ document.addEventListener('DOMContentLoaded', function() {
             mediaItems = items;
         }
         renderMedia();
+        updateMediaMoreButton();
         updateSocialLinks();
         animateOnScroll();
     }).catch(err => {
@@ -0,0 +1,46 @@
+"""Streaming JSON responses for list endpoints.
+
+`iter_rows` walks a cursor in ``fetchmany`` batches and `json_document` /
+`ndjson_lines` encode one row at a time, so the response body is produced
+while the client reads it and memory per request stays at one batch whatever
+the table size. `json_document` yields the same bytes as
+``jsonify({key: rows})`` with the compact (non-debug) app JSON settings;
+`ndjson_lines` yields one object per line (``application/x-ndjson``), which
+tools can consume without parsing the whole document.
+"""
+
+DEFAULT_BATCH_SIZE = 200
+NDJSON = 'application/x-ndjson'
+
+
+def iter_rows(cursor, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield each row of ``cursor`` as a dict."""
+    cursor.row_factory = None  # plain tuples, zipped below
+    names = [d[0] for d in cursor.description]
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        for row in rows:
+            yield dict(zip(names, row))
+
+
+def json_document(key, rows, dumps):
+    """Yield ``{"<key>":[row,...]}`` followed by a newline, row by row."""
+    yield '{' + dumps(key) + ':['
+    first = True
+    for row in rows:
+        yield dumps(row) if first else ',' + dumps(row)
+        first = False
+    yield ']}\n'
+
+
+def ndjson_lines(rows, dumps):
+    for row in rows:
+        yield dumps(row) + '\n'
+
+
+def wants_ndjson(accept_mimetypes, default=False) -> bool:
+    """True when the request's Accept header prefers NDJSON to JSON (ties go to ``default``)."""
+    offers = [NDJSON, 'application/json'] if default else ['application/json', NDJSON]
+    return accept_mimetypes.best_match(offers, default=offers[0]) == NDJSON
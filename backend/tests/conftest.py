@@ -0,0 +1,24 @@
+"""Shared pytest helpers for the backend tests."""
+
+import pytest
+
+from backend.db import QueryPlanRecorder
+
+
+@pytest.fixture
+def assert_no_table_scans():
+    """Return ``check(client, paths, ignore_tables=())``.
+
+    Requests every path with the given Flask test client while recording the
+    EXPLAIN QUERY PLAN of each SQL statement, and fails the test if any of them
+    reads a table with a full scan (tables in ``ignore_tables`` excepted).
+    """
+    def check(client, paths, ignore_tables=()):
+        for path in paths:
+            with QueryPlanRecorder() as rec:
+                client.get(path)
+            bad = rec.scans(ignore_tables)
+            if bad:
+                details = '\n'.join(f"  {q['sql']}\n    plan: {q['plan']}" for q in bad)
+                pytest.fail(f'{path} performs a table scan:\n{details}')
+    return check
@@ -0,0 +1,98 @@
+"""Microbenchmark harness with stored baselines.
+
+Each benchmark times a callable (best of several rounds) and divides the
+result by a calibration loop measured in the same session, so the stored
+baselines (baselines.json, in "calibration units") carry across machines of
+different speed. A benchmark fails when it is slower than its baseline by more
+than PERF_TOLERANCE (default 1.0, i.e. twice the baseline).
+
+  PERF_UPDATE_BASELINES=1 pytest backend/tests/perf   # rewrite baselines.json
+  PERF_SKIP=1 pytest                                  # skip the perf suite
+  PERF_IO=1 pytest backend/tests/perf                 # include the perf_io benchmarks
+
+Benchmarks marked ``perf_io`` (uploads, directory walks) mostly time the disk
+and page cache, which the CPU calibration loop cannot normalize away, so they
+only run with PERF_IO=1 and get their own PERF_IO_TOLERANCE (default 3.0).
+"""
+
+import json
+import os
+import time
+
+import pytest
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), 'baselines.json')
+TOLERANCE = float(os.getenv('PERF_TOLERANCE', '1.0'))
+IO_TOLERANCE = float(os.getenv('PERF_IO_TOLERANCE', '3.0'))
+UPDATE = os.getenv('PERF_UPDATE_BASELINES') == '1'
+
+
+def _calibration_loop():
+    total = 0
+    for i in range(200000):
+        total += i * i % 7
+    return total
+
+
+def _best_of(fn, rounds, inner):
+    best = float('inf')
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        for _ in range(inner):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / inner)
+    return best
+
+
+@pytest.fixture(scope='session')
+def calibration():
+    return _best_of(_calibration_loop, rounds=5, inner=1)
+
+
+@pytest.fixture(scope='session')
+def baselines():
+    try:
+        with open(BASELINES_PATH) as fh:
+            data = json.load(fh)
+    except FileNotFoundError:
+        data = {}
+    yield data
+    if UPDATE:
+        with open(BASELINES_PATH, 'w') as fh:
+            json.dump(dict(sorted(data.items())), fh, indent=2)
+            fh.write('\n')
+
+
+@pytest.fixture
+def benchmark(request, calibration, baselines):
+    """``benchmark(name, fn, rounds=5, inner=1)`` -> seconds per call.
+
+    Fails the test if the normalized time exceeds baseline * (1 + tolerance).
+    """
+    tolerance = IO_TOLERANCE if request.node.get_closest_marker('perf_io') else TOLERANCE
+
+    def run(name, fn, rounds=5, inner=1):
+        seconds = _best_of(fn, rounds, inner)
+        units = seconds / calibration
+        if UPDATE or name not in baselines:
+            baselines[name] = round(units, 4)
+            return seconds
+        limit = baselines[name] * (1 + tolerance)
+        assert units <= limit, (
+            f'{name} regressed: {units:.3f} calibration units vs baseline {baselines[name]:.3f} '
+            f'(limit {limit:.3f}, {seconds * 1000:.3f} ms per call)')
+        return seconds
+    return run
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.getenv('PERF_SKIP') == '1':
+        skip = pytest.mark.skip(reason='PERF_SKIP=1')
+        for item in items:
+            if 'tests/perf' in str(item.fspath).replace(os.sep, '/'):
+                item.add_marker(skip)
+    if os.getenv('PERF_IO') != '1':
+        skip_io = pytest.mark.skip(reason='disk-bound benchmark (PERF_IO=1 to run)')
+        for item in items:
+            if item.get_closest_marker('perf_io'):
+                item.add_marker(skip_io)
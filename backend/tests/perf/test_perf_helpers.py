@@ -0,0 +1,204 @@
+"""Microbenchmarks for hot helpers in backend/app.py.
+
+Timings are compared against baselines.json by the ``benchmark`` fixture in
+conftest.py; see there for the tolerance and how to refresh baselines.
+"""
+
+import importlib
+import os
+import sys
+import types
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+MB = 1024 * 1024
+
+
+def load_app(tmp_path):
+    os.environ['DB_PATH'] = str(tmp_path / 'perf.db')
+    sys.modules.pop('backend.app', None)
+    appmod = importlib.import_module('backend.app')
+    appmod.init_db()
+    appmod.UPLOAD_BASE = str(tmp_path / 'uploads')
+    appmod.PHOTO_DIR = os.path.join(appmod.UPLOAD_BASE, 'photos')
+    appmod.VIDEO_DIR = os.path.join(appmod.UPLOAD_BASE, 'videos')
+    return appmod
+
+
+class SyntheticStream:
+    """File-like object producing ``size`` bytes without holding them in memory."""
+
+    def __init__(self, size, fill=b'\x00'):
+        self.remaining = size
+        self.block = fill * (64 * 1024)
+
+    def read(self, n=-1):
+        if self.remaining <= 0:
+            return b''
+        if n < 0 or n > self.remaining:
+            n = self.remaining
+        self.remaining -= n
+        if n <= len(self.block):
+            return self.block[:n]
+        return (self.block * (n // len(self.block) + 1))[:n]
+
+
+@pytest.fixture
+def appmod(tmp_path):
+    return load_app(tmp_path)
+
+
+def test_is_rate_limited(appmod, benchmark):
+    appmod.RL_MAX_REQUESTS = 50
+    appmod._rl_buckets.clear()
+    keys = [f'10.0.{i // 256}.{i % 256}' for i in range(1000)]
+
+    def run():
+        for k in keys:
+            appmod.is_rate_limited(k)
+
+    benchmark('is_rate_limited_x1000', run, rounds=5, inner=3)
+
+
+def test_is_rate_limited_redis(appmod, benchmark):
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')
+    appmod._redis = fakeredis.FakeRedis()
+    appmod.RL_MAX_REQUESTS = 10 ** 6
+
+    def run():
+        for i in range(200):
+            appmod.is_rate_limited_redis(f'key{i % 20}')
+
+    assert appmod.is_rate_limited_redis('probe') is False
+    benchmark('is_rate_limited_redis_x200', run, rounds=5)
+
+
+def test_hash_token(appmod, benchmark):
+    tokens = [os.urandom(32).hex() for _ in range(1000)]
+
+    def run():
+        for t in tokens:
+            appmod.hash_token(t)
+
+    benchmark('hash_token_x1000', run, rounds=5, inner=3)
+
+
+@pytest.mark.perf_io
+@pytest.mark.parametrize('size_mb,filename', [(5, 'photo.jpg'), (150, 'clip.mp4')])
+def test_save_upload(appmod, benchmark, monkeypatch, size_mb, filename):
+    dest = appmod.VIDEO_DIR if filename.endswith('.mp4') else appmod.PHOTO_DIR
+    saved = []
+
+    def run():
+        storage = FileStorage(stream=SyntheticStream(size_mb * MB), filename=filename)
+        monkeypatch.setattr(appmod, 'request', types.SimpleNamespace(files={'file': storage}))
+        name, err = appmod.save_upload('file', dest)
+        assert err is None
+        path = os.path.join(dest, name)
+        saved.append(os.path.getsize(path))
+        os.remove(path)
+
+    benchmark(f'save_upload_{size_mb}mb', run, rounds=3 if size_mb > 10 else 5)
+    assert saved[0] == size_mb * MB
+
+
+@pytest.fixture(scope='session')
+def upload_tree(tmp_path_factory):
+    """An uploads directory holding 50k small files across 50 subdirectories."""
+    base = tmp_path_factory.mktemp('perf_uploads')
+    for d in range(50):
+        sub = base / f'd{d:02d}'
+        sub.mkdir()
+        for i in range(1000):
+            with open(sub / f'{i:04d}.jpg', 'wb') as fh:
+                fh.write(b'x' * 16)
+    return str(base)
+
+
+@pytest.mark.perf_io
+def test_get_total_upload_bytes_50k_files(appmod, benchmark, upload_tree):
+    appmod.UPLOAD_BASE = upload_tree
+    assert appmod.get_total_upload_bytes() == 50000 * 16
+    benchmark('get_total_upload_bytes_50k', appmod.get_total_upload_bytes, rounds=3)
+
+
+def test_list_row_serialization(appmod, benchmark):
+    conn = appmod.get_db()
+    with conn:
+        conn.executemany(
+            'INSERT INTO photos (filename, title, description, created_at) VALUES (?,?,?,?)',
+            [(f'{i:016x}.jpg', f'Photo {i}', 'description ' * 8, '2024-01-01T00:00:00') for i in range(1000)])
+
+    def run():
+        # the list endpoints' row path: tuples zipped into dicts, then encoded
+        with appmod.app.app_context():
+            appmod.jsonify({'photos': appmod.list_media(conn, 'photos')})
+
+    try:
+        benchmark('list_rows_to_json_x1000', run, rounds=5, inner=3)
+    finally:
+        conn.close()
+
+
+@pytest.mark.perf_io
+def test_reconcile_50k_files(appmod, benchmark, upload_tree):
+    from backend import reconcile
+    conn = appmod.get_db()
+    with conn:
+        conn.executemany('INSERT INTO photos (filename) VALUES (?)', [(f'{i:04d}.jpg',) for i in range(1000)])
+    subdirs = [f'd{d:02d}' for d in range(50)]
+
+    def run():
+        disk = reconcile.scan_disk(upload_tree, subdirs)
+        assert len(disk) == 50000
+        reconcile.db_references(conn)
+
+    benchmark('reconcile_scan_50k', run, rounds=3)
+    conn.close()
+
+
+def test_public_reads_file_vs_snapshot(appmod, benchmark):
+    from backend.snapshot import ReadSnapshot
+    conn = appmod.get_db()
+    with conn:
+        conn.executemany('INSERT INTO articles (title, content, created_at) VALUES (?,?,?)',
+                         [(f'Article {i}', 'text ' * 200, f'2024-01-01T00:00:{i % 60:02d}') for i in range(500)])
+        conn.executemany('INSERT INTO photos (filename, title) VALUES (?,?)', [(f'{i}.jpg', f'P{i}') for i in range(200)])
+    conn.close()
+    snap = ReadSnapshot(appmod.DB_PATH, check_interval=0)
+
+    def page_view(connect):
+        def run():
+            for _ in range(50):
+                c = connect()
+                c.row_factory = appmod.sqlite3.Row
+                appmod.load_site_meta(c)
+                appmod.query_articles(c, '', 1, 10)
+                appmod.list_media(c, 'photos')
+                c.close()
+        return run
+
+    benchmark('public_reads_file_x50', page_view(appmod.get_db), rounds=5)
+    benchmark('public_reads_snapshot_x50', page_view(snap.connect), rounds=5)
+    snap.close()
+
+
+def test_api_articles_per_page_100(appmod, benchmark):
+    conn = appmod.get_db()
+    with conn:
+        conn.executemany('INSERT INTO articles (title, author, content, created_at) VALUES (?,?,?,?)',
+                         [(f'Article {i}', 'bench', 'lorem ipsum ' * 80, f'2024-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}')
+                          for i in range(500)])
+    conn.close()
+    uncached = appmod.create_app({'READ_CACHE': False}).test_client()
+    cached = appmod.create_app().test_client()
+
+    def run(client):
+        def get():
+            assert client.get('/api/articles?per_page=100').status_code == 200
+        return get
+
+    benchmark('api_articles_per_page_100', run(uncached), rounds=5, inner=20)
+    benchmark('api_articles_per_page_100_cached', run(cached), rounds=5, inner=20)
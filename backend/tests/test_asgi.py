@@ -0,0 +1,117 @@
+import asyncio
+import importlib
+import json
+import os
+import sys
+import time
+
+
+def load_asgi(tmp_path):
+    os.environ['DB_PATH'] = str(tmp_path / 'asgi.db')
+    for name in ('backend.asgi', 'backend.app'):
+        sys.modules.pop(name, None)
+    appmod = importlib.import_module('backend.app')
+    appmod.init_db()
+    return appmod, importlib.import_module('backend.asgi')
+
+
+async def call(api, path, query=b'', method='GET', headers=()):
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query,
+             'headers': list(headers), 'server': ('testserver', 80), 'client': ('127.0.0.1', 1)}
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    await api(scope, receive, send)
+    body = sent[1]['body']
+    return sent[0]['status'], dict(sent[0]['headers']), json.loads(body) if body.startswith(b'{') else body
+
+
+def test_same_payloads_as_wsgi(tmp_path):
+    appmod, asgi = load_asgi(tmp_path)
+    conn = appmod.get_db()
+    with conn:
+        for i in range(15):
+            conn.execute('INSERT INTO articles (title, content, created_at) VALUES (?,?,?)',
+                         (f'Title {i}', 'body', f'2024-01-{i + 1:02d}'))
+        conn.execute("INSERT INTO photos (filename, title) VALUES ('a.jpg', 'A')")
+    conn.close()
+    flask_app = appmod.create_app()
+    client = flask_app.test_client()
+    api = asgi.AsyncReadAPI(flask_app)
+
+    async def run():
+        return await asyncio.gather(
+            call(api, '/api/articles', b'page=2&per_page=5&q=Title'),
+            call(api, '/api/photos'), call(api, '/api/site'), call(api, '/api/me'),
+            call(api, '/api/articles', method='POST'), call(api, '/nope'))
+
+    articles, photos, site, me, post, missing = asyncio.run(run())
+    api.close()
+    assert articles[1][b'content-type'] == b'application/json'
+    assert articles[2] == client.get('/api/articles?page=2&per_page=5&q=Title').get_json()
+    assert [a['title'] for a in articles[2]['articles']] == [f'Title {i}' for i in range(9, 4, -1)]
+    assert photos[2] == client.get('/api/photos').get_json()
+    assert site[2] == client.get('/api/site').get_json()
+    assert me[2] == {'user': None}
+    assert post[0] == 405 and missing[0] == 404
+
+
+def test_session_user_and_concurrency_limit(tmp_path):
+    appmod, asgi = load_asgi(tmp_path)
+    conn = appmod.get_db()
+    with conn:
+        conn.execute("INSERT INTO users (email, role) VALUES ('ed@x.test', 'editor')")
+    conn.close()
+    flask_app = appmod.create_app({'SESSION_BACKEND': 'sqlite'})
+    client = flask_app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+    name = flask_app.config['SESSION_COOKIE_NAME']
+    cookie = f'{name}={client.get_cookie(name).value}'.encode()
+    api = asgi.AsyncReadAPI(flask_app, db_threads=1, max_concurrency=1, queue_timeout=0.05)
+
+    def slow_disk(sql, params, seconds, conn):
+        time.sleep(0.2)
+
+    async def run():
+        me = await call(api, '/api/me', headers=[(b'cookie', cookie)])
+        appmod._dblib.add_query_hook(slow_disk, 'test.slow')
+        try:
+            return me, await asyncio.gather(call(api, '/api/site'), call(api, '/api/site'))
+        finally:
+            appmod._dblib.remove_query_hook('test.slow')
+
+    me, (first, second) = asyncio.run(run())
+    api.close()
+    assert me[2] == {'user': {'id': 1, 'email': 'ed@x.test', 'role': 'editor'}}
+    assert sorted([first[0], second[0]]) == [200, 503]
+    busy = first if first[0] == 503 else second
+    assert busy[1][b'retry-after'] == b'1'
+
+
+def test_articles_and_index_share_the_read_cache(tmp_path):
+    appmod, asgi = load_asgi(tmp_path)
+    api = asgi.AsyncReadAPI(appmod.create_app())
+
+    async def run():
+        return await asyncio.gather(*[call(api, '/api/articles') for _ in range(4)], call(api, '/'), call(api, '/'))
+
+    *lists, index1, index2 = asyncio.run(run())
+    assert [r[2]['total'] for r in lists] == [0] * 4
+    assert index1[0] == 200 and index1[2] == index2[2]
+    stats = appmod._read_cache.stats()
+    assert stats['miss'] == 2 and stats['hit'] + stats['coalesced'] == 4
+
+    conn = appmod.get_db()
+    with conn:
+        conn.execute("INSERT INTO articles (title, content) VALUES ('New', 'text')")
+        appmod.content_changed(conn)
+    conn.close()
+    appmod.invalidation_committed('content')
+    assert asyncio.run(call(api, '/api/articles'))[2]['total'] == 1
+    api.close()
@@ -0,0 +1,61 @@
+import os
+import sqlite3
+
+from backend import backup, manage
+
+
+def make_db(path, rows=2000):
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY, payload TEXT)')
+    conn.executemany('INSERT INTO t (payload) VALUES (?)', [('x' * 200,)] * rows)
+    conn.commit()
+    return conn
+
+
+def test_online_backup_is_consistent_while_writer_is_connected(tmp_path):
+    db = tmp_path / 'live.db'
+    writer = make_db(db)
+    writer.execute('INSERT INTO t (payload) VALUES (?)', ('uncommitted',))  # open write transaction
+    stats = backup.backup_db(str(db), str(tmp_path / 'copy.db'), pages=8, pause=0)
+    writer.commit()
+    writer.close()
+    assert stats['steps'] > 1 and stats['bytes'] > 0
+    copy = sqlite3.connect(tmp_path / 'copy.db')
+    assert copy.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 2000
+    assert not os.path.exists(str(tmp_path / 'copy.db') + '.partial')
+
+
+def test_upload_snapshots_are_incremental_and_restorable(tmp_path):
+    uploads = tmp_path / 'uploads'
+    (uploads / 'photos').mkdir(parents=True)
+    (uploads / 'photos' / 'a.jpg').write_bytes(b'a' * 1000)
+    (uploads / 'photos' / 'b.jpg').write_bytes(b'b' * 1000)
+    dest = str(tmp_path / 'backups')
+    first = backup.snapshot_uploads(str(uploads), dest)
+    assert (first['files'], first['files_copied']) == (2, 2)
+    (uploads / 'photos' / 'c.jpg').write_bytes(b'c' * 500)
+    second = backup.snapshot_uploads(str(uploads), dest)
+    assert (second['files'], second['files_hashed'], second['files_copied'], second['bytes_copied']) == (3, 1, 1, 500)
+
+    target = tmp_path / 'restored'
+    res = backup.restore_uploads(dest, first['manifest'], str(target))
+    assert res['files_restored'] == 2
+    assert (target / 'photos' / 'b.jpg').read_bytes() == b'b' * 1000
+    assert not (target / 'photos' / 'c.jpg').exists()
+    again = backup.restore_uploads(dest, second['manifest'], str(target))
+    assert (again['files_restored'], again['files_skipped']) == (1, 2)
+
+
+def test_manage_backup_records_throughput(tmp_path, capsys):
+    db = tmp_path / 'app.db'
+    make_db(db, rows=10).close()
+    uploads = tmp_path / 'uploads'
+    uploads.mkdir()
+    (uploads / 'v.mp4').write_bytes(b'v' * 100)
+    dest = str(tmp_path / 'backups')
+    assert manage.main(['--db', str(db), 'backup', 'create', '--dest', dest, '--uploads', str(uploads)]) == 0
+    history = backup.read_history(dest)
+    assert [h['kind'] for h in history] == ['db', 'uploads']
+    assert all('seconds' in h and 'mb_per_s' in h for h in history)
+    assert manage.main(['backup', 'list', '--dest', dest]) == 0
+    assert 'Uploads snapshot' in capsys.readouterr().out
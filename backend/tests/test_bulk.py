@@ -0,0 +1,73 @@
+import importlib
+import json
+import sys
+
+
+def load_app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DB_PATH', str(tmp_path / 'bulk.db'))
+    sys.modules.pop('backend.app', None)
+    appmod = importlib.import_module('backend.app')
+    appmod.init_db()
+    return appmod
+
+
+def admin_client(appmod):
+    conn = appmod.get_db()
+    uid = conn.execute("INSERT INTO users (email, role) VALUES ('a@x.test', 'admin')").lastrowid
+    conn.commit()
+    conn.close()
+    client = appmod.create_app({'TESTING': True}).test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = uid
+        sess['csrf_token'] = 'tok'
+    return client
+
+
+def test_import_reports_bad_lines_and_export_streams(tmp_path, monkeypatch):
+    appmod = load_app(tmp_path, monkeypatch)
+    client = admin_client(appmod)
+    body = '\n'.join([
+        json.dumps({'title': 'one', 'content': 'c', 'created_at': '2024-01-01 10:00:00'}),
+        '{not json',
+        json.dumps({'title': ''}),
+        '',
+        json.dumps({'title': 'two', 'image': 'javascript:alert(1)'}),
+        json.dumps({'title': 'three', 'author': 'me'}),
+        json.dumps({'title': 'four', 'created_at': 'yesterday'}),
+    ])
+    headers = {'X-CSRF-Token': 'tok', 'Content-Type': 'application/x-ndjson'}
+    r = client.post('/api/admin/articles/import?dry_run=1', data=body, headers=headers)
+    assert r.get_json()['valid'] == 2 and r.get_json()['imported'] == 0
+    version = appmod.get_cache_version(appmod.get_db(), 'content')
+
+    r = client.post('/api/admin/articles/import?batch_size=1', data=body, headers=headers)
+    report = r.get_json()
+    assert r.status_code == 200
+    assert (report['lines'], report['imported'], report['error_count']) == (6, 2, 4)
+    assert [e['line'] for e in report['errors']] == [2, 3, 5, 7]
+    assert report['errors'][1]['error'] == 'title required'
+    assert appmod.get_cache_version(appmod.get_db(), 'content') == version + 2
+
+    r = client.get('/api/admin/articles/export')
+    assert r.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in r.get_data(as_text=True).splitlines()]
+    assert [(a['title'], a['created_at']) for a in rows][0] == ('one', '2024-01-01 10:00:00')
+    assert [a['author'] for a in rows] == ['', 'me']
+
+    anon = appmod.create_app({'TESTING': True}).test_client()
+    assert anon.get('/api/admin/articles/export').status_code == 401
+    sys.modules.pop('backend.app', None)
+
+
+def test_cli_round_trip(tmp_path, monkeypatch, capsys):
+    load_app(tmp_path, monkeypatch)
+    from backend import manage
+    db = str(tmp_path / 'bulk.db')
+    src = tmp_path / 'in.jsonl'
+    src.write_text(json.dumps({'title': 'a'}) + '\n' + json.dumps({'title': 'b' * 300}) + '\n', encoding='utf-8')
+    assert manage.main(['--db', db, 'articles', 'import', str(src)]) == 1
+    assert 'line 2: Input too long' in capsys.readouterr().out
+    out = tmp_path / 'out.jsonl'
+    assert manage.main(['--db', db, 'articles', 'export', '--out', str(out)]) == 0
+    assert [json.loads(line)['title'] for line in out.read_text(encoding='utf-8').splitlines()] == ['a']
+    sys.modules.pop('backend.app', None)
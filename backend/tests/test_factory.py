@@ -0,0 +1,29 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+
+def test_importing_the_app_module_stays_light(tmp_path):
+    code = ('import json, sys, backend.app as m; '
+            'print(json.dumps({k: k in sys.modules for k in ("smtplib", "redis")} | {"app": "app" in vars(m)}))')
+    env = dict(os.environ, DB_PATH=str(tmp_path / 'x.db'), REDIS_URL='redis://127.0.0.1:1/0')
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    assert json.loads(out.stdout) == {'smtplib': False, 'redis': False, 'app': False}
+
+
+def test_create_app_builds_independent_apps(tmp_path, monkeypatch):
+    monkeypatch.setenv('DB_PATH', str(tmp_path / 'f.db'))
+    sys.modules.pop('backend.app', None)
+    import importlib
+    appmod = importlib.import_module('backend.app')
+    appmod.init_db()
+    a = appmod.create_app({'TESTING': True, 'SESSION_BACKEND': 'sqlite'})
+    b = appmod.create_app()
+    assert a is not b and a.config['TESTING'] and not b.config.get('TESTING')
+    assert type(a.session_interface).__name__ == 'ServerSideSessionInterface'
+    assert a.test_client().get('/api/articles').status_code == 200
+    assert {r.endpoint for r in a.url_map.iter_rules()} == {r.endpoint for r in b.url_map.iter_rules()}
+    assert 'api_get_articles' in {r.endpoint for r in a.url_map.iter_rules()}
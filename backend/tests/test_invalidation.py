@@ -0,0 +1,111 @@
+import importlib
+import sqlite3
+import sys
+import time
+
+import fakeredis
+
+from backend import invalidation
+
+
+def load_app(tmp_path, monkeypatch, check='0'):
+    monkeypatch.setenv('DB_PATH', str(tmp_path / 'inval.db'))
+    monkeypatch.setenv('INVALIDATION_CHECK', check)
+    sys.modules.pop('backend.app', None)
+    appmod = importlib.import_module('backend.app')
+    appmod.init_db()
+    return appmod
+
+
+def set_title(db_path, title, bump=True):
+    """Write site_meta from another connection, as another worker or `manage` would."""
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO site_meta (key, value) VALUES ('site_title', ?)", (title,))
+        if bump:
+            invalidation.SQLiteTransport(db_path).stage(conn, ['site'])
+    conn.close()
+
+
+def test_sqlite_transport_drops_site_meta_written_elsewhere(tmp_path, monkeypatch):
+    appmod = load_app(tmp_path, monkeypatch)
+    db_path = str(tmp_path / 'inval.db')
+    client = appmod.create_app().test_client()
+    set_title(db_path, 'Before')
+    assert client.get('/api/site').get_json()['site_title'] == 'Before'
+
+    # served from the worker's cache until the 'site' tag moves
+    set_title(db_path, 'Unannounced', bump=False)
+    assert client.get('/api/site').get_json()['site_title'] == 'Before'
+    set_title(db_path, 'After')
+    assert client.get('/api/site').get_json()['site_title'] == 'After'
+
+    bus = appmod.get_invalidation_bus()
+    assert bus.stats()['transport'] == 'sqlite'
+    assert bus.drops >= 1
+    sys.modules.pop('backend.app', None)
+
+
+def test_local_caches_are_dropped_after_the_commit(tmp_path, monkeypatch):
+    appmod = load_app(tmp_path, monkeypatch, check='60')  # no poll to hide a stale entry
+    client = appmod.create_app().test_client()
+    assert client.get('/api/articles').get_json()['total'] == 0
+
+    conn = appmod.get_db()
+    conn.execute("INSERT INTO articles (title, content) VALUES ('New', 'text')")
+    appmod.content_changed(conn)
+    # a read between the invalidation and the commit still sees (and caches) the old rows
+    assert client.get('/api/articles').get_json()['total'] == 0
+    conn.commit()
+    conn.close()
+    appmod.invalidation_committed('content')
+    assert client.get('/api/articles').get_json()['total'] == 1
+    sys.modules.pop('backend.app', None)
+
+
+def test_redis_transport_delivers_tags_between_workers(tmp_path):
+    db_path = str(tmp_path / 'bus.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE cache_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)')
+    conn.close()
+    server = fakeredis.FakeServer()
+
+    def worker():
+        transport = invalidation.RedisTransport(fakeredis.FakeStrictRedis(server=server),
+                                                invalidation.SQLiteTransport(db_path), fallback_interval=3600)
+        bus = invalidation.InvalidationBus(transport)
+        return bus, bus.cache('roles'), bus.cache('site_meta', tags=('site',))
+
+    writer, _, _ = worker()
+    reader, roles, site = worker()
+    reader.poll()
+    deadline = time.monotonic() + 5
+    while not reader.transport.connected and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert reader.transport.connected
+    roles.set(1, 'admin')
+    site.set('all', {'site_title': 'x'})
+
+    conn = sqlite3.connect(db_path)
+    with conn:
+        writer.invalidate(conn, 'roles')
+    conn.close()
+    writer.committed('roles')
+    while reader.transport.received == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    reader.poll()
+    assert len(roles) == 0 and len(site) == 1
+
+    # Redis unreachable: the version rows still get the change across
+    server.connected = False
+    reader.transport.connected = False
+    site.set('all', {'site_title': 'x'})
+    conn = sqlite3.connect(db_path)
+    with conn:
+        writer.invalidate(conn, 'site')
+    conn.close()
+    writer.committed('site')  # logged, not raised
+    reader.poll()
+    assert len(site) == 0
+    writer.close()
+    reader.close()
@@ -0,0 +1,49 @@
+import importlib
+import json
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from flask.json.provider import DefaultJSONProvider
+
+from backend import json_provider
+
+
+def load_app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DB_PATH', str(tmp_path / 'json.db'))
+    sys.modules.pop('backend.app', None)
+    appmod = importlib.import_module('backend.app')
+    appmod.init_db()
+    return appmod
+
+
+@pytest.mark.skipif(json_provider.orjson is None, reason='orjson not installed')
+def test_orjson_provider_matches_stdlib(tmp_path, monkeypatch):
+    appmod = load_app(tmp_path, monkeypatch)
+    fast = appmod.create_app()
+    slow = appmod.create_app({'JSON_PROVIDER': 'stdlib'})
+    assert isinstance(fast.json, json_provider.OrjsonProvider)
+    assert type(slow.json) is DefaultJSONProvider
+
+    obj = {'b': [1, 2.5, None, True], 'a': 'réunion', 'c': date(2024, 5, 1), 'd': Decimal('1.10'),
+           'when': datetime(2024, 5, 1, 12, 30)}
+    with fast.app_context():
+        fast_body = fast.json.response(obj).get_data()
+    with slow.app_context():
+        slow_body = slow.json.response(obj).get_data()
+    assert json.loads(fast_body) == json.loads(slow_body)
+    assert fast_body.startswith(b'{"a":"r\xc3\xa9union","b":[1,2.5,null,true],"c":"Wed, 01 May 2024 00:00:00 GMT"')
+    assert fast.json.loads(fast.json.dumps(obj, indent=2)) == json.loads(slow_body)
+
+    conn = appmod.get_db()
+    with conn:
+        conn.executemany('INSERT INTO articles (title, content, created_at) VALUES (?,?,?)',
+                         [(f'A{i}', 'text', f'2024-01-{i + 1:02d}') for i in range(20)])
+    conn.close()
+    fast_page = fast.test_client().get('/api/articles?per_page=100')
+    slow_page = slow.test_client().get('/api/articles?per_page=100')
+    assert fast_page.get_json() == slow_page.get_json()
+    assert fast_page.get_json()['articles'][0] == {'id': 20, 'title': 'A19', 'author': None, 'content': 'text',
+                                                   'image': None, 'video': None, 'created_at': '2024-01-20'}
+    sys.modules.pop('backend.app', None)
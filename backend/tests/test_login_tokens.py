@@ -0,0 +1,89 @@
+import os
+import sys
+import importlib
+import time
+
+
+def load_app(tmp_path):
+    db = tmp_path / "test.db"
+    os.environ['DB_PATH'] = str(db)
+    if 'backend.app' in sys.modules:
+        del sys.modules['backend.app']
+    import backend.app as appmod
+    importlib.reload(appmod)
+    appmod.init_db()
+    return appmod
+
+
+def insert_token(conn, th, used=0, expires=None):
+    expires = expires or int(time.time()) + 7200
+    conn.execute('INSERT INTO login_tokens (user_id, token_hash, expires_at, used) VALUES (?,?,?,?)', (1, th, expires, used))
+    conn.commit()
+
+
+def test_token_hash_lookup_uses_index(tmp_path):
+    appmod = load_app(tmp_path)
+    conn = appmod.get_db()
+    cur = conn.cursor()
+    cur.execute('EXPLAIN QUERY PLAN SELECT id FROM login_tokens WHERE token_hash=?', ('x',))
+    plan = ' '.join(r[3] for r in cur.fetchall())
+    conn.close()
+    assert 'idx_login_tokens_token_hash' in plan
+
+
+def test_purge_login_tokens_removes_used_and_expired(tmp_path):
+    appmod = load_app(tmp_path)
+    conn = appmod.get_db()
+    past = int(time.time()) - 3600
+    insert_token(conn, 'live')
+    insert_token(conn, 'used', used=1)
+    insert_token(conn, 'expired', expires=past)
+    for i in range(5):
+        insert_token(conn, f'used{i}', used=1)
+    # bounded: a single small batch only removes part of the backlog
+    assert appmod.purge_login_tokens(conn, batch_size=2, max_batches=1) == 3
+    appmod.purge_login_tokens(conn, batch_size=2, max_batches=None)
+    cur = conn.cursor()
+    cur.execute('SELECT token_hash FROM login_tokens')
+    assert [r[0] for r in cur.fetchall()] == ['live']
+    conn.close()
+
+
+def test_consume_login_token_is_single_use(tmp_path):
+    appmod = load_app(tmp_path)
+    conn = appmod.get_db()
+    insert_token(conn, appmod.hash_token('tok'))
+    assert appmod.consume_login_token(conn, appmod.hash_token('tok')) == 1
+    assert appmod.consume_login_token(conn, appmod.hash_token('tok')) is None
+    conn.close()
+
+
+def test_consume_login_token_rejects_expired(tmp_path):
+    appmod = load_app(tmp_path)
+    conn = appmod.get_db()
+    insert_token(conn, appmod.hash_token('old'), expires=int(time.time()) - 1)
+    assert appmod.consume_login_token(conn, appmod.hash_token('old')) is None
+    conn.close()
+
+
+def test_consume_login_token_without_returning(tmp_path, monkeypatch):
+    appmod = load_app(tmp_path)
+    monkeypatch.setattr(appmod, '_SQLITE_HAS_RETURNING', False)
+    conn = appmod.get_db()
+    insert_token(conn, appmod.hash_token('tok'))
+    assert appmod.consume_login_token(conn, appmod.hash_token('tok')) == 1
+    assert appmod.consume_login_token(conn, appmod.hash_token('tok')) is None
+    conn.close()
+
+
+def test_magic_link_flow_logs_in_once(tmp_path, monkeypatch):
+    appmod = load_app(tmp_path)
+    sent = {}
+    monkeypatch.setattr(appmod, 'send_magic_link', lambda email, uid, token: sent.update(uid=uid, token=token) or True)
+    client = appmod.app.test_client()
+    client.post('/auth/request-token', json={'email': 'e@example.test'})
+    url = f"/auth/consume?token={sent['token']}&uid={sent['uid']}"
+    r = client.get(url)
+    assert r.headers['Location'].endswith('/admin/manage')
+    r = client.get(url)
+    assert r.headers['Location'].endswith('/admin/request')
@@ -0,0 +1,67 @@
+import io
+import os
+import sys
+import importlib
+
+
+def load_app(tmp_path):
+    db = tmp_path / "test.db"
+    os.environ['DB_PATH'] = str(db)
+    if 'backend.app' in sys.modules:
+        del sys.modules['backend.app']
+    import backend.app as appmod
+    importlib.reload(appmod)
+    appmod.init_db()
+    return appmod
+
+
+def test_import_is_all_or_nothing_and_exports(tmp_path):
+    load_app(tmp_path)
+    from backend import manage
+    conn = manage.connect(os.environ['DB_PATH'])
+    bad = [{'email': 'a@x.test', 'role': 'admin'}, {'email': 'nope', 'role': 'editor'}]
+    res = manage.import_users(conn, bad)
+    assert res['imported'] == 0 and len(res['errors']) == 1
+    res = manage.import_users(conn, [{'email': 'A@x.test', 'role': 'admin'}, {'email': 'b@x.test'}])
+    assert res == {'imported': 2, 'errors': []}
+    res = manage.import_users(conn, [{'email': 'b@x.test', 'role': 'admin'}], update=True)
+    assert res == {'imported': 1, 'errors': []}  # the 'roles' version bump is not a user
+    out = io.StringIO()
+    assert manage.export_users(conn, out, 'csv') == 2
+    assert out.getvalue().splitlines()[1].startswith('a@x.test,admin,')
+    conn.close()
+
+
+def test_set_role_invalidates_cached_roles(tmp_path, monkeypatch):
+    appmod = load_app(tmp_path)
+    monkeypatch.setattr(appmod, 'ROLE_CACHE_CHECK', 0)
+    from backend import manage
+    conn = manage.connect(os.environ['DB_PATH'])
+    manage.import_users(conn, [{'email': 'e@x.test', 'role': 'editor'}])
+    uid = conn.execute('SELECT id FROM users').fetchone()[0]
+    app_conn = appmod.get_db()
+    assert appmod.get_user_role(app_conn, uid) == 'editor'
+    assert manage.set_role(conn, 'e@x.test', 'admin')
+    assert appmod.get_user_role(app_conn, uid) == 'admin'
+    app_conn.close()
+    conn.close()
+
+
+def test_prune_only_removes_never_logged_in_editors(tmp_path):
+    load_app(tmp_path)
+    from backend import manage
+    conn = manage.connect(os.environ['DB_PATH'])
+    old = '2020-01-01T00:00:00'
+    conn.executemany('INSERT INTO users (email, role, created_at, last_login_at) VALUES (?,?,?,?)', [
+        ('spam1@x.test', 'editor', old, None),
+        ('spam2@x.test', 'editor', old, None),
+        ('real@x.test', 'editor', old, old),
+        ('admin@x.test', 'admin', old, None),
+        ('new@x.test', 'editor', '2999-01-01T00:00:00', None),
+    ])
+    conn.commit()
+    assert manage.count_prunable(conn, '2021-01-01T00:00:00') == 2
+    assert manage.prune_users(conn, '2021-01-01T00:00:00', batch_size=1, pause=0) == 2
+    left = {r[0] for r in conn.execute('SELECT email FROM users')}
+    assert left == {'real@x.test', 'admin@x.test', 'new@x.test'}
+    conn.close()
@@ -0,0 +1,45 @@
+import importlib
+import sys
+
+
+def load_app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DB_PATH', str(tmp_path / 'media.db'))
+    sys.modules.pop('backend.app', None)
+    appmod = importlib.import_module('backend.app')
+    appmod.init_db()
+    return appmod
+
+
+def test_media_pages_interleave_photos_and_videos(tmp_path, monkeypatch, assert_no_table_scans):
+    appmod = load_app(tmp_path, monkeypatch)
+    conn = appmod.get_db()
+    with conn:
+        conn.executemany('INSERT INTO photos (filename, title, created_at) VALUES (?,?,?)',
+                         [(f'p{i}.jpg', f'P{i}', f'2024-01-{i + 1:02d}') for i in range(7)])
+        conn.executemany('INSERT INTO videos (filename, title, created_at) VALUES (?,?,?)',
+                         [(f'v{i}.mp4', f'V{i}', f'2024-01-{2 * i + 1:02d}') for i in range(4)])
+    conn.close()
+    client = appmod.create_app().test_client()
+
+    expected = ['P6', 'V3', 'P5', 'P4', 'V2', 'P3', 'P2', 'V1', 'P1', 'V0', 'P0']
+    for limit in (1, 3, 5, 100):
+        seen, cursor = [], None
+        while True:
+            r = client.get(f'/api/media?limit={limit}' + (f'&cursor={cursor}' if cursor else ''))
+            assert r.status_code == 200
+            page = r.get_json()
+            assert len(page['media']) <= limit
+            seen.extend(page['media'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        # V0 and P0 share created_at and id: the video comes first, even across a page boundary
+        assert [m['title'] for m in seen] == expected
+    assert seen[1] == {'type': 'video', 'id': 4, 'title': 'V3', 'description': None,
+                       'created_at': '2024-01-07', 'url': '/static/uploads/videos/v3.mp4'}
+    assert seen[0]['url'] == '/static/uploads/photos/p6.jpg'
+
+    assert client.get('/api/media?cursor=bogus').status_code == 400
+    first = client.get('/api/media?limit=2').get_json()['next_cursor']
+    assert_no_table_scans(client, ['/api/media', f'/api/media?cursor={first}'])
+    sys.modules.pop('backend.app', None)
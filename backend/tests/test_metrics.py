@@ -0,0 +1,65 @@
+import os
+import sys
+import importlib
+from datetime import datetime
+
+from backend import metrics
+
+
+def load_app(tmp_path):
+    db = tmp_path / "test.db"
+    os.environ['DB_PATH'] = str(db)
+    if 'backend.app' in sys.modules:
+        del sys.modules['backend.app']
+    import backend.app as appmod
+    importlib.reload(appmod)
+    appmod.init_db()
+    metrics.registry.reset()
+    return appmod
+
+
+def login_admin(client, appmod):
+    conn = appmod.get_db()
+    cur = conn.cursor()
+    cur.execute("INSERT INTO users (email, role, created_at) VALUES (?,?,?)", ("admin@example.test", 'admin', datetime.utcnow().isoformat()))
+    conn.commit()
+    conn.close()
+    with client.session_transaction() as sess:
+        sess['user_id'] = cur.lastrowid
+        sess['csrf_token'] = 'testcsrf'
+
+
+def test_metrics_requires_admin(tmp_path):
+    appmod = load_app(tmp_path)
+    client = appmod.app.test_client()
+    assert client.get('/metrics').status_code == 401
+
+
+def test_metrics_reports_requests_and_sql(tmp_path):
+    appmod = load_app(tmp_path)
+    client = appmod.app.test_client()
+    login_admin(client, appmod)
+    client.get('/api/articles')
+    client.get('/api/articles?q=x')
+    body = client.get('/metrics').get_data(as_text=True)
+    assert '# TYPE lfiweb_http_requests_total counter' in body
+    assert 'lfiweb_http_requests_total{endpoint="api_get_articles",method="GET",status="200"} 2' in body
+    assert 'lfiweb_sql_queries_total{endpoint="api_get_articles"} 4' in body
+    assert 'lfiweb_http_request_duration_seconds_bucket{endpoint="api_get_articles",le="+Inf"} 2' in body
+    # the scrape itself is in flight while rendering
+    assert 'lfiweb_http_requests_in_flight 1' in body
+
+
+def test_metrics_token_and_multiprocess_merge(tmp_path, monkeypatch):
+    appmod = load_app(tmp_path)
+    mdir = tmp_path / 'metrics'
+    monkeypatch.setattr(appmod, 'METRICS_DIR', str(mdir))
+    monkeypatch.setattr(appmod, 'METRICS_TOKEN', 'scrape')
+    other = metrics.Registry()
+    other.inc('lfiweb_http_requests_total', {'endpoint': 'index', 'method': 'GET', 'status': '200'}, 5)
+    other.flush(str(mdir))
+    os.rename(mdir / f'metrics-{os.getpid()}.json', mdir / 'metrics-999999999.json')
+    client = appmod.app.test_client()
+    client.get('/')
+    body = client.get('/metrics', headers={'Authorization': 'Bearer scrape'}).get_data(as_text=True)
+    assert 'lfiweb_http_requests_total{endpoint="index",method="GET",status="200"} 6' in body
@@ -0,0 +1,81 @@
+import sqlite3
+
+from backend import migrations, manage
+
+LEGACY_SCHEMA = '''
+CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT NOT NULL UNIQUE,
+  role TEXT NOT NULL DEFAULT 'editor', created_at DATETIME DEFAULT CURRENT_TIMESTAMP);
+CREATE TABLE login_tokens (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, token_hash TEXT NOT NULL,
+  expires_at DATETIME NOT NULL, used INTEGER NOT NULL DEFAULT 0, created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  ip TEXT, user_agent TEXT);
+CREATE TABLE articles (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, author TEXT, content TEXT,
+  image TEXT, created_at DATETIME DEFAULT CURRENT_TIMESTAMP);
+'''
+
+
+def legacy_db(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.execute("INSERT INTO users (email) VALUES ('a@x.test')")
+    rows = [(1, f'h{i}', '2030-01-01T00:00:00', 1, f'2024-01-{1 + i % 28:02d}') for i in range(25)]
+    rows.append((1, 'bad', 'not a date', 0, '2024-01-01'))
+    conn.executemany('INSERT INTO login_tokens (user_id, token_hash, expires_at, used, created_at) VALUES (?,?,?,?,?)', rows)
+    conn.commit()
+    return conn
+
+
+def test_fresh_db_records_every_version(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'fresh.db')
+    applied = migrations.migrate(conn)
+    assert [m.version for m in applied] == [m.version for m in migrations.discover()]
+    assert migrations.pending(conn) == []
+    assert migrations.migrate(conn) == []
+    names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    assert {'idx_login_tokens_token_hash', 'idx_articles_created_at'} <= names
+
+
+def test_legacy_db_upgrades_with_batched_backfills(tmp_path):
+    conn = legacy_db(tmp_path / 'legacy.db')
+    log = []
+    migrations.migrate(conn, batch_size=10, log=log.append)
+    assert any('backfilled 20 rows' in line for line in log)
+    assert 'video' in {r[1] for r in conn.execute('PRAGMA table_info(articles)')}
+    types = {r[0] for r in conn.execute('SELECT typeof(expires_at) FROM login_tokens')}
+    assert types == {'integer'}
+    assert conn.execute("SELECT used, expires_at FROM login_tokens WHERE token_hash='bad'").fetchone() == (1, 0)
+    assert conn.execute('SELECT last_login_at FROM users').fetchone()[0] == '2024-01-25'
+
+
+def test_backfill_skips_used_tokens_without_created_at(tmp_path):
+    conn = legacy_db(tmp_path / 'legacy.db')
+    conn.execute("INSERT INTO users (email) VALUES ('b@x.test')")
+    conn.execute("INSERT INTO login_tokens (user_id, token_hash, expires_at, used, created_at) "
+                 "VALUES (2, 'old', '2030-01-01T00:00:00', 1, NULL)")
+    conn.commit()
+    migrations.migrate(conn, batch_size=10)
+    assert conn.execute('SELECT last_login_at FROM users ORDER BY id').fetchall() == [('2024-01-25',), (None,)]
+
+
+def test_dry_run_prints_plan_and_changes_nothing(tmp_path, capsys):
+    db = tmp_path / 'legacy.db'
+    legacy_db(db).close()
+    assert manage.main(['--db', str(db), 'migrate', '--dry-run', '--batch-size', '5']) == 0
+    out = capsys.readouterr().out
+    assert 'current version 0' in out and 'backfill ~26 rows in batches of 5' in out
+    conn = sqlite3.connect(db)
+    assert migrations.applied_versions(conn) == {}
+    assert 'video' not in {r[1] for r in conn.execute('PRAGMA table_info(articles)')}
+
+
+def test_failed_migration_rolls_back(tmp_path, monkeypatch):
+    conn = sqlite3.connect(tmp_path / 'fresh.db')
+    mig = next(m for m in migrations.discover() if m.name == 'content_created_at_indexes')
+    monkeypatch.setattr(mig.module, 'STATEMENTS', mig.module.STATEMENTS + ['CREATE INDEX broken ON nope(x)'])
+    try:
+        migrations.migrate(conn)
+    except migrations.MigrationError:
+        pass
+    else:
+        raise AssertionError('expected MigrationError')
+    assert mig.version not in migrations.applied_versions(conn)
+    assert conn.execute("SELECT 1 FROM sqlite_master WHERE name='idx_articles_created_at'").fetchone() is None
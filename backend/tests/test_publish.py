@@ -0,0 +1,93 @@
+import importlib
+import json
+import os
+import sys
+import time
+
+from backend import publish
+
+
+def load_app(tmp_path, monkeypatch, **env):
+    monkeypatch.setenv('DB_PATH', str(tmp_path / 'pub.db'))
+    for k, v in env.items():
+        monkeypatch.setenv(k, v)
+    sys.modules.pop('backend.app', None)
+    appmod = importlib.import_module('backend.app')
+    appmod.init_db()
+    appmod.UPLOAD_BASE = str(tmp_path / 'uploads')
+    return appmod
+
+
+def add_articles(appmod, n, start=0):
+    conn = appmod.get_db()
+    with conn:
+        conn.executemany('INSERT INTO articles (title, content, created_at) VALUES (?,?,?)',
+                         [(f'A{i}', 'text', f'2024-01-{i + 1:02d}') for i in range(start, start + n)])
+        appmod.invalidate(conn, 'content')
+    conn.close()
+    appmod.invalidation_committed('content')
+
+
+def read(out, rel):
+    with open(os.path.join(out, rel), encoding='utf-8') as fh:
+        return fh.read()
+
+
+def test_incremental_publish_swaps_releases(tmp_path, monkeypatch):
+    appmod = load_app(tmp_path, monkeypatch)
+    add_articles(appmod, 12)
+    out = str(tmp_path / 'site')
+    first = publish.publish(out, appmod=appmod)
+    assert first['full'] and first['pages'] == 6 + 3 + 24
+    live = appmod.create_app().test_client()
+    assert json.loads(read(out, 'api/articles/index.json')) == live.get('/api/articles').get_json()
+    assert json.loads(read(out, 'api/articles/page/2/index.json'))['articles'][0]['title'] == 'A1'
+    assert 'A11' in read(out, 'articles/12/index.html')
+    assert os.path.islink(os.path.join(out, 'static', 'uploads'))
+    old_release = first['release']
+    old_page1 = read(old_release, 'api/articles/index.json')
+
+    assert publish.publish(out, appmod=appmod)['rendered'] == 0
+
+    # edit one article on page 2: its own pages and its listing page only
+    conn = appmod.get_db()
+    with conn:
+        conn.execute("UPDATE articles SET title='edited' WHERE id=2")
+        appmod.invalidate(conn, 'content')
+    conn.close()
+    appmod.invalidation_committed('content')
+    second = publish.publish(out, appmod=appmod)
+    assert second['changed_urls'] == ['/api/articles/2', '/api/articles/page/2', '/articles/2']
+    assert os.path.realpath(out) == second['release'] != old_release
+    assert read(old_release, 'api/articles/index.json') == old_page1  # hard links left intact
+    assert 'edited' in read(out, 'articles/2/index.html')
+
+    # deleting an article removes its pages
+    conn = appmod.get_db()
+    with conn:
+        conn.execute('DELETE FROM articles WHERE id=12')
+    conn.close()
+    third = publish.publish(out, appmod=appmod, keep=1)
+    assert '/articles/12' in third['removed_urls']
+    assert not os.path.exists(os.path.join(out, 'articles', '12'))
+    assert os.listdir(str(tmp_path / 'site.releases')) == [os.path.basename(third['release'])]
+
+
+def test_content_write_triggers_publish(tmp_path, monkeypatch):
+    out = tmp_path / 'site'
+    appmod = load_app(tmp_path, monkeypatch, PUBLISH_DIR=str(out))
+    conn = appmod.get_db()
+    uid = conn.execute("INSERT INTO users (email, role) VALUES ('a@x.test', 'admin')").lastrowid
+    conn.commit()
+    conn.close()
+    client = appmod.create_app({'TESTING': True}).test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = uid
+        sess['csrf_token'] = 'tok'
+    r = client.post('/api/articles', json={'title': 'breaking', 'content': 'c'}, headers={'X-CSRF-Token': 'tok'})
+    assert r.status_code == 201
+    deadline = time.time() + 10
+    while time.time() < deadline and not (out / 'articles' / '1' / 'index.html').exists():
+        time.sleep(0.05)
+    assert 'breaking' in (out / 'articles' / '1' / 'index.html').read_text(encoding='utf-8')
+    sys.modules.pop('backend.app', None)
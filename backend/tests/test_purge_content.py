@@ -0,0 +1,92 @@
+import importlib.util
+import os
+import sqlite3
+
+from backend import migrations
+
+SCRIPT = os.path.join(os.path.dirname(__file__), '..', '..', 'scripts', 'purge_content.py')
+
+
+def load_script():
+    spec = importlib.util.spec_from_file_location('purge_content', SCRIPT)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def make_site(tmp_path):
+    db = tmp_path / 'site.db'
+    conn = sqlite3.connect(db)
+    migrations.migrate(conn)
+    conn.executemany('INSERT INTO articles (title, created_at) VALUES (?,?)',
+                     [(f'a{i}', '2023-06-01' if i < 7 else '2025-01-01') for i in range(10)])
+    uploads = tmp_path / 'uploads'
+    (uploads / 'photos').mkdir(parents=True)
+    for i in range(5):
+        (uploads / 'photos' / f'p{i}.jpg').write_bytes(b'x')
+        conn.execute('INSERT INTO photos (filename, created_at) VALUES (?,?)',
+                     (f'p{i}.jpg', '2023-01-01' if i < 2 else '2025-01-01'))
+    (uploads / 'photos' / 'stray.jpg').write_bytes(b'x')
+    conn.commit()
+    conn.close()
+    return db, uploads
+
+
+def test_selective_purge_runs_in_batches_and_moves_files(tmp_path, capsys):
+    purge = load_script()
+    db, uploads = make_site(tmp_path)
+    rc = purge.main(['--db', str(db), '--uploads', str(uploads), '--older-than', '2024-01-01',
+                     '--tables', 'articles,photos', '--batch-size', '3', '--pause', '0', '--yes'])
+    assert rc == 0
+    out = capsys.readouterr().out
+    assert 'articles: deleted 7/7' in out and 'rows/s' in out
+    conn = sqlite3.connect(db)
+    assert conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0] == 3
+    assert [r[0] for r in conn.execute('SELECT filename FROM photos ORDER BY id')] == ['p2.jpg', 'p3.jpg', 'p4.jpg']
+    assert conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+    assert conn.execute('PRAGMA freelist_count').fetchone()[0] == 0
+    assert sorted(os.listdir(uploads / 'photos')) == ['p2.jpg', 'p3.jpg', 'p4.jpg', 'stray.jpg']
+    removed = [d for d in os.listdir(uploads) if d.startswith('photos_removed_')]
+    assert len(removed) == 1 and sorted(os.listdir(uploads / removed[0])) == ['p0.jpg', 'p1.jpg']
+
+
+def test_orphans_only_leaves_rows_alone(tmp_path):
+    purge = load_script()
+    db, uploads = make_site(tmp_path)
+    assert purge.find_orphans(str(db), str(uploads)) == [('photos', 'stray.jpg')]
+    assert purge.main(['--db', str(db), '--uploads', str(uploads), '--orphans-only', '--yes']) == 0
+    assert 'stray.jpg' not in os.listdir(uploads / 'photos')
+    conn = sqlite3.connect(db)
+    assert conn.execute('SELECT COUNT(*) FROM photos').fetchone()[0] == 5
+
+
+def test_full_purge_keeps_files_uploaded_meanwhile(tmp_path):
+    purge = load_script()
+    db, uploads = make_site(tmp_path)
+    lines = []
+
+    def log(line):
+        if not lines:  # an upload lands after the first batch
+            (uploads / 'photos' / 'new.jpg').write_bytes(b'x')
+            conn = sqlite3.connect(db)
+            with conn:
+                conn.execute("INSERT INTO photos (filename) VALUES ('new.jpg')")
+            conn.close()
+        lines.append(line)
+
+    assert purge.purge_db(str(db), ['photos'], batch_size=2, pause=0, uploads_dir=str(uploads), log=log) == {'photos': 5}
+    assert sorted(os.listdir(uploads / 'photos')) == ['new.jpg', 'stray.jpg']
+    removed = [d for d in os.listdir(uploads) if d.startswith('photos_removed_')]
+    assert sorted(os.listdir(uploads / removed[0])) == [f'p{i}.jpg' for i in range(5)]
+    conn = sqlite3.connect(db)
+    assert [r[0] for r in conn.execute('SELECT filename FROM photos')] == ['new.jpg']
+
+
+def test_purge_of_an_unmigrated_db(tmp_path):
+    purge = load_script()
+    db = tmp_path / 'old.db'
+    conn = sqlite3.connect(db)
+    conn.executescript('CREATE TABLE articles (id INTEGER PRIMARY KEY, title TEXT, created_at TEXT);'
+                       "INSERT INTO articles (title) VALUES ('a'), ('b');")
+    conn.close()
+    assert purge.purge_db(str(db), ['articles'], pause=0) == {'articles': 2}
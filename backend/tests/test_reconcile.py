@@ -0,0 +1,51 @@
+import os
+import sqlite3
+import time
+
+from backend import migrations, reconcile, manage
+
+
+def make_site(tmp_path):
+    db = tmp_path / 'site.db'
+    conn = sqlite3.connect(db)
+    migrations.migrate(conn)
+    uploads = tmp_path / 'uploads'
+    for sub in ('photos', 'videos'):
+        (uploads / sub).mkdir(parents=True)
+    old = time.time() - 7200
+    for name in ('kept.jpg', 'orphan.jpg', 'used_by_article.jpg', 'fresh.jpg'):
+        path = uploads / 'photos' / name
+        path.write_bytes(b'x' * 10)
+        if name != 'fresh.jpg':
+            os.utime(path, (old, old))
+    (uploads / 'videos' / 'clip.mp4').write_bytes(b'v' * 100)
+    conn.executemany('INSERT INTO photos (filename) VALUES (?)', [('kept.jpg',), ('gone.jpg',)])
+    conn.execute("INSERT INTO videos (filename) VALUES ('clip.mp4')")
+    conn.execute("INSERT INTO articles (title, image, video) VALUES ('a', '/static/uploads/photos/used_by_article.jpg', "
+                 "'/static/uploads/videos/deleted.mp4')")
+    conn.execute("INSERT INTO articles (title, image) VALUES ('b', 'https://example.test/x.jpg')")
+    conn.commit()
+    return conn, uploads
+
+
+def test_reconcile_reports_and_quarantines(tmp_path):
+    conn, uploads = make_site(tmp_path)
+    report = reconcile.reconcile(conn, str(uploads), quarantine_dir=str(tmp_path / 'q'))
+    assert report['files_scanned'] == 5
+    assert report['orphans'] == ['photos/orphan.jpg']
+    assert report['missing_media'] == [{'table': 'photos', 'id': 2, 'file': 'photos/gone.jpg'}]
+    assert report['broken_refs'] == [{'article_id': 1, 'field': 'video', 'url': '/static/uploads/videos/deleted.mp4'}]
+    assert not (uploads / 'photos' / 'orphan.jpg').exists()
+    assert os.path.exists(os.path.join(report['quarantined_to'], 'photos', 'orphan.jpg'))
+    usage = {r[0]: (r[1], r[2]) for r in conn.execute('SELECT name, files, bytes FROM storage_usage')}
+    assert usage == {'photos': (3, 30), 'videos': (1, 100), 'total': (4, 130)}
+
+
+def test_manage_reconcile_exit_code_flags_broken_references(tmp_path, capsys):
+    conn, uploads = make_site(tmp_path)
+    conn.close()
+    rc = manage.main(['--db', str(tmp_path / 'site.db'), 'reconcile', '--uploads', str(uploads)])
+    assert rc == 1
+    out = capsys.readouterr().out
+    assert 'Orphans: 1 (10 bytes)' in out and 'article #1 video' in out
+    assert (uploads / 'photos' / 'orphan.jpg').exists()
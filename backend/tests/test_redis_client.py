@@ -0,0 +1,68 @@
+import os
+import sys
+import importlib
+
+import pytest
+
+from backend.redis_client import ManagedRedis, RedisUnavailable
+
+
+class FlakyRedis:
+    def __init__(self):
+        self.fail = True
+        self.calls = 0
+    def ping(self):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError('down')
+        return True
+
+
+def load_app(tmp_path, monkeypatch):
+    db = tmp_path / "test.db"
+    os.environ['DB_PATH'] = str(db)
+    # unroutable address: import must not try to connect
+    monkeypatch.setenv('REDIS_URL', 'redis://10.255.255.1:6379/0')
+    if 'backend.app' in sys.modules:
+        del sys.modules['backend.app']
+    import backend.app as appmod
+    importlib.reload(appmod)
+    appmod.init_db()
+    return appmod
+
+
+def test_breaker_opens_after_repeated_failures():
+    r = ManagedRedis('redis://unused', failure_threshold=3, reset_timeout=60)
+    r._client = FlakyRedis()
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            r.ping()
+    assert r.breaker.state == 'open' and not r.available
+    with pytest.raises(RedisUnavailable):
+        r.ping()
+    assert r._client.calls == 3
+    stats = r.stats()
+    assert stats['errors'] == 3 and stats['rejected_by_breaker'] == 1 and stats['breaker_times_opened'] == 1
+
+
+def test_breaker_half_open_probe_closes_on_success():
+    r = ManagedRedis('redis://unused', failure_threshold=1, reset_timeout=0)
+    r._client = FlakyRedis()
+    with pytest.raises(ConnectionError):
+        r.ping()
+    r._client.fail = False
+    assert r.ping() is True
+    assert r.breaker.state == 'closed'
+
+
+def test_app_import_is_lazy_and_rate_limit_falls_back(tmp_path, monkeypatch):
+    appmod = load_app(tmp_path, monkeypatch)
+    assert appmod._redis.stats()['connected'] is False
+    appmod._redis._client = FlakyRedis()
+    appmod._redis.breaker.state = 'open'
+    appmod._redis.breaker.opened_at = float('inf')
+    assert not appmod.redis_available()
+    with appmod.app.test_request_context('/'):
+        for _ in range(appmod.RL_MAX_REQUESTS):
+            assert appmod.check_rate_limit_for_request() is False
+        assert appmod.check_rate_limit_for_request() is True
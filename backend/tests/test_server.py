@@ -0,0 +1,75 @@
+import importlib
+import os
+import sqlite3
+import sys
+import threading
+
+import pytest
+
+
+def load_app(tmp_path, init=True):
+    os.environ['DB_PATH'] = str(tmp_path / 'server.db')
+    sys.modules.pop('backend.app', None)
+    appmod = importlib.import_module('backend.app')
+    if init:
+        appmod.init_db()
+    return appmod
+
+
+def test_health_and_readiness(tmp_path):
+    appmod = load_app(tmp_path, init=False)
+    client = appmod.create_app().test_client()
+    assert client.get('/healthz').get_json()['status'] == 'ok'
+    # schema not migrated yet -> not ready
+    r = client.get('/readyz')
+    assert r.status_code == 503 and r.get_json()['checks']['migrations']
+    appmod.init_db()
+    r = client.get('/readyz')
+    assert r.status_code == 200 and r.get_json() == {'status': 'ready', 'checks': {'db': 'ok'}}
+
+
+def test_wal_journal_mode(tmp_path, monkeypatch):
+    monkeypatch.setenv('SQLITE_JOURNAL_MODE', 'wal')
+    load_app(tmp_path)
+    conn = sqlite3.connect(tmp_path / 'server.db')
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+
+def test_rate_limiter_is_thread_safe(tmp_path):
+    appmod = load_app(tmp_path)
+    appmod.RL_MAX_REQUESTS = 100
+    allowed = []
+
+    def hammer():
+        allowed.append(sum(not appmod.is_rate_limited('shared') for _ in range(50)))
+
+    threads = [threading.Thread(target=hammer) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sum(allowed) == 100
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_forked_worker_starts_with_fresh_state(tmp_path):
+    appmod = load_app(tmp_path)
+    appmod.is_rate_limited('parent')
+    appmod._role_cache[1] = ('admin', 0.0)
+    appmod._metrics.registry.inc('lfiweb_test_total')
+    appmod._rl_lock.acquire()  # as if another thread held it at fork time
+    try:
+        r, w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            ok = (not appmod._rl_buckets and not appmod._role_cache
+                  and not appmod._metrics.registry.counters and appmod.is_rate_limited('child') is False)
+            os.write(w, b'1' if ok else b'0')
+            os._exit(0)
+        os.close(w)
+        result = os.read(r, 1)
+        os.waitpid(pid, 0)
+    finally:
+        appmod._rl_lock.release()
+    assert result == b'1'
+    assert 'parent' in appmod._rl_buckets
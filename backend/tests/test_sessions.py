@@ -0,0 +1,140 @@
+import os
+import sys
+import importlib
+from datetime import datetime
+
+
+class DummyPipeline:
+    def __init__(self, r):
+        self.r = r
+        self.ops = []
+    def __getattr__(self, name):
+        def op(*args):
+            self.ops.append((name, args))
+            return self
+        return op
+    def execute(self):
+        return [getattr(self.r, name)(*args) for name, args in self.ops]
+
+
+class DummyRedis:
+    def __init__(self):
+        self.kv = {}
+        self.sets = {}
+    def get(self, k):
+        return self.kv.get(k)
+    def setex(self, k, ttl, v):
+        self.kv[k] = v
+    def sadd(self, k, m):
+        self.sets.setdefault(k, set()).add(m)
+    def smembers(self, k):
+        return set(self.sets.get(k, ()))
+    def expire(self, k, ttl):
+        pass
+    def delete(self, *keys):
+        n = 0
+        for k in keys:
+            n += int(self.kv.pop(k, None) is not None or self.sets.pop(k, None) is not None)
+        return n
+    def pipeline(self):
+        return DummyPipeline(self)
+
+
+def load_app(tmp_path, monkeypatch, backend='sqlite'):
+    db = tmp_path / "test.db"
+    os.environ['DB_PATH'] = str(db)
+    monkeypatch.setenv('SESSION_BACKEND', backend)
+    if 'backend.app' in sys.modules:
+        del sys.modules['backend.app']
+    import backend.app as appmod
+    importlib.reload(appmod)
+    appmod.init_db()
+    return appmod
+
+
+def login(client, appmod):
+    conn = appmod.get_db()
+    cur = conn.cursor()
+    cur.execute("INSERT INTO users (email, role, created_at) VALUES (?,?,?)", ("admin@example.test", 'admin', datetime.utcnow().isoformat()))
+    conn.commit()
+    uid = cur.lastrowid
+    conn.close()
+    with client.session_transaction() as sess:
+        sess['user_id'] = uid
+        sess['csrf_token'] = 'testcsrf'
+    return uid
+
+
+def test_sqlite_sessions_store_data_server_side(tmp_path, monkeypatch):
+    appmod = load_app(tmp_path, monkeypatch)
+    client = appmod.app.test_client()
+    uid = login(client, appmod)
+    cookie = client.get_cookie('session')
+    assert 'user_id' not in cookie.value and len(cookie.value) < 64
+    assert client.get('/api/me').get_json()['user']['id'] == uid
+    conn = appmod.get_db()
+    assert conn.execute('SELECT COUNT(*) FROM sessions WHERE user_id=?', (uid,)).fetchone()[0] == 1
+    conn.close()
+
+
+def test_logout_revokes_copied_cookie(tmp_path, monkeypatch):
+    appmod = load_app(tmp_path, monkeypatch)
+    client = appmod.app.test_client()
+    login(client, appmod)
+    stolen = client.get_cookie('session').value
+    client.get('/admin/logout')
+    thief = appmod.app.test_client()
+    thief.set_cookie('session', stolen)
+    assert thief.get('/api/me').get_json()['user'] is None
+
+
+def test_revoke_all_user_sessions(tmp_path, monkeypatch):
+    appmod = load_app(tmp_path, monkeypatch)
+    clients = [appmod.app.test_client() for _ in range(2)]
+    uid = login(clients[0], appmod)
+    with clients[1].session_transaction() as sess:
+        sess['user_id'] = uid
+    assert appmod.app.session_interface.store.delete_user(uid) == 2
+    for c in clients:
+        assert c.get('/api/me').get_json()['user'] is None
+
+
+def test_redis_session_store_revokes_by_user():
+    from backend.sessions import RedisSessionStore
+    store = RedisSessionStore(DummyRedis())
+    store.save('a', 7, {'user_id': 7}, 60)
+    store.save('b', 7, {'user_id': 7}, 60)
+    store.save('c', 8, {'user_id': 8}, 60)
+    assert store.load('a') == {'user_id': 7}
+    assert store.delete_user(7) == 2
+    assert store.load('a') is None and store.load('c') == {'user_id': 8}
+
+
+class BrokenStore:
+    """A Redis store with the breaker open."""
+    def load(self, key):
+        raise ConnectionError('redis down')
+    save = delete = load
+
+
+def test_store_errors_on_save_do_not_fail_requests(tmp_path, monkeypatch):
+    appmod = load_app(tmp_path, monkeypatch)
+    from backend.sessions import ServerSideSessionInterface, SQLiteSessionStore
+    app = appmod.app
+
+    # with a fallback the session lands in SQLite and login still works
+    app.session_interface = ServerSideSessionInterface(BrokenStore(), fallback=SQLiteSessionStore(appmod.get_db))
+    client = app.test_client()
+    uid = login(client, appmod)
+    assert client.get('/api/me').get_json()['user']['id'] == uid
+    assert client.get('/admin/logout').status_code < 500
+    assert client.get('/api/me').get_json()['user'] is None
+
+    # without one the request goes through without a session cookie
+    app.session_interface = ServerSideSessionInterface(BrokenStore())
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = uid
+    assert client.get_cookie('session') is None
+    r = client.get('/api/me')
+    assert r.status_code == 200 and r.get_json()['user'] is None
@@ -0,0 +1,150 @@
+import importlib
+import sys
+import threading
+import time
+
+import pytest
+
+from backend.singleflight import SingleFlightCache
+
+
+def load_app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DB_PATH', str(tmp_path / 'sf.db'))
+    sys.modules.pop('backend.app', None)
+    appmod = importlib.import_module('backend.app')
+    appmod.init_db()
+    return appmod
+
+
+def hammer(n, fn):
+    """Run ``fn()`` in ``n`` threads released together; results in thread order."""
+    barrier = threading.Barrier(n)
+    results = [None] * n
+
+    def worker(i):
+        barrier.wait()
+        results[i] = fn()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_single_flight_cache_outcomes():
+    cache = SingleFlightCache('t')
+    calls = []
+
+    def slow(value):
+        def load():
+            calls.append(value)
+            time.sleep(0.1)
+            return value
+        return load
+
+    assert hammer(6, lambda: cache.get('k', slow('a'))) == ['a'] * 6
+    assert calls == ['a']
+    assert cache.stats()['miss'] == 1 and cache.stats()['coalesced'] == 5
+
+    cache.mark_stale()
+    assert sorted(hammer(6, lambda: cache.get('k', slow('b')))) == ['a'] * 5 + ['b']
+    assert calls == ['a', 'b']
+    assert cache.stats()['stale'] == 5
+    assert cache.get('k', slow('c')) == 'b'
+
+    def boom():
+        raise RuntimeError('db down')
+
+    cache.mark_stale()
+    assert cache.get('k', boom) == 'b'  # stale-if-error
+    with pytest.raises(RuntimeError):
+        cache.get('other', boom)
+    assert cache.stats()['error'] == 2 and cache.stats()['in_flight'] == 0
+
+
+def test_concurrent_article_reads_share_one_query(tmp_path, monkeypatch):
+    appmod = load_app(tmp_path, monkeypatch)
+    conn = appmod.get_db()
+    with conn:
+        conn.executemany('INSERT INTO articles (title, content, created_at) VALUES (?,?,?)',
+                         [(f'A{i}', 'text', f'2024-01-0{i + 1}') for i in range(3)])
+    conn.close()
+    app = appmod.create_app()
+    queries = []
+    query_articles = appmod.query_articles
+
+    def slow_query(*args):
+        queries.append(args[1:])
+        time.sleep(0.2)
+        return query_articles(*args)
+
+    monkeypatch.setattr(appmod, 'query_articles', slow_query)
+
+    def get_total():
+        r = app.test_client().get('/api/articles')
+        assert r.status_code == 200
+        return r.get_json()['total']
+
+    assert hammer(8, get_total) == [3] * 8
+    assert len(queries) == 1
+
+    # a write: one request reloads, the others keep the previous list meanwhile
+    conn = appmod.get_db()
+    with conn:
+        conn.execute("INSERT INTO articles (title, content) VALUES ('New', 'text')")
+        appmod.content_changed(conn)
+    conn.close()
+    appmod.invalidation_committed('content')
+    assert sorted(hammer(8, get_total)) == [3] * 7 + [4]
+    assert len(queries) == 2
+    assert get_total() == 4
+    stats = appmod._read_cache.stats()
+    assert (stats['miss'], stats['coalesced'], stats['stale']) == (2, 7, 7)
+
+    # the home page is shared by visitors without a session, never by sessions
+    client = app.test_client()
+    assert client.get('/').status_code == 200
+    hits = appmod._read_cache.stats()['hit']
+    assert client.get('/').data == app.test_client().get('/').data
+    assert appmod._read_cache.stats()['hit'] == hits + 2
+    with client.session_transaction() as sess:
+        sess['csrf_token'] = 'tok123'
+    assert b'tok123' in client.get('/').data
+    assert appmod._read_cache.stats()['hit'] == hits + 2
+    sys.modules.pop('backend.app', None)
+
+
+def test_read_cache_follows_the_read_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setenv('READ_SNAPSHOT', '1')
+    monkeypatch.setenv('READ_SNAPSHOT_CHECK', '60')
+    monkeypatch.setenv('INVALIDATION_CHECK', '60')  # no periodic check hides a stale entry
+    appmod = load_app(tmp_path, monkeypatch)
+    client = appmod.create_app().test_client()
+
+    def total():
+        return client.get('/api/articles').get_json()['total']
+
+    assert total() == 0
+
+    # a write in this worker: the reload refreshes the snapshot before reading it
+    conn = appmod.get_db()
+    with conn:
+        conn.execute("INSERT INTO articles (title, content) VALUES ('A', 'text')")
+        appmod.content_changed(conn)
+    conn.close()
+    appmod.invalidation_committed('content')
+    assert total() == 1
+    assert total() == 1
+
+    # a write this worker has not heard of: the snapshot swap marks the cache stale
+    conn = appmod.get_db()
+    with conn:
+        conn.execute("INSERT INTO articles (title, content) VALUES ('B', 'text')")
+        appmod.content_changed(conn)
+    conn.close()
+    assert total() == 1
+    assert appmod.get_read_snapshot().refresh()  # what the periodic check does
+    assert total() == 2
+    sys.modules.pop('backend.app', None)
@@ -0,0 +1,58 @@
+import os
+import sys
+import importlib
+from datetime import datetime
+
+
+def load_app(tmp_path, monkeypatch, slow_ms=None):
+    db = tmp_path / "test.db"
+    os.environ['DB_PATH'] = str(db)
+    if slow_ms is None:
+        monkeypatch.delenv('SLOW_QUERY_MS', raising=False)
+    else:
+        monkeypatch.setenv('SLOW_QUERY_MS', str(slow_ms))
+    if 'backend.app' in sys.modules:
+        del sys.modules['backend.app']
+    import backend.app as appmod
+    importlib.reload(appmod)
+    appmod.init_db()
+    return appmod
+
+
+def login_admin(client, appmod):
+    conn = appmod.get_db()
+    cur = conn.cursor()
+    cur.execute("INSERT INTO users (email, role, created_at) VALUES (?,?,?)", ("admin@example.test", 'admin', datetime.utcnow().isoformat()))
+    conn.commit()
+    conn.close()
+    with client.session_transaction() as sess:
+        sess['user_id'] = cur.lastrowid
+        sess['csrf_token'] = 'testcsrf'
+
+
+def test_slow_query_log_records_plan_and_param_shapes(tmp_path, monkeypatch):
+    appmod = load_app(tmp_path, monkeypatch, slow_ms=0)
+    client = appmod.app.test_client()
+    login_admin(client, appmod)
+    client.get('/api/articles?q=abc')
+    data = client.get('/admin/slow-queries').get_json()
+    assert data['enabled'] is True
+    search = [q for q in data['queries'] if q['sql'].startswith('SELECT COUNT(*) FROM articles WHERE') and q['context'] == 'api_get_articles']
+    assert search and search[0]['full_scan'] and search[0]['tables_scanned'] == ['articles']
+    assert search[0]['params'][:2] == ['str:5', 'str:5']
+    r = client.delete('/admin/slow-queries', headers={'X-CSRF-Token': 'testcsrf'})
+    assert r.status_code == 200
+
+
+def test_slow_query_log_is_opt_in(tmp_path, monkeypatch):
+    appmod = load_app(tmp_path, monkeypatch)
+    client = appmod.app.test_client()
+    login_admin(client, appmod)
+    assert client.get('/admin/slow-queries').get_json() == {'enabled': False, 'queries': []}
+
+
+def test_auth_endpoints_do_not_scan(tmp_path, monkeypatch, assert_no_table_scans):
+    appmod = load_app(tmp_path, monkeypatch)
+    client = appmod.app.test_client()
+    login_admin(client, appmod)
+    assert_no_table_scans(client, ['/api/me', '/auth/consume?token=abc&uid=1'])
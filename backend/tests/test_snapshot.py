@@ -0,0 +1,74 @@
+import importlib
+import sqlite3
+import sys
+
+from backend import migrations
+from backend.snapshot import ReadSnapshot
+
+
+def make_db(path):
+    conn = sqlite3.connect(path)
+    migrations.migrate(conn)
+    conn.execute("INSERT INTO articles (title) VALUES ('first')")
+    conn.execute("INSERT INTO users (email) VALUES ('secret@x.test')")
+    conn.commit()
+    return conn
+
+
+def test_snapshot_reloads_only_on_content_changes(tmp_path):
+    db = tmp_path / 'snap.db'
+    conn = make_db(db)
+    snap = ReadSnapshot(str(db), check_interval=0)
+    reader = snap.connect()
+    tables = {r[0] for r in reader.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")}
+    assert tables == {'articles', 'photos', 'videos', 'site_meta'}
+    assert snap.stats()['rows']['articles'] == 1 and snap.stats()['bytes'] > 0
+    reader.close()
+
+    # a commit that is not content (sessions, tokens, ...) keeps the snapshot
+    conn.execute("INSERT INTO users (email) VALUES ('other@x.test')")
+    conn.commit()
+    snap.connect().close()
+    assert snap.reloads == 1
+
+    conn.execute("INSERT INTO articles (title) VALUES ('second')")
+    conn.execute("INSERT INTO cache_versions (name, version) VALUES ('content', 1)")
+    conn.commit()
+    reader = snap.connect()
+    assert snap.reloads == 2
+    assert [r[0] for r in reader.execute('SELECT title FROM articles ORDER BY id')] == ['first', 'second']
+    try:
+        reader.execute("INSERT INTO articles (title) VALUES ('x')")
+    except sqlite3.OperationalError:
+        pass
+    else:
+        raise AssertionError('snapshot connections must be read-only')
+    reader.close()
+    snap.close()
+
+
+def test_public_views_read_the_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setenv('DB_PATH', str(tmp_path / 'app.db'))
+    monkeypatch.setenv('READ_SNAPSHOT', '1')
+    monkeypatch.setenv('READ_SNAPSHOT_CHECK', '0')
+    sys.modules.pop('backend.app', None)
+    appmod = importlib.import_module('backend.app')
+    appmod.init_db()
+    conn = appmod.get_db()
+    uid = conn.execute("INSERT INTO users (email, role) VALUES ('a@x.test', 'admin')").lastrowid
+    conn.commit()
+    conn.close()
+    client = appmod.create_app({'TESTING': True}).test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = uid
+        sess['csrf_token'] = 'tok'
+
+    assert client.get('/api/articles').get_json()['total'] == 0
+    r = client.post('/api/articles', json={'title': 'hello', 'content': 'c'}, headers={'X-CSRF-Token': 'tok'})
+    assert r.status_code == 201
+    assert [a['title'] for a in client.get('/api/articles').get_json()['articles']] == ['hello']
+    status = client.get('/admin/status').get_json()
+    assert status['read_snapshot']['reloads'] == 2
+    assert status['read_snapshot']['rows']['articles'] == 1
+    appmod.get_read_snapshot().close()
+    sys.modules.pop('backend.app', None)
@@ -0,0 +1,76 @@
+import importlib
+import json
+import sys
+import tracemalloc
+
+from flask import jsonify
+
+
+def load_app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DB_PATH', str(tmp_path / 'stream.db'))
+    sys.modules.pop('backend.app', None)
+    appmod = importlib.import_module('backend.app')
+    appmod.init_db()
+    return appmod
+
+
+def add_photos(appmod, n):
+    conn = appmod.get_db()
+    with conn:
+        conn.executemany('INSERT INTO photos (filename, title, description, created_at) VALUES (?,?,?,?)',
+                         [(f'p{i}.jpg', f'Photo é {i}', 'd' * 200, f'2024-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}.{i:06d}')
+                          for i in range(n)])
+    conn.close()
+
+
+def test_streamed_list_matches_jsonify_and_ndjson(tmp_path, monkeypatch):
+    appmod = load_app(tmp_path, monkeypatch)
+    add_photos(appmod, 450)
+    app = appmod.create_app()
+    client = app.test_client()
+    r = client.get('/api/photos')
+    assert r.mimetype == 'application/json' and r.is_streamed
+    conn = appmod.get_db()
+    with app.app_context():
+        expected = jsonify({'photos': appmod.list_media(conn, 'photos')}).get_data()
+    conn.close()
+    assert r.get_data() == expected
+
+    r = client.get('/api/videos')
+    assert r.get_json() == {'videos': []}
+
+    r = client.get('/api/photos', headers={'Accept': 'application/x-ndjson'})
+    assert r.mimetype == 'application/x-ndjson'
+    lines = r.get_data(as_text=True).splitlines()
+    assert len(lines) == 450 and json.loads(lines[0]) == json.loads(expected)['photos'][0]
+    sys.modules.pop('backend.app', None)
+
+
+def test_streaming_memory_does_not_grow_with_rows(tmp_path, monkeypatch):
+    appmod = load_app(tmp_path, monkeypatch)
+    add_photos(appmod, 5000)
+    app = appmod.create_app()
+
+    def peak(fn):
+        tracemalloc.start()
+        try:
+            fn()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def streamed():
+        with app.test_request_context('/api/photos'):
+            response = appmod.photos_list()
+            for _ in response.response:
+                pass
+            response.close()
+
+    def materialized():
+        with app.test_request_context('/api/photos'):
+            conn = appmod.get_db()
+            jsonify({'photos': appmod.list_media(conn, 'photos')})
+            conn.close()
+
+    assert peak(streamed) * 4 < peak(materialized)
+    sys.modules.pop('backend.app', None)
@@ -0,0 +1,91 @@
+import importlib
+import sys
+import time
+
+from backend import trash
+
+
+def load_app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DB_PATH', str(tmp_path / 'trash.db'))
+    monkeypatch.setenv('TRASH_DIR', str(tmp_path / 'trash'))
+    sys.modules.pop('backend.app', None)
+    appmod = importlib.import_module('backend.app')
+    appmod.init_db()
+    appmod.UPLOAD_BASE = str(tmp_path / 'uploads')
+    return appmod
+
+
+def add_photos(appmod, tmp_path, n):
+    photos = tmp_path / 'uploads' / 'photos'
+    photos.mkdir(parents=True)
+    conn = appmod.get_db()
+    with conn:
+        for i in range(n):
+            (photos / f'p{i}.jpg').write_bytes(b'x' * 10)
+            conn.execute('INSERT INTO photos (filename, title) VALUES (?, ?)', (f'p{i}.jpg', f'P{i}'))
+        conn.execute("INSERT INTO storage_usage (name, files, bytes, updated_at) VALUES ('photos', ?, ?, 0)", (n, 10 * n))
+        conn.execute("INSERT INTO storage_usage (name, files, bytes, updated_at) VALUES ('total', ?, ?, 0)", (n, 10 * n))
+    conn.close()
+    return photos
+
+
+def usage(appmod):
+    conn = appmod.get_db()
+    rows = {r['name']: (r['files'], r['bytes']) for r in conn.execute('SELECT name, files, bytes FROM storage_usage')}
+    conn.close()
+    return rows
+
+
+def test_bulk_delete_undo_and_collect(tmp_path, monkeypatch):
+    appmod = load_app(tmp_path, monkeypatch)
+    photos = add_photos(appmod, tmp_path, 5)
+    conn = appmod.get_db()
+    uid = conn.execute("INSERT INTO users (email, role) VALUES ('a@x.test', 'admin')").lastrowid
+    conn.commit()
+    conn.close()
+    client = appmod.create_app({'TESTING': True}).test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = uid
+        sess['csrf_token'] = 'tok'
+    headers = {'X-CSRF-Token': 'tok'}
+
+    assert client.post('/api/photos/bulk-delete', json={'ids': 'all'}, headers=headers).status_code == 400
+    r = client.post('/api/photos/bulk-delete', json={'ids': [1, 2, 3, 99]}, headers=headers)
+    body = r.get_json()
+    assert r.status_code == 200
+    assert body['deleted'] == [1, 2, 3] and body['not_found'] == [99] and body['bytes'] == 30
+    assert sorted(p['id'] for p in client.get('/api/photos').get_json()['photos']) == [4, 5]
+    assert sorted(f.name for f in photos.iterdir()) == ['p3.jpg', 'p4.jpg']
+    assert (tmp_path / 'trash' / body['batch'] / 'photos' / 'p0.jpg').exists()
+    assert usage(appmod) == {'photos': (2, 20), 'total': (2, 20), 'trash': (3, 30)}
+
+    r = client.post(f"/api/media/trash/{body['batch']}/restore", headers=headers)
+    assert r.get_json()['restored'] == {'photos': [1, 2, 3]}
+    assert len(list(photos.iterdir())) == 5
+    assert usage(appmod) == {'photos': (5, 50), 'total': (5, 50), 'trash': (0, 0)}
+    assert client.post(f"/api/media/trash/{body['batch']}/restore", headers=headers).status_code == 404
+
+    batch = client.post('/api/photos/bulk-delete', json={'ids': [4, 5]}, headers=headers).get_json()['batch']
+    conn = appmod.get_db()
+    assert trash.collect(conn, appmod.TRASH_DIR, retention=60)['files'] == 0  # still inside the undo window
+    stats = trash.collect(conn, appmod.TRASH_DIR, retention=60, batch_size=1, now=time.time() + 61)
+    conn.close()
+    assert (stats['files'], stats['bytes']) == (2, 20)
+    assert not (tmp_path / 'trash' / batch).exists()
+    assert usage(appmod)['trash'] == (0, 0)
+    sys.modules.pop('backend.app', None)
+
+
+def test_expired_batch_cannot_be_restored(tmp_path, monkeypatch):
+    appmod = load_app(tmp_path, monkeypatch)
+    add_photos(appmod, tmp_path, 2)
+    conn = appmod.get_db()
+    res = trash.move_to_trash(conn, 'photos', [1], appmod.UPLOAD_BASE, appmod.TRASH_DIR, now=time.time() - 120)
+    try:
+        trash.restore(conn, res['batch'], appmod.UPLOAD_BASE, appmod.TRASH_DIR, retention=60)
+    except trash.TrashError as e:
+        assert 'expired' in str(e)
+    else:
+        raise AssertionError('restore must fail after the undo window')
+    conn.close()
+    sys.modules.pop('backend.app', None)
@@ -0,0 +1,223 @@
+"""Bulk deletion of photos/videos through a trash area, with an undo window.
+
+`move_to_trash` deletes the rows of many ids in one transaction, copying them
+to the media_trash table, and then moves their files from
+``<uploads>/<table>/`` to ``<trash_dir>/<batch>/<table>/``, outside the
+served static tree. Until ``retention`` seconds have passed the batch can be
+restored (`restore`): the files move back and the rows are re-inserted with
+their original ids. After that `collect` unlinks the files and drops the
+trash rows, ``batch_size`` files per transaction. `Collector` runs it on a
+background thread; ``python -m backend.manage trash collect`` runs it from cron.
+
+Rows are committed before the files move, so a crash in between leaves
+ordinary orphans in the uploads tree, which ``manage reconcile`` reports.
+
+The storage_usage totals written by the reconciler follow the files: the
+photos/videos/total rows shrink on delete and grow back on restore, and a
+'trash' row counts the files waiting for collection.
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+
+MEDIA_TABLES = ('photos', 'videos')  # each table's files live in the uploads subdirectory of the same name
+MAX_IDS = 1000
+logger = logging.getLogger(__name__)
+
+
+class TrashError(Exception):
+    pass
+
+
+def _chunks(seq, size=500):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def _move(src, dst):
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    try:
+        os.replace(src, dst)
+    except FileNotFoundError:
+        return False
+    except OSError:  # trash on another filesystem
+        shutil.move(src, dst)
+    return True
+
+
+def adjust_storage_usage(conn, deltas: dict):
+    """Add {name: (files, bytes)} to storage_usage; only 'trash' rows are created here.
+
+    photos/videos/total rows exist once the reconciler has run; before that
+    there is no total to adjust.
+    """
+    now = int(time.time())
+    for name, (files, nbytes) in deltas.items():
+        if name == 'trash':
+            conn.execute(
+                'INSERT INTO storage_usage (name, files, bytes, updated_at) VALUES (?,?,?,?) '
+                'ON CONFLICT(name) DO UPDATE SET files=MAX(0, files + excluded.files), '
+                'bytes=MAX(0, bytes + excluded.bytes), updated_at=excluded.updated_at',
+                (name, files, nbytes, now))
+        else:
+            conn.execute('UPDATE storage_usage SET files=MAX(0, files + ?), bytes=MAX(0, bytes + ?), updated_at=? '
+                         'WHERE name=?', (files, nbytes, now, name))
+
+
+def move_to_trash(conn, table, ids, uploads_dir, trash_dir, on_commit=None, now=None) -> dict:
+    """Delete the ``table`` rows of ``ids`` and move their files to the trash.
+
+    ``on_commit(conn)`` runs inside the transaction (the app passes
+    `content_changed`). Returns the batch id, the deleted and unknown ids and
+    the bytes moved.
+    """
+    if table not in MEDIA_TABLES:
+        raise TrashError(f'unknown media table {table!r}')
+    ids = list(dict.fromkeys(int(i) for i in ids))
+    if len(ids) > MAX_IDS:
+        raise TrashError(f'at most {MAX_IDS} ids per request')
+    now = int(now if now is not None else time.time())
+    batch = datetime.utcfromtimestamp(now).strftime('%Y%m%dT%H%M%SZ-') + uuid.uuid4().hex[:8]
+    src_dir = os.path.join(uploads_dir, table)
+
+    rows = []
+    for chunk in _chunks(ids):
+        marks = ','.join('?' * len(chunk))
+        rows.extend(conn.execute(f'SELECT id, filename, title, description, created_at FROM {table} '
+                                 f'WHERE id IN ({marks})', chunk).fetchall())
+    sizes = {}
+    for row in rows:
+        try:
+            sizes[row[0]] = os.stat(os.path.join(src_dir, row[1])).st_size
+        except OSError:
+            sizes[row[0]] = 0
+    deleted = [row[0] for row in rows]
+    total = sum(sizes.values())
+    if rows:
+        with conn:
+            conn.executemany(
+                'INSERT INTO media_trash (batch, media_table, row_id, filename, title, description, created_at, '
+                'bytes, deleted_at) VALUES (?,?,?,?,?,?,?,?,?)',
+                [(batch, table) + tuple(row) + (sizes[row[0]], now) for row in rows])
+            for chunk in _chunks(deleted):
+                conn.execute(f"DELETE FROM {table} WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+            moved = sum(1 for v in sizes.values() if v)
+            adjust_storage_usage(conn, {table: (-moved, -total), 'total': (-moved, -total), 'trash': (moved, total)})
+            if on_commit:
+                on_commit(conn)
+        dest_dir = os.path.join(trash_dir, batch, table)
+        for row in rows:
+            _move(os.path.join(src_dir, row[1]), os.path.join(dest_dir, row[1]))
+    found = set(deleted)
+    return {'batch': batch if rows else None, 'deleted': deleted,
+            'not_found': [i for i in ids if i not in found], 'bytes': total}
+
+
+def list_batches(conn) -> list:
+    return [dict(zip(('batch', 'table', 'files', 'bytes', 'deleted_at'), r)) for r in conn.execute(
+        'SELECT batch, media_table, COUNT(*), SUM(bytes), MIN(deleted_at) FROM media_trash '
+        'GROUP BY batch, media_table ORDER BY MIN(deleted_at) DESC')]
+
+
+def restore(conn, batch, uploads_dir, trash_dir, retention, on_commit=None, now=None) -> dict:
+    """Undo `move_to_trash` for ``batch`` while it is inside the undo window."""
+    now = now if now is not None else time.time()
+    rows = conn.execute('SELECT id, media_table, row_id, filename, title, description, created_at, bytes, deleted_at '
+                        'FROM media_trash WHERE batch=? ORDER BY id', (batch,)).fetchall()
+    if not rows:
+        raise TrashError(f'no trash batch {batch!r}')
+    if rows[0][8] + retention <= now:
+        raise TrashError(f'undo window of batch {batch!r} has expired')
+    restored = {}
+    for row in rows:
+        table = row[1]
+        _move(os.path.join(trash_dir, batch, table, row[3]), os.path.join(uploads_dir, table, row[3]))
+        restored.setdefault(table, []).append(row)
+    with conn:
+        deltas = {'total': [0, 0], 'trash': [0, 0]}
+        for table, trows in restored.items():
+            conn.executemany(f'INSERT INTO {table} (id, filename, title, description, created_at) VALUES (?,?,?,?,?)',
+                             [(r[2], r[3], r[4], r[5], r[6]) for r in trows])
+            files, nbytes = sum(1 for r in trows if r[7]), sum(r[7] for r in trows)
+            deltas[table] = (files, nbytes)
+            for key, sign in (('total', 1), ('trash', -1)):
+                deltas[key][0] += sign * files
+                deltas[key][1] += sign * nbytes
+        conn.execute('DELETE FROM media_trash WHERE batch=?', (batch,))
+        adjust_storage_usage(conn, deltas)
+        if on_commit:
+            on_commit(conn)
+    shutil.rmtree(os.path.join(trash_dir, batch), ignore_errors=True)
+    return {'batch': batch, 'restored': {t: [r[2] for r in trows] for t, trows in restored.items()}}
+
+
+def collect(conn, trash_dir, retention, batch_size=200, now=None) -> dict:
+    """Delete the files and rows of batches older than ``retention`` seconds."""
+    t0 = time.perf_counter()
+    cutoff = (now if now is not None else time.time()) - retention
+    files = nbytes = 0
+    batches = set()
+    while True:
+        rows = conn.execute('SELECT id, batch, media_table, filename, bytes FROM media_trash WHERE deleted_at <= ? '
+                            'ORDER BY id LIMIT ?', (cutoff, batch_size)).fetchall()
+        if not rows:
+            break
+        for _, batch, table, filename, _ in rows:
+            try:
+                os.remove(os.path.join(trash_dir, batch, table, filename))
+            except FileNotFoundError:
+                pass
+            batches.add(batch)
+        removed = sum(1 for r in rows if r[4])
+        freed = sum(r[4] for r in rows)
+        with conn:
+            conn.executemany('DELETE FROM media_trash WHERE id=?', [(r[0],) for r in rows])
+            adjust_storage_usage(conn, {'trash': (-removed, -freed)})
+        files += removed
+        nbytes += freed
+    for batch in batches:
+        if not conn.execute('SELECT 1 FROM media_trash WHERE batch=? LIMIT 1', (batch,)).fetchone():
+            shutil.rmtree(os.path.join(trash_dir, batch), ignore_errors=True)
+    return {'files': files, 'bytes': nbytes, 'batches': len(batches), 'seconds': round(time.perf_counter() - t0, 3)}
+
+
+class Collector:
+    """Calls `collect` every ``interval`` seconds on a daemon thread, started by the first `start()`."""
+
+    def __init__(self, connect, trash_dir, retention, interval=300, batch_size=200):
+        self.connect = connect
+        self.trash_dir = trash_dir
+        self.retention = retention
+        self.interval = interval
+        self.batch_size = batch_size
+        self.last = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop, name='trash-collector', daemon=True)
+        self._thread.start()
+
+    def run_once(self):
+        conn = self.connect()
+        try:
+            self.last = collect(conn, self.trash_dir, self.retention, self.batch_size)
+        finally:
+            conn.close()
+        return self.last
+
+    def _loop(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception('Trash collection in %s failed', self.trash_dir)
+            time.sleep(self.interval)
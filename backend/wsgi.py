@@ -0,0 +1,8 @@
+"""WSGI entry point: `backend.wsgi:application`.
+
+PythonAnywhere's WSGI file only needs:
+  from backend.wsgi import application
+"""
+from backend.app import create_app
+
+application = app = create_app()
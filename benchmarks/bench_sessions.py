@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Compare session backends: cookie size and per-request overhead.
+
+Logs a user in with each SESSION_BACKEND (cookie, sqlite and, when REDIS_URL is
+set, redis) and times authenticated GET /api/me through the Flask test client.
+
+Usage:
+  python benchmarks/bench_sessions.py [--requests 2000] [--out sessions.json]
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def load_app(db_path, backend):
+    os.environ['DB_PATH'] = db_path
+    os.environ['SESSION_BACKEND'] = backend
+    sys.modules.pop('backend.app', None)
+    appmod = importlib.import_module('backend.app')
+    appmod.init_db()
+    return appmod
+
+
+def bench(backend, n, workdir):
+    appmod = load_app(os.path.join(workdir, f'{backend}.db'), backend)
+    conn = appmod.get_db()
+    cur = conn.cursor()
+    cur.execute("INSERT INTO users (email, role) VALUES (?, 'admin')", (f'{backend}@bench.local',))
+    conn.commit()
+    uid = cur.lastrowid
+    conn.close()
+    client = appmod.app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = uid
+        sess['csrf_token'] = 'x' * 32
+    cookie = client.get_cookie(appmod.app.config['SESSION_COOKIE_NAME'])
+    for _ in range(50):  # warm-up
+        client.get('/api/me')
+    t0 = time.perf_counter()
+    for _ in range(n):
+        client.get('/api/me')
+    elapsed = time.perf_counter() - t0
+    return {
+        'backend': backend,
+        'cookie_bytes': len(cookie.value) if cookie else 0,
+        'requests': n,
+        'mean_ms': elapsed / n * 1000,
+        'rps': n / elapsed,
+    }
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--requests', type=int, default=2000)
+    p.add_argument('--out', default=None, help='Write JSON results to this file')
+    args = p.parse_args()
+    backends = ['cookie', 'sqlite'] + (['redis'] if os.getenv('REDIS_URL') else [])
+    with tempfile.TemporaryDirectory(prefix='lfi_bench_') as td:
+        results = [bench(b, args.requests, td) for b in backends]
+    out = json.dumps({'benchmark': 'sessions', 'results': results}, indent=2)
+    print(out)
+    if args.out:
+        with open(args.out, 'w') as fh:
+            fh.write(out)
+
+
+if __name__ == '__main__':
+    main()
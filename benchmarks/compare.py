@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Compare two benchmark JSON reports (e.g. from run_load.py).
+
+Usage:
+  python benchmarks/compare.py before.json after.json [--threshold 10]
+
+Prints p50/p95/p99 and throughput per (scenario, target) with the relative
+change, marking regressions larger than --threshold percent. Exits 1 if any
+p95 or throughput regression exceeds the threshold.
+"""
+import argparse
+import json
+
+
+def load(path):
+    with open(path) as fh:
+        data = json.load(fh)
+    return {(r['scenario'], r['target']): r for r in data.get('results', [])}, data
+
+
+def pct(old, new):
+    if not old or new is None:
+        return None
+    return (new - old) / old * 100
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('before')
+    p.add_argument('after')
+    p.add_argument('--threshold', type=float, default=10.0)
+    args = p.parse_args()
+    before, bmeta = load(args.before)
+    after, ameta = load(args.after)
+    print(f"before: {bmeta.get('commit')}  after: {ameta.get('commit')}")
+    if bmeta.get('read_cache') != ameta.get('read_cache'):
+        print(f"warning: read_cache differs (before: {bmeta.get('read_cache')}, after: {ameta.get('read_cache')})")
+    print(f"{'scenario':28} {'target':12} {'p50 ms':>16} {'p95 ms':>16} {'p99 ms':>16} {'rps':>18}")
+    regressed = False
+    for key in sorted(set(before) & set(after)):
+        b, a = before[key], after[key]
+        cells = []
+        for field, higher_is_worse in (('p50_ms', True), ('p95_ms', True), ('p99_ms', True), ('throughput_rps', False)):
+            change = pct(b.get(field), a.get(field))
+            mark = ''
+            if change is not None:
+                worse = change if higher_is_worse else -change
+                if worse > args.threshold:
+                    mark = '!'
+                    if field in ('p95_ms', 'throughput_rps'):
+                        regressed = True
+            cells.append(f"{a.get(field)!s:>8} ({change:+.0f}%){mark}" if change is not None else f"{a.get(field)!s:>16}")
+        print(f'{key[0]:28} {key[1]:12} ' + ' '.join(f'{c:>16}' for c in cells))
+    for key in sorted(set(before) ^ set(after)):
+        print(f'{key[0]:28} {key[1]:12} only in {"before" if key in before else "after"}')
+    raise SystemExit(1 if regressed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""Load-test the public and admin APIs against a seeded database.
+
+Seeds a temporary DB (see benchmarks/seed.py), then drives each scenario
+through the Flask test client (in-process, no network) and through a real
+threaded WSGI server over HTTP with concurrent clients. Prints and writes a
+JSON report with p50/p95/p99 latency and throughput per scenario so runs can
+be compared between commits (benchmarks/compare.py).
+
+The per-process read cache (READ_CACHE) is off unless --read-cache is given,
+so the article and search scenarios time the handlers rather than cache hits.
+Werkzeug's per-request log lines are silenced during the run.
+
+Usage:
+  python benchmarks/run_load.py --articles 100000 --photos 20000 --tokens 1000000 --out before.json
+  python benchmarks/run_load.py --small --out quick.json          # a few thousand rows, for a smoke run
+  python benchmarks/run_load.py --targets wsgi --concurrency 16 --requests 2000
+  python benchmarks/run_load.py --small --read-cache --out cached.json  # with the read cache on
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.seed import SEARCH_TERM, load_app, seed  # noqa: E402
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[idx]
+
+
+def summarize(name, target, latencies, errors, elapsed, concurrency):
+    lat = sorted(latencies)
+    ms = lambda v: round(v * 1000, 3) if v is not None else None
+    return {
+        'scenario': name,
+        'target': target,
+        'requests': len(lat),
+        'errors': errors,
+        'concurrency': concurrency,
+        'throughput_rps': round(len(lat) / elapsed, 1) if elapsed else None,
+        'p50_ms': ms(percentile(lat, 50)),
+        'p95_ms': ms(percentile(lat, 95)),
+        'p99_ms': ms(percentile(lat, 99)),
+        'max_ms': ms(lat[-1] if lat else None),
+    }
+
+
+class Scenario:
+    """A named request generator: ``make(i)`` returns (method, path, body, headers)."""
+
+    def __init__(self, name, make, ok=(200,), admin=False):
+        self.name = name
+        self.make = make
+        self.ok = ok
+        self.admin = admin
+
+
+def _multipart(fields, file_field, filename, payload):
+    boundary = 'benchboundary7MA4YWxkTrZu0gW'
+    parts = []
+    for k, v in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{k}"\r\n\r\n{v}\r\n'.encode())
+    parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+                 f'Content-Type: application/octet-stream\r\n\r\n'.encode() + payload + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def build_scenarios(appmod, tokens_sink):
+    upload_body, upload_type = _multipart({'title': 'bench'}, 'file', 'bench.jpg', b'\xff\xd8' + b'0' * 20000)
+
+    def request_token(i):
+        body = json.dumps({'email': f'bench-user-{i % 500}@bench.local'}).encode()
+        return 'POST', '/auth/request-token', body, {'Content-Type': 'application/json'}
+
+    def consume(i):
+        try:
+            token, uid = tokens_sink.pop()
+        except IndexError:
+            token, uid = 'missing', 0
+        return 'GET', f'/auth/consume?token={token}&uid={uid}', None, {}
+
+    return [
+        Scenario('homepage', lambda i: ('GET', '/', None, {})),
+        Scenario('articles_page1', lambda i: ('GET', '/api/articles?per_page=10', None, {})),
+        Scenario('articles_deep_page', lambda i: ('GET', f'/api/articles?per_page=100&page={50 + i % 50}', None, {})),
+        Scenario('articles_search', lambda i: ('GET', f'/api/articles?q={SEARCH_TERM}&page={1 + i % 5}', None, {})),
+        Scenario('photos_list', lambda i: ('GET', '/api/photos', None, {})),
+        Scenario('site_meta', lambda i: ('GET', '/api/site', None, {})),
+        Scenario('auth_request_token', request_token),
+        Scenario('auth_consume', consume, ok=(302,)),
+        Scenario('photo_upload', lambda i: ('POST', '/api/photos', upload_body,
+                                            {'Content-Type': upload_type, 'X-CSRF-Token': 'benchcsrf'}),
+                 ok=(201,), admin=True),
+    ]
+
+
+def admin_cookie(appmod):
+    """Create a signed session cookie for the seeded admin via the test client."""
+    conn = appmod.get_db()
+    uid = conn.execute("SELECT id FROM users WHERE email='bench-admin@bench.local'").fetchone()[0]
+    conn.close()
+    client = appmod.app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = uid
+        sess['csrf_token'] = 'benchcsrf'
+    name = appmod.app.config['SESSION_COOKIE_NAME']
+    return client, f'{name}={client.get_cookie(name).value}'
+
+
+def run_test_client(appmod, scenario, n, admin_client):
+    client = admin_client if scenario.admin else appmod.app.test_client()
+    latencies, errors = [], 0
+    t0 = time.perf_counter()
+    for i in range(n):
+        method, path, body, headers = scenario.make(i)
+        s = time.perf_counter()
+        r = client.open(path, method=method, data=body, headers=headers)
+        latencies.append(time.perf_counter() - s)
+        if r.status_code not in scenario.ok:
+            errors += 1
+        r.close()
+    return summarize(scenario.name, 'test_client', latencies, errors, time.perf_counter() - t0, 1)
+
+
+def run_wsgi(port, scenario, n, concurrency, cookie):
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    counter = iter(range(n))
+
+    def worker():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local = []
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            method, path, body, headers = scenario.make(i)
+            headers = dict(headers)
+            if scenario.admin:
+                headers['Cookie'] = cookie
+            s = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+                status = resp.status
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                status = None
+            local.append(time.perf_counter() - s)
+            if status not in scenario.ok:
+                with lock:
+                    errors[0] += 1
+        conn.close()
+        with lock:
+            latencies.extend(local)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        for _ in range(concurrency):
+            ex.submit(worker)
+    return summarize(scenario.name, 'wsgi', latencies, errors[0], time.perf_counter() - t0, concurrency)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--articles', type=int, default=100000)
+    p.add_argument('--photos', type=int, default=20000)
+    p.add_argument('--videos', type=int, default=2000)
+    p.add_argument('--tokens', type=int, default=1000000)
+    p.add_argument('--small', action='store_true', help='Seed 2k articles / 500 photos / 10k tokens')
+    p.add_argument('--requests', type=int, default=300, help='Requests per scenario and target')
+    p.add_argument('--concurrency', type=int, default=8, help='Concurrent HTTP clients for the WSGI target')
+    p.add_argument('--targets', default='test_client,wsgi')
+    p.add_argument('--scenarios', default=None, help='Comma-separated subset of scenario names')
+    p.add_argument('--read-cache', action='store_true', help='Serve reads through the read cache (READ_CACHE=1)')
+    p.add_argument('--out', default=None, help='Write the JSON report here')
+    args = p.parse_args()
+    if args.small:
+        args.articles, args.photos, args.videos, args.tokens = 2000, 500, 50, 10000
+
+    workdir = tempfile.mkdtemp(prefix='lfi_bench_')
+    os.environ.setdefault('RL_MAX_REQUESTS', str(10 ** 9))
+    appmod = load_app(os.path.join(workdir, 'bench.db'))
+    # keep uploads out of the source tree
+    appmod.UPLOAD_BASE = os.path.join(workdir, 'uploads')
+    appmod.PHOTO_DIR = os.path.join(appmod.UPLOAD_BASE, 'photos')
+    appmod.VIDEO_DIR = os.path.join(appmod.UPLOAD_BASE, 'videos')
+    tokens_sink = []
+    appmod.send_magic_link = lambda email, uid, token: tokens_sink.append((token, uid)) or True
+    appmod.app.logger.disabled = True
+    appmod.app.config['READ_CACHE'] = args.read_cache
+    # one stderr line per request would be timed along with the request
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    conn = appmod.get_db()
+    seeded = seed(conn, args.articles, args.photos, args.videos, args.tokens)
+    conn.close()
+    print('seeded', seeded, file=sys.stderr)
+
+    scenarios = build_scenarios(appmod, tokens_sink)
+    if args.scenarios:
+        wanted = set(args.scenarios.split(','))
+        scenarios = [s for s in scenarios if s.name in wanted]
+    admin_client, cookie = admin_cookie(appmod)
+    targets = args.targets.split(',')
+    results = []
+
+    if 'test_client' in targets:
+        for sc in scenarios:
+            res = run_test_client(appmod, sc, args.requests, admin_client)
+            print(json.dumps(res), file=sys.stderr)
+            results.append(res)
+
+    if 'wsgi' in targets:
+        from werkzeug.serving import make_server
+        server = make_server('127.0.0.1', 0, appmod.app, threaded=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            for sc in scenarios:
+                res = run_wsgi(server.server_port, sc, args.requests, args.concurrency, cookie)
+                print(json.dumps(res), file=sys.stderr)
+                results.append(res)
+        finally:
+            server.shutdown()
+
+    report = {
+        'benchmark': 'load',
+        'commit': git_commit(),
+        'timestamp_utc': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seeded,
+        'read_cache': args.read_cache,
+        'results': results,
+    }
+    shutil.rmtree(workdir, ignore_errors=True)
+    out = json.dumps(report, indent=2)
+    print(out)
+    if args.out:
+        with open(args.out, 'w') as fh:
+            fh.write(out)
+
+
+if __name__ == '__main__':
+    main()
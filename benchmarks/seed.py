@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Seed an SQLite database with synthetic content for benchmarks.
+
+Usage:
+  python benchmarks/seed.py --db /tmp/bench.db --articles 100000 --photos 20000 --videos 2000 --tokens 1000000
+
+Rows are generated lazily and written with executemany in chunked
+transactions, so seeding a million login tokens stays within a few MB of RAM.
+The schema comes from backend.app.init_db().
+"""
+import argparse
+import importlib
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+WORDS = ('ville', 'avenir', 'commun', 'écologie', 'logement', 'transport', 'école', 'quartier',
+         'budget', 'culture', 'santé', 'jeunesse', 'eau', 'service', 'public', 'réunion')
+SEARCH_TERM = 'logement'
+CHUNK = 10000
+
+
+def load_app(db_path):
+    """Import backend.app bound to ``db_path`` and create the schema."""
+    os.environ['DB_PATH'] = db_path
+    sys.modules.pop('backend.app', None)
+    appmod = importlib.import_module('backend.app')
+    appmod.init_db()
+    return appmod
+
+
+def _sentence(rnd, n):
+    return ' '.join(rnd.choice(WORDS) for _ in range(n))
+
+
+def _ts(base, i):
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(base + i * 60))
+
+
+def _chunked_insert(conn, sql, rows):
+    buf = []
+    n = 0
+    for row in rows:
+        buf.append(row)
+        if len(buf) >= CHUNK:
+            with conn:
+                conn.executemany(sql, buf)
+            n += len(buf)
+            buf.clear()
+    if buf:
+        with conn:
+            conn.executemany(sql, buf)
+        n += len(buf)
+    return n
+
+
+def seed(conn, articles=0, photos=0, videos=0, tokens=0, seed_value=42):
+    """Insert synthetic rows; returns per-table counts and seconds taken."""
+    rnd = random.Random(seed_value)
+    base = int(time.time()) - 10 * 365 * 86400
+    t0 = time.perf_counter()
+    counts = {}
+    counts['articles'] = _chunked_insert(
+        conn, 'INSERT INTO articles (title, author, content, image, video, created_at) VALUES (?,?,?,?,?,?)',
+        ((_sentence(rnd, 6), 'Bench', _sentence(rnd, 120), '', '', _ts(base, i)) for i in range(articles)))
+    counts['photos'] = _chunked_insert(
+        conn, 'INSERT INTO photos (filename, title, description, created_at) VALUES (?,?,?,?)',
+        ((f'{i:016x}.jpg', _sentence(rnd, 4), _sentence(rnd, 12), _ts(base, i)) for i in range(photos)))
+    counts['videos'] = _chunked_insert(
+        conn, 'INSERT INTO videos (filename, title, description, created_at) VALUES (?,?,?,?)',
+        ((f'{i:016x}.mp4', _sentence(rnd, 4), _sentence(rnd, 12), _ts(base, i)) for i in range(videos)))
+    with conn:
+        conn.execute("INSERT OR IGNORE INTO users (email, role) VALUES ('bench-admin@bench.local', 'admin')")
+    uid = conn.execute("SELECT id FROM users WHERE email='bench-admin@bench.local'").fetchone()[0]
+    now = int(time.time())
+    counts['login_tokens'] = _chunked_insert(
+        conn, 'INSERT INTO login_tokens (user_id, token_hash, expires_at, used) VALUES (?,?,?,?)',
+        ((uid, f'{rnd.getrandbits(256):064x}', now + rnd.randint(-86400, 7200), int(rnd.random() < 0.9))
+         for _ in range(tokens)))
+    return {'counts': counts, 'seconds': round(time.perf_counter() - t0, 3)}
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--db', required=True)
+    p.add_argument('--articles', type=int, default=100000)
+    p.add_argument('--photos', type=int, default=20000)
+    p.add_argument('--videos', type=int, default=2000)
+    p.add_argument('--tokens', type=int, default=1000000)
+    args = p.parse_args()
+    appmod = load_app(args.db)
+    conn = appmod.get_db()
+    try:
+        res = seed(conn, args.articles, args.photos, args.videos, args.tokens)
+    finally:
+        conn.close()
+    print(res)
+
+
+if __name__ == '__main__':
+    main()
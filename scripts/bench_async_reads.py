@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""Compare concurrent-visitor throughput of the WSGI and ASGI read paths.
+
+Usage:
+  scripts/bench_async_reads.py [--db PATH] [--path /api/articles?per_page=20]
+                               [--visitors 64] [--requests 2000] [--threads 8]
+                               [--delay-ms 2] [--json]
+  scripts/bench_async_reads.py --wsgi-url http://127.0.0.1:8000 --asgi-url http://127.0.0.1:8001
+
+In-process mode (default) drives both apps on this machine with the same
+thread budget: the Flask app behind --threads worker threads (like a gthread
+worker) and backend.asgi.AsyncReadAPI with --threads DB threads. --visitors
+clients issue requests back to back; latency includes time spent queueing.
+--delay-ms adds a sleep after every SQL statement to model a slow disk.
+Without --db a temporary database with 500 articles is used.
+
+With --wsgi-url/--asgi-url the same load is sent over HTTP to running servers
+(e.g. gunicorn -c backend/gunicorn_conf.py and uvicorn backend.asgi:application).
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def summarize(name, latencies, errors, seconds):
+    lat = sorted(latencies)
+
+    def pct(p):
+        return round(lat[min(len(lat) - 1, int(p * len(lat)))] * 1000, 2) if lat else None
+
+    return {
+        'mode': name,
+        'requests': len(lat),
+        'errors': errors,
+        'seconds': round(seconds, 3),
+        'req_per_s': round(len(lat) / seconds, 1) if seconds else None,
+        'p50_ms': pct(0.50),
+        'p95_ms': pct(0.95),
+        'p99_ms': pct(0.99),
+        'mean_ms': round(statistics.mean(lat) * 1000, 2) if lat else None,
+    }
+
+
+def run_visitors(visitors, total, one_request):
+    """``visitors`` threads share ``total`` calls of ``one_request() -> ok``."""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def visitor():
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    return
+            t0 = time.perf_counter()
+            ok = one_request()
+            dt = time.perf_counter() - t0
+            with lock:
+                latencies.append(dt)
+                errors[0] += not ok
+
+    threads = [threading.Thread(target=visitor) for _ in range(visitors)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors[0], time.perf_counter() - t0
+
+
+def bench_wsgi(appmod, args):
+    # READ_CACHE off, like the ASGI side: both sides query for every request
+    flask_app = appmod.create_app({'READ_CACHE': False})
+    local = threading.local()
+
+    def handle():
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = flask_app.test_client()
+        return client.get(args.path).status_code == 200
+
+    with ThreadPoolExecutor(args.threads) as workers:
+        latencies, errors, seconds = run_visitors(args.visitors, args.requests,
+                                                  lambda: workers.submit(handle).result())
+    return summarize(f'wsgi ({args.threads} threads)', latencies, errors, seconds)
+
+
+def bench_asgi(asgimod, args):
+    # READ_CACHE off, like the WSGI side
+    api = asgimod.AsyncReadAPI(asgimod.appmod.create_app({'READ_CACHE': False}), db_threads=args.threads,
+                               max_concurrency=max(args.visitors, 1), queue_timeout=60)
+    split = urlsplit(args.path)
+    latencies, errors = [], [0]
+
+    async def one():
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'method': 'GET', 'path': split.path, 'query_string': split.query.encode(),
+                 'headers': [], 'server': ('bench', 80), 'client': ('127.0.0.1', 1)}
+        await api(scope, receive, send)
+        return sent[0]['status'] == 200
+
+    async def visitor(n):
+        for _ in range(n):
+            t0 = time.perf_counter()
+            ok = await one()
+            latencies.append(time.perf_counter() - t0)
+            errors[0] += not ok
+
+    async def main():
+        share = [args.requests // args.visitors + (i < args.requests % args.visitors) for i in range(args.visitors)]
+        await asyncio.gather(*(visitor(n) for n in share))
+
+    t0 = time.perf_counter()
+    asyncio.run(main())
+    seconds = time.perf_counter() - t0
+    api.close()
+    return summarize(f'asgi ({args.threads} db threads)', latencies, errors[0], seconds)
+
+
+def bench_http(name, base_url, args):
+    url = base_url.rstrip('/') + args.path
+
+    def one():
+        try:
+            with urllib.request.urlopen(url, timeout=30) as resp:
+                resp.read()
+                return resp.status == 200
+        except OSError:
+            return False
+
+    latencies, errors, seconds = run_visitors(args.visitors, args.requests, one)
+    return summarize(f'{name} {base_url}', latencies, errors, seconds)
+
+
+def seed(n):
+    import backend.app as appmod
+    appmod.init_db()
+    conn = appmod.get_db()
+    with conn:
+        if conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0] == 0:
+            conn.executemany('INSERT INTO articles (title, author, content, created_at) VALUES (?,?,?,?)',
+                             [(f'Article {i}', 'bench', 'lorem ipsum ' * 40, f'2024-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}')
+                              for i in range(n)])
+    conn.close()
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='WSGI vs ASGI read throughput')
+    p.add_argument('--db', help='database to read (default: temporary seeded DB)')
+    p.add_argument('--path', default='/api/articles?per_page=20')
+    p.add_argument('--visitors', type=int, default=64)
+    p.add_argument('--requests', type=int, default=2000)
+    p.add_argument('--threads', type=int, default=8)
+    p.add_argument('--delay-ms', type=float, default=2.0, help='sleep after each SQL statement (in-process only)')
+    p.add_argument('--wsgi-url')
+    p.add_argument('--asgi-url')
+    p.add_argument('--json', action='store_true')
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = []
+    if args.wsgi_url or args.asgi_url:
+        if args.wsgi_url:
+            results.append(bench_http('wsgi', args.wsgi_url, args))
+        if args.asgi_url:
+            results.append(bench_http('asgi', args.asgi_url, args))
+    else:
+        tmp = None
+        if not args.db:
+            tmp = tempfile.TemporaryDirectory()
+            args.db = os.path.join(tmp.name, 'bench.db')
+        os.environ['DB_PATH'] = args.db
+        import backend.app as appmod
+        import backend.asgi as asgimod
+        seed(500)
+        if args.delay_ms:
+            delay = args.delay_ms / 1000.0
+            appmod._dblib.add_query_hook(lambda sql, params, seconds, conn: time.sleep(delay), 'bench.delay')
+        results.append(bench_wsgi(appmod, args))
+        results.append(bench_asgi(asgimod, args))
+        if tmp:
+            tmp.cleanup()
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f'{args.visitors} visitors, {args.requests} requests of {args.path}')
+        for r in results:
+            print(f"{r['mode']:<32} {r['req_per_s']:>8} req/s  p50 {r['p50_ms']} ms  p95 {r['p95_ms']} ms  "
+                  f"p99 {r['p99_ms']} ms  errors {r['errors']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Before/after timing of JSON list responses (GET /api/articles?per_page=100).
+
+Usage:
+  scripts/bench_json.py [--db PATH] [--path /api/articles?per_page=100]
+                        [--requests 500] [--rounds 5] [--json]
+
+Each mode serves the same request through the Flask test client, single
+threaded, and reports the best of --rounds runs:
+
+  before   stdlib JSON provider, rows read as sqlite3.Row and copied with dict(row)
+  rows     stdlib JSON provider, rows read by db.fetch_dicts
+  after    orjson provider (JSON_PROVIDER=orjson), rows read by db.fetch_dicts
+
+"after" needs orjson installed; without it the mode is skipped. Without --db
+a temporary database with 500 articles is used.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def _row_copies(cursor, size=None):
+    """The previous row path: sqlite3.Row objects, then one dict copy each."""
+    rows = cursor.fetchall() if size is None else cursor.fetchmany(size)
+    return [dict(r) for r in rows]
+
+
+def seed(appmod, n):
+    appmod.init_db()
+    conn = appmod.get_db()
+    with conn:
+        if conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0] == 0:
+            conn.executemany('INSERT INTO articles (title, author, content, image, created_at) VALUES (?,?,?,?,?)',
+                             [(f'Article {i} — réunion publique', 'bench', 'lorem ipsum ' * 80,
+                               f'/static/uploads/photos/{i:016x}.jpg',
+                               f'2024-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}') for i in range(n)])
+    conn.close()
+
+
+def bench(appmod, path, provider, row_path, requests, rounds):
+    # READ_CACHE off: every request must query and encode
+    client = appmod.create_app({'JSON_PROVIDER': provider, 'READ_CACHE': False}).test_client()
+    original = appmod._dblib.fetch_dicts
+    if row_path == 'row':
+        appmod._dblib.fetch_dicts = _row_copies
+    try:
+        assert client.get(path).status_code == 200
+        best = float('inf')
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            for _ in range(requests):
+                client.get(path)
+            best = min(best, time.perf_counter() - t0)
+        size = len(client.get(path).get_data())
+    finally:
+        appmod._dblib.fetch_dicts = original
+    return {'ms_per_request': round(best / requests * 1000, 3), 'req_per_s': round(requests / best, 1),
+            'bytes': size}
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='JSON provider / row path before-after benchmark')
+    p.add_argument('--db', help='database to read (default: temporary seeded DB)')
+    p.add_argument('--path', default='/api/articles?per_page=100')
+    p.add_argument('--requests', type=int, default=500)
+    p.add_argument('--rounds', type=int, default=5)
+    p.add_argument('--json', action='store_true')
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    tmp = None
+    if not args.db:
+        tmp = tempfile.TemporaryDirectory()
+        args.db = os.path.join(tmp.name, 'bench.db')
+    os.environ['DB_PATH'] = args.db
+    import backend.app as appmod
+    from backend import json_provider
+    seed(appmod, 500)
+    modes = [('before', 'stdlib', 'row'), ('rows', 'stdlib', 'dicts')]
+    if json_provider.orjson is not None:
+        modes.append(('after', 'orjson', 'dicts'))
+    results = []
+    for name, provider, row_path in modes:
+        r = bench(appmod, args.path, provider, row_path, args.requests, args.rounds)
+        results.append(dict(r, mode=name, provider=provider, rows=row_path))
+    if tmp:
+        tmp.cleanup()
+    base = results[0]['ms_per_request']
+    for r in results:
+        r['speedup'] = round(base / r['ms_per_request'], 2)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f'{args.requests} x GET {args.path}, best of {args.rounds}')
+        for r in results:
+            print(f"{r['mode']:<8} {r['provider']:<7} {r['rows']:<6} {r['ms_per_request']:>8} ms/req  "
+                  f"{r['req_per_s']:>8} req/s  x{r['speedup']}  {r['bytes']} bytes")
+        if json_provider.orjson is None:
+            print('orjson is not installed: "after" skipped (pip install orjson)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
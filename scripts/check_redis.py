@@ -1,18 +1,80 @@
 #!/usr/bin/env python3
-"""Check REDIS_URL connectivity and simple rate-limit sample."""
+"""Check REDIS_URL connectivity through the app's managed Redis client.
+
+Exercises the same client the app uses (bounded pool, timeouts, circuit
+breaker): PING, a rate-limit ZSET sample, a short latency loop, and prints the
+client stats reported on /admin/status.
+
+Usage:
+  REDIS_URL=redis://localhost:6379/0 python3 scripts/check_redis.py [--iterations 200]
+
+  # show the breaker opening against an unreachable server
+  python3 scripts/check_redis.py --breaker-demo
+"""
+import argparse
+import json
 import os
-REDIS_URL = os.getenv('REDIS_URL')
-if not REDIS_URL:
-    print('REDIS_URL not configured. Set REDIS_URL env var to test Redis connectivity.')
-    raise SystemExit(0)
-try:
-    import redis
-    r = redis.from_url(REDIS_URL)
-    print('PING ->', r.ping())
-    k = 'lfi_test_key'
-    r.delete(k)
-    r.zadd(k, { 'm1': 1 })
-    print('ZCARD ->', r.zcard(k))
-except Exception as e:
-    print('Redis error:', e)
-    raise
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.redis_client import ManagedRedis, RedisUnavailable
+
+
+def breaker_demo():
+    r = ManagedRedis('redis://10.255.255.1:6379/0', connect_timeout=0.2, socket_timeout=0.2,
+                     failure_threshold=3, reset_timeout=5)
+    for i in range(6):
+        t0 = time.perf_counter()
+        try:
+            r.ping()
+            outcome = 'ok'
+        except RedisUnavailable:
+            outcome = 'skipped (breaker open)'
+        except Exception as e:
+            outcome = f'error: {type(e).__name__}'
+        print(f'call {i + 1}: {outcome} in {(time.perf_counter() - t0) * 1000:.1f} ms, breaker={r.breaker.state}')
+    print(json.dumps(r.stats(), indent=2))
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--iterations', type=int, default=200, help='PING round trips for the latency sample')
+    p.add_argument('--breaker-demo', action='store_true', help='Demonstrate the circuit breaker against an unreachable host')
+    args = p.parse_args()
+
+    if args.breaker_demo:
+        breaker_demo()
+        return
+    redis_url = os.getenv('REDIS_URL')
+    if not redis_url:
+        print('REDIS_URL not configured. Set REDIS_URL env var to test Redis connectivity.')
+        raise SystemExit(0)
+    r = ManagedRedis(redis_url)
+    try:
+        print('PING ->', r.ping())
+        k = 'lfi_test_key'
+        r.delete(k)
+        r.zadd(k, {'m1': 1})
+        print('ZCARD ->', r.zcard(k))
+        r.delete(k)
+        samples = []
+        for _ in range(args.iterations):
+            t0 = time.perf_counter()
+            r.ping()
+            samples.append((time.perf_counter() - t0) * 1000)
+        samples.sort()
+        print(f'PING latency over {len(samples)} calls: p50={samples[len(samples) // 2]:.3f} ms '
+              f'p99={samples[int(len(samples) * 0.99) - 1]:.3f} ms max={samples[-1]:.3f} ms')
+    except Exception as e:
+        print('Redis error:', e)
+        raise
+    finally:
+        print(json.dumps(r.stats(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -45,10 +45,11 @@ echo "Installation des dépendances"
 pip install -r backend/requirements.txt || true
 pip install requests || true
 
-echo "Exécution des migrations locales (si présentes)"
-if [ -f "${PROJECT_DIR}/scripts/migrate_add_video_column.py" ]; then
-  python "${PROJECT_DIR}/scripts/migrate_add_video_column.py" --db "${PROJECT_DIR}/data.db" || true
-fi
+echo "Exécution des migrations de schéma"
+(cd "${PROJECT_DIR}" && python -m backend.manage --db "${PROJECT_DIR}/data.db" migrate) || {
+  echo "Échec des migrations — déploiement interrompu." >&2
+  exit 1
+}
 
 echo "Réglage des permissions sur backend/static"
 chmod -R u+rX,go+rX "${PROJECT_DIR}/backend/static" || true
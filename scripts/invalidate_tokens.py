@@ -9,23 +9,37 @@ Usage:
   # perform with confirmation
   python3 scripts/invalidate_tokens.py --db backend/data.db --yes
 
+  # delete used and expired tokens in batches (compacts the table)
+  python3 scripts/invalidate_tokens.py --db backend/data.db --purge --yes
+
+  # revoke every server-side session of one user (id or email), in SQLite and,
+  # when REDIS_URL is set, in Redis
+  python3 scripts/invalidate_tokens.py --db backend/data.db --revoke-sessions admin@example.com --yes
+
 This script will create a timestamped backup of the DB before making changes.
 """
 
 import argparse
-import shutil
 import sqlite3
 import os
+import sys
+import time
 from datetime import datetime
 
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
 
 def backup_db(db_path: str) -> str:
+    """Consistent copy of the live DB via the SQLite online backup API."""
+    from backend.backup import backup_db as online_backup
     if not os.path.exists(db_path):
         raise SystemExit(f"DB path not found: {db_path}")
     ts = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
     dst = f"{db_path}.{ts}.bak"
-    shutil.copy2(db_path, dst)
-    print(f"Created backup: {dst}")
+    stats = online_backup(db_path, dst)
+    print(f"Created backup: {dst} ({stats['bytes']} bytes in {stats['seconds']}s)")
     return dst
 
 
@@ -43,11 +57,96 @@ def expire_tokens(conn) -> int:
     return count_outstanding(conn)
 
 
+def count_purgeable(conn) -> int:
+    now = int(time.time())
+    cur = conn.cursor()
+    cur.execute('SELECT COUNT(*) FROM login_tokens WHERE used=1')
+    used = cur.fetchone()[0]
+    cur.execute('SELECT COUNT(*) FROM login_tokens WHERE used=0 AND expires_at < ?', (now,))
+    return used + cur.fetchone()[0]
+
+
+def purge_tokens(conn, batch_size: int = 1000, pause: float = 0.05) -> int:
+    """Delete used and expired tokens in batches, committing between batches.
+
+    Runs the app's own purge (`backend.app.purge_login_tokens`) one batch at
+    a time, sleeping ``pause`` seconds in between, until nothing is left.
+    """
+    from backend.app import purge_login_tokens
+    deleted = 0
+    while True:
+        n = purge_login_tokens(conn, batch_size=batch_size)
+        if not n:
+            return deleted
+        deleted += n
+        print(f"  deleted {deleted} so far...")
+        time.sleep(pause)
+
+
+def run_purge(conn, db, args):
+    purgeable = count_purgeable(conn)
+    print(f"Used or expired login_tokens: {purgeable}")
+    if args.dry_run:
+        print("Dry-run: no changes made.")
+        return
+    if purgeable == 0:
+        print("Nothing to do.")
+        return
+    if not args.yes:
+        ans = input("Delete used and expired tokens and create DB backup? [y/N]: ")
+        if ans.lower() not in ('y', 'yes'):
+            print("Aborting.")
+            return
+    backup_db(db)
+    deleted = purge_tokens(conn, batch_size=args.batch_size)
+    print(f"Deleted {deleted} tokens. Remaining: {count_outstanding(conn)} outstanding.")
+
+
+def resolve_user_id(conn, user: str):
+    if user.isdigit():
+        return int(user)
+    cur = conn.cursor()
+    cur.execute('SELECT id FROM users WHERE email=?', (user.strip().lower(),))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def revoke_sessions(conn, db, args):
+    """Delete all server-side sessions of a user from SQLite and Redis."""
+    from backend.sessions import SQLiteSessionStore, RedisSessionStore
+    user_id = resolve_user_id(conn, args.revoke_sessions)
+    if user_id is None:
+        print(f"Unknown user: {args.revoke_sessions}")
+        raise SystemExit(1)
+    print(f"Revoking sessions of user id {user_id}")
+    if args.dry_run:
+        print("Dry-run: no changes made.")
+        return
+    if not args.yes:
+        ans = input("Revoke all sessions of this user? [y/N]: ")
+        if ans.lower() not in ('y', 'yes'):
+            print("Aborting.")
+            return
+    try:
+        n = SQLiteSessionStore(lambda: sqlite3.connect(db)).delete_user(user_id)
+        print(f"SQLite sessions revoked: {n}")
+    except sqlite3.OperationalError as e:
+        print(f"SQLite sessions table unavailable: {e}")
+    redis_url = os.getenv('REDIS_URL')
+    if redis_url:
+        import redis
+        n = RedisSessionStore(redis.from_url(redis_url)).delete_user(user_id)
+        print(f"Redis sessions revoked: {n}")
+
+
 def main():
     p = argparse.ArgumentParser()
     p.add_argument('--db', required=False, default=os.getenv('DB_PATH', 'backend/data.db'), help='Path to SQLite DB')
     p.add_argument('--dry-run', action='store_true', help='Do not modify DB, just report count')
     p.add_argument('--yes', action='store_true', help='Perform changes without interactive confirmation')
+    p.add_argument('--purge', action='store_true', help='Delete used and expired tokens instead of expiring outstanding ones')
+    p.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per transaction in --purge mode')
+    p.add_argument('--revoke-sessions', metavar='USER', help='Revoke all server-side sessions of a user (id or email)')
     args = p.parse_args()
 
     db = args.db
@@ -57,6 +156,12 @@ def main():
 
     conn = sqlite3.connect(db)
     try:
+        if args.revoke_sessions:
+            revoke_sessions(conn, db, args)
+            return
+        if args.purge:
+            run_purge(conn, db, args)
+            return
         outstanding = count_outstanding(conn)
         print(f"Outstanding (used=0) login_tokens: {outstanding}")
         if args.dry_run:
@@ -1,22 +1,27 @@
 #!/usr/bin/env python3
-"""Migration: add site_meta table and insert default values if missing."""
+"""Insert default site_meta values if missing.
+
+The table itself is created by the schema migrations (backend/migrations),
+which this script applies first.
+"""
 import os
 import sqlite3
+import sys
 from datetime import datetime
 
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend import migrations  # noqa: E402
+
 DB = os.getenv('DB_PATH') or os.path.abspath(os.path.join(os.getcwd(), 'data.db'))
 
 def main():
     print('Using DB:', DB)
     conn = sqlite3.connect(DB)
+    migrations.migrate(conn, log=print)
     cur = conn.cursor()
-    cur.executescript('''
-    CREATE TABLE IF NOT EXISTS site_meta (
-      key TEXT PRIMARY KEY,
-      value TEXT,
-      updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-    );
-    ''')
     # defaults (insert only if not present)
     defaults = {
         'site_title': 'La France Insoumise - Notre Ville',
@@ -33,7 +38,7 @@ def main():
             print('Inserted default for', k)
     conn.commit()
     conn.close()
-    print('Migration site_meta complete')
+    print('site_meta defaults complete')
 
 if __name__ == '__main__':
     main()
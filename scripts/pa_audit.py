@@ -20,6 +20,9 @@ It collects:
  - WSGI file hint search for typical PythonAnywhere path
  - uploads directory existence and permissions
  - small HTTP smoke test to the provided site URL (if given)
+ - optional cold-start report (--startup): `python -X importtime` summary of
+   importing the WSGI module plus app-build and first-request latency, measured
+   in a fresh interpreter against a throwaway DB
 
 Output: prints a human-readable summary and writes `pa_audit_report.json` in the repo dir if writable.
 """
@@ -31,6 +34,7 @@ import subprocess
 import sys
 import stat
 import sqlite3
+import tempfile
 from datetime import datetime
 from pathlib import Path
 
@@ -188,6 +192,70 @@ def smoke_http(site_url):
     return out
 
 
+# Measured in a fresh interpreter so the numbers are those of a worker restart.
+_STARTUP_PROBE = r"""
+import json, time
+t0 = time.perf_counter()
+import backend.app as appmod
+t1 = time.perf_counter()
+app = appmod.create_app()
+t2 = time.perf_counter()
+appmod.init_db()
+t3 = time.perf_counter()
+client = app.test_client()
+out = {'import_ms': (t1 - t0) * 1000, 'create_app_ms': (t2 - t1) * 1000, 'init_db_ms': (t3 - t2) * 1000}
+for path in ('/', '/api/articles'):
+    for label in ('first', 'second'):
+        s = time.perf_counter()
+        status = client.get(path).status_code
+        out[f'{label}_request_ms {path}'] = (time.perf_counter() - s) * 1000
+        out[f'status {path}'] = status
+print(json.dumps({k: round(v, 2) if isinstance(v, float) else v for k, v in out.items()}))
+"""
+
+
+def parse_importtime(stderr, top=10):
+    """Summarize `python -X importtime` output (microseconds per module)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cum_us, name = line[len('import time:'):].split('|', 2)
+            rows.append((int(self_us), int(cum_us), name.rstrip()))
+        except ValueError:
+            continue
+    top_level = [(cum, name.strip()) for _, cum, name in rows if not name.startswith('  ')]
+    return {
+        'modules': len(rows),
+        'total_ms': round(sum(cum for cum, _ in top_level) / 1000, 1),
+        'top_cumulative_ms': [(n.strip(), round(c / 1000, 1)) for _, c, n in sorted(rows, key=lambda r: -r[1])[:top]],
+        'top_self_ms': [(n.strip(), round(s_ / 1000, 1)) for s_, _, n in sorted(rows, key=lambda r: -r[0])[:top]],
+    }
+
+
+def check_startup(repo_path, module='backend.wsgi'):
+    out = {'module': module}
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DB_PATH=os.path.join(tmp, 'startup.db'), METRICS_DIR='', SLOW_QUERY_MS='')
+        env.pop('REDIS_URL', None)  # measure the app, not the network
+        try:
+            res = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=repo_path,
+                                 env=env, capture_output=True, text=True, timeout=120)
+            out['importtime'] = parse_importtime(res.stderr)
+            if res.returncode:
+                out['import_error'] = res.stderr.strip().splitlines()[-1:]
+            res = subprocess.run([sys.executable, '-c', _STARTUP_PROBE], cwd=repo_path, env=env,
+                                 capture_output=True, text=True, timeout=120)
+            if res.returncode == 0 and res.stdout.strip():
+                out['latency'] = json.loads(res.stdout.strip().splitlines()[-1])
+            else:
+                out['probe_error'] = (res.stderr or res.stdout).strip().splitlines()[-1:]
+        except Exception as e:
+            out['error'] = str(e)
+    return out
+
+
 def main():
     p = argparse.ArgumentParser()
     p.add_argument('--repo', required=False, default='.', help='Path to the repository root (on PA)')
@@ -195,6 +263,9 @@ def main():
     p.add_argument('--db', default=None, help='Path to production data.db (optional)')
     p.add_argument('--site', default=None, help='Public site URL for a small HTTP smoke test')
     p.add_argument('--out', default='pa_audit_report.json', help='Output JSON report file name')
+    p.add_argument('--startup', action='store_true', help='Measure cold-start import time and first-request latency')
+    p.add_argument('--max-import-ms', type=float, default=None, help='Flag the import time above this budget')
+    p.add_argument('--max-first-request-ms', type=float, default=None, help='Flag a first request above this budget')
 
     args = p.parse_args()
     repo = os.path.abspath(args.repo)
@@ -218,6 +289,16 @@ def main():
     if args.site:
         report['smoke_http'] = smoke_http(args.site)
 
+    if args.startup:
+        st = report['startup'] = check_startup(repo)
+        warnings = st['warnings'] = []
+        total = st.get('importtime', {}).get('total_ms')
+        if args.max_import_ms is not None and total is not None and total > args.max_import_ms:
+            warnings.append(f'import took {total} ms (budget {args.max_import_ms} ms)')
+        for k, v in st.get('latency', {}).items():
+            if k.startswith('first_request_ms') and args.max_first_request_ms is not None and v > args.max_first_request_ms:
+                warnings.append(f'{k} = {v} ms (budget {args.max_first_request_ms} ms)')
+
     # write report
     outpath = os.path.join(repo, args.out)
     try:
@@ -249,6 +330,18 @@ def main():
     print('Uploads:', 'exists' if report['uploads'].get('exists') else 'missing')
     if args.site:
         print('HTTP smoke:', report.get('smoke_http', {}).get('http_status') or report.get('smoke_http', {}).get('error'))
+    if 'startup' in report:
+        st = report['startup']
+        it = st.get('importtime', {})
+        print('Startup: import', it.get('total_ms'), 'ms over', it.get('modules'), 'modules')
+        for name, ms in it.get('top_cumulative_ms', [])[:5]:
+            print(f'   {ms:8.1f} ms  {name}')
+        for k, v in st.get('latency', {}).items():
+            print(f'  {k}: {v}')
+        for w in st.get('warnings', []):
+            print('  WARNING:', w)
+        if st.get('probe_error') or st.get('import_error') or st.get('error'):
+            print('  errors:', st.get('probe_error') or st.get('import_error') or st.get('error'))
     print(printed)
     print('Full JSON report saved under:', outpath)
 
@@ -3,22 +3,46 @@
 
 Usage:
   scripts/purge_content.py [--db PATH] [--backup] [--dry-run] [--yes]
+                           [--tables articles,photos,videos] [--older-than YYYY-MM-DD]
+                           [--orphans-only] [--batch-size 500] [--pause 0.05]
+                           [--vacuum incremental|full|none]
 
 - By default the script uses DB_PATH env var or ./data.db
-- With --backup it will copy the DB and tar the uploads directory before deleting.
+- With --backup it will take an online backup of the DB and an incremental
+  snapshot of the uploads directory (see backend/backup.py) before deleting.
 - With --dry-run it will only show what would be done.
 - With --yes it will skip the interactive confirmation (use with care).
 
+Rows are deleted in rowid ranges of --batch-size, committing and sleeping
+--pause seconds between batches, so the write lock is only held briefly and
+the site can stay up. --older-than limits the purge to rows created before a
+date, --tables to some tables; the upload files of deleted photos/videos are
+moved aside. --orphans-only leaves the DB alone and moves aside upload files
+no row references. Free pages are then released with incremental_vacuum
+(full VACUUM only on request, it locks the whole DB).
+
 This script is destructive. Make sure you have a backup and that you run it
 from the project root (repo root).
 """
 import argparse
+import functools
 import os
 import shutil
 import sqlite3
-import tarfile
+import sys
+import time
 from datetime import datetime
 
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.app import get_invalidation_bus  # noqa: E402
+
+BACKUP_DIR = os.getenv('BACKUP_DIR') or os.path.join(ROOT, 'backups')
+TABLES = ('articles', 'photos', 'videos')
+UPLOAD_TABLES = {'photos': 'photos', 'videos': 'videos'}  # table -> uploads subdirectory, as in backend/reconcile.py
+
 
 def now_ts():
     return datetime.utcnow().strftime('%Y%m%d_%H%M%S')
@@ -35,35 +59,40 @@ def resolve_db(path_arg: str):
 
 
 def backup_db(db_path: str):
-    ts = now_ts()
-    dest = f"{db_path}.bak.{ts}"
+    from backend.backup import backup_db as online_backup, record_run
+    dest = os.path.join(BACKUP_DIR, 'db', f"{os.path.basename(db_path)}.{now_ts()}.bak")
     print(f"Backing up DB: {db_path} -> {dest}")
-    shutil.copy2(db_path, dest)
+    stats = online_backup(db_path, dest)
+    record_run(BACKUP_DIR, stats)
     return dest
 
 
 def backup_uploads(uploads_dir: str):
+    from backend.backup import snapshot_uploads, record_run
     if not os.path.exists(uploads_dir):
         print(f"Uploads directory not found: {uploads_dir} (skipping)")
         return None
-    ts = now_ts()
-    dest = os.path.abspath(f"uploads-backup-{ts}.tgz")
-    print(f"Archiving uploads: {uploads_dir} -> {dest}")
-    with tarfile.open(dest, 'w:gz') as tf:
-        # add the uploads dir contents without absolute path
-        tf.add(uploads_dir, arcname=os.path.basename(uploads_dir))
-    return dest
+    print(f"Snapshotting uploads: {uploads_dir} -> {BACKUP_DIR}")
+    stats = snapshot_uploads(uploads_dir, BACKUP_DIR)
+    record_run(BACKUP_DIR, stats)
+    print(f"  {stats['files']} files, {stats['files_copied']} new ({stats['bytes_copied']} bytes copied)")
+    return stats['manifest']
+
 
+def _where(older_than):
+    return ('WHERE created_at < ?', (older_than,)) if older_than else ('', ())
 
-def counts(db_path: str):
+
+def counts(db_path: str, older_than: str = None):
     if not os.path.exists(db_path):
-        return {'articles': 0, 'photos': 0, 'videos': 0}
+        return {t: 0 for t in TABLES}
     conn = sqlite3.connect(db_path)
     cur = conn.cursor()
+    where, params = _where(older_than)
     res = {}
-    for t in ('articles', 'photos', 'videos'):
+    for t in TABLES:
         try:
-            cur.execute(f"SELECT COUNT(*) FROM {t}")
+            cur.execute(f"SELECT COUNT(*) FROM {t} {where}", params)
             res[t] = cur.fetchone()[0]
         except Exception:
             res[t] = 0
@@ -71,52 +100,179 @@ def counts(db_path: str):
     return res
 
 
-def purge_db(db_path: str):
-    conn = sqlite3.connect(db_path)
+def _rate(n, seconds):
+    return f"{n / seconds:.0f} rows/s" if seconds > 0 else 'n/a'
+
+
+def purge_table(conn, table: str, older_than: str = None, batch_size: int = 500, pause: float = 0.05,
+                on_files=None, log=print, invalidate=True):
+    """Delete rows of ``table`` in rowid ranges, committing after each batch.
+
+    Returns the number of rows deleted. ``on_files`` (photos/videos) receives
+    the filenames of each deleted batch once it is committed. With
+    ``invalidate`` each batch also invalidates the workers' 'content' caches.
+    """
+    where, params = _where(older_than)
     cur = conn.cursor()
-    print("Deleting rows from tables: articles, photos, videos")
-    cur.execute('BEGIN')
-    cur.execute('DELETE FROM articles')
-    cur.execute('DELETE FROM photos')
-    cur.execute('DELETE FROM videos')
-    conn.commit()
+    cur.execute(f"SELECT MIN(id), MAX(id), COUNT(*) FROM {table} {where}", params)
+    lo, hi, total = cur.fetchone()
+    if not total:
+        log(f"{table}: nothing to delete")
+        return 0
+    cond = ' AND created_at < ?' if older_than else ''
+    deleted = 0
+    t0 = time.perf_counter()
+    start = lo
+    while start <= hi:
+        end = min(start + batch_size, hi + 1)  # rows inserted after the snapshot are not ours
+        rng = (start, end) + params
+        files = []
+        if on_files:
+            cur.execute(f"SELECT filename FROM {table} WHERE id >= ? AND id < ?{cond}", rng)
+            files = [r[0] for r in cur.fetchall()]
+        n = cur.execute(f"DELETE FROM {table} WHERE id >= ? AND id < ?{cond}", rng).rowcount
+        deleted += n
+        if n and invalidate:
+            get_invalidation_bus().invalidate(conn, 'content')  # workers' read snapshots reload
+        conn.commit()
+        if n and invalidate:
+            get_invalidation_bus().committed('content')
+        if files:
+            on_files(files)
+        elapsed = time.perf_counter() - t0
+        log(f"{table}: deleted {deleted}/{total} ({_rate(deleted, elapsed)})")
+        start = end
+        if pause and start <= hi:
+            time.sleep(pause)
+    return deleted
+
+
+def purge_db(db_path: str, tables=TABLES, older_than: str = None, batch_size: int = 500, pause: float = 0.05,
+             uploads_dir: str = None, log=print):
+    """Batched purge of ``tables``; returns {table: rows deleted}.
+
+    When ``uploads_dir`` is given, the upload files of each deleted batch of
+    photos/videos are moved to <subdir>_removed_<ts>. Only those: files
+    uploaded while the purge runs belong to rows it does not delete.
+    """
+    ts = now_ts()
+    moved = {}
+
+    def move(sub, files):
+        moved[sub] = moved.get(sub, 0) + move_files(uploads_dir, sub, files, ts)
+
+    conn = sqlite3.connect(db_path, timeout=30)
+    res = {}
     try:
-        cur.execute('VACUUM')
-    except Exception:
-        pass
-    conn.close()
+        # a DB the app has never migrated has no cache_versions, nor workers to tell
+        invalidate = conn.execute("SELECT 1 FROM sqlite_master WHERE name='cache_versions'").fetchone() is not None
+        for t in tables:
+            sub = UPLOAD_TABLES.get(t) if uploads_dir else None
+            on_files = functools.partial(move, sub) if sub else None
+            res[t] = purge_table(conn, t, older_than, batch_size, pause, on_files=on_files, log=log,
+                                 invalidate=invalidate)
+            if moved.get(sub):
+                log(f"{t}: moved {moved[sub]} upload files to {os.path.join(uploads_dir, sub)}_removed_{ts}")
+    finally:
+        conn.close()
+    return res
 
 
-def move_uploads(uploads_dir: str):
-    ts = now_ts()
-    moved = []
-    for sub in ('photos', 'videos'):
-        src = os.path.join(uploads_dir, sub)
-        if not os.path.exists(src):
-            print(f"No directory: {src} (skipping)")
-            continue
-        dest = f"{src}_removed_{ts}"
-        print(f"Moving {src} -> {dest}")
-        shutil.move(src, dest)
-        moved.append((src, dest))
-        # recreate an empty folder for the app
-        os.makedirs(src, exist_ok=True)
+def vacuum(db_path: str, mode: str = 'incremental', pages: int = 1000, pause: float = 0.05, log=print):
+    """Release free pages: ``incremental`` in small steps, ``full`` VACUUM, or ``none``."""
+    if mode == 'none':
+        return
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        if mode == 'full':
+            log('Running full VACUUM (locks the database until done)...')
+            conn.execute('VACUUM')
+            return
+        auto = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+        if auto != 2:
+            log('auto_vacuum is not INCREMENTAL on this DB; free pages are reused by later writes. '
+                'Enable it once during a maintenance window with --vacuum enable-incremental.')
+            return
+        freed = 0
+        while True:
+            free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if not free:
+                break
+            conn.execute(f'PRAGMA incremental_vacuum({pages})')
+            freed += min(free, pages)
+            time.sleep(pause)
+        log(f'incremental_vacuum released {freed} pages')
+    finally:
+        conn.close()
+
+
+def enable_incremental_vacuum(db_path: str, log=print):
+    """Switch the DB to auto_vacuum=INCREMENTAL (needs one full VACUUM)."""
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        log('Running VACUUM to enable incremental auto_vacuum (locks the database until done)...')
+        conn.execute('VACUUM')
+    finally:
+        conn.close()
+
+
+def move_files(uploads_dir: str, sub: str, filenames, ts: str):
+    """Move the given files of uploads/<sub> to uploads/<sub>_removed_<ts>."""
+    src_dir = os.path.join(uploads_dir, sub)
+    dest_dir = f"{src_dir}_removed_{ts}"
+    moved = 0
+    for fn in filenames:
+        src = os.path.join(src_dir, os.path.basename(fn))
+        if os.path.exists(src):
+            os.makedirs(dest_dir, exist_ok=True)
+            shutil.move(src, os.path.join(dest_dir, os.path.basename(fn)))
+            moved += 1
     return moved
 
 
-def parse_args():
+def find_orphans(db_path: str, uploads_dir: str):
+    """Upload files under photos/ and videos/ that no row references."""
+    from backend.reconcile import db_references, scan_disk
+    conn = sqlite3.connect(db_path)
+    try:
+        media, article_refs = db_references(conn)
+    finally:
+        conn.close()
+    referenced = set(media) | {key for _, _, key in article_refs}
+    return sorted(set(scan_disk(uploads_dir)) - referenced)
+
+
+def parse_args(argv=None):
     p = argparse.ArgumentParser(description='Purge site content (articles/photos/videos and uploaded files)')
     p.add_argument('--db', help='Path to sqlite DB')
+    p.add_argument('--uploads', help='Uploads directory (default backend/static/uploads)')
     p.add_argument('--backup', action='store_true', help='Create backups before purging')
     p.add_argument('--dry-run', action='store_true', help='Only show what would be done')
     p.add_argument('--yes', action='store_true', help='Answer yes to prompts')
-    return p.parse_args()
+    p.add_argument('--tables', default=','.join(TABLES), help='Comma-separated tables to purge')
+    p.add_argument('--older-than', help='Only delete rows created before this date (YYYY-MM-DD)')
+    p.add_argument('--orphans-only', action='store_true', help='Only move aside upload files no row references')
+    p.add_argument('--batch-size', type=int, default=500, help='Rows deleted per transaction')
+    p.add_argument('--pause', type=float, default=0.05, help='Seconds to sleep between batches')
+    p.add_argument('--vacuum', choices=('incremental', 'full', 'none', 'enable-incremental'), default='incremental')
+    args = p.parse_args(argv)
+    args.tables = [t.strip() for t in args.tables.split(',') if t.strip()]
+    unknown = set(args.tables) - set(TABLES)
+    if unknown:
+        p.error(f"unknown tables: {', '.join(sorted(unknown))}")
+    if args.older_than:
+        try:
+            datetime.strptime(args.older_than, '%Y-%m-%d')
+        except ValueError:
+            p.error('--older-than expects YYYY-MM-DD')
+    return args
 
 
-def main():
-    args = parse_args()
+def main(argv=None):
+    args = parse_args(argv)
     db_path = resolve_db(args.db)
-    uploads_dir = os.path.abspath(os.path.join(os.getcwd(), 'backend', 'static', 'uploads'))
+    uploads_dir = os.path.abspath(args.uploads or os.path.join(os.getcwd(), 'backend', 'static', 'uploads'))
 
     print('DB path:', db_path)
     print('Uploads dir:', uploads_dir)
@@ -125,10 +281,19 @@ def main():
         print(f'Error: DB not found at {db_path}')
         return 2
 
-    before = counts(db_path)
-    print('Current counts:')
-    for k, v in before.items():
-        print(f'  {k}: {v}')
+    if args.orphans_only:
+        orphans = find_orphans(db_path, uploads_dir)
+        print(f'Orphaned upload files: {len(orphans)}')
+        for sub, fn in orphans[:20]:
+            print(f'  {sub}/{fn}')
+        if args.dry_run or not orphans:
+            return 0
+    else:
+        before = counts(db_path, args.older_than)
+        scope = f' created before {args.older_than}' if args.older_than else ''
+        print(f'Rows to delete{scope}:')
+        for k in args.tables:
+            print(f'  {k}: {before[k]}')
 
     if args.dry_run:
         print('\nDry-run mode, nothing changed.')
@@ -149,28 +314,41 @@ def main():
             print('Aborted by user.')
             return 1
 
+    if args.orphans_only:
+        ts = now_ts()
+        for sub in UPLOAD_TABLES.values():
+            n = move_files(uploads_dir, sub, [fn for s, fn in orphans if s == sub], ts)
+            if n:
+                print(f'Moved {n} orphaned files to {os.path.join(uploads_dir, sub)}_removed_{ts}')
+        return 0
+
+    t0 = time.perf_counter()
     try:
-        purge_db(db_path)
+        deleted = purge_db(db_path, args.tables, args.older_than, args.batch_size, args.pause, uploads_dir)
     except Exception as e:
         print('Failed to purge DB:', e)
         return 4
+    elapsed = time.perf_counter() - t0
+    total = sum(deleted.values())
+    print(f'Deleted {total} rows in {elapsed:.1f}s ({_rate(total, elapsed)})')
 
     try:
-        moved = move_uploads(uploads_dir)
-    except Exception as e:
-        print('Failed to move uploads:', e)
-        return 5
+        if args.vacuum == 'enable-incremental':
+            enable_incremental_vacuum(db_path)
+        else:
+            vacuum(db_path, args.vacuum, pause=args.pause)
+    except sqlite3.Error as e:
+        print('Vacuum skipped:', e)
 
     after = counts(db_path)
     print('After purge counts:')
     for k, v in after.items():
         print(f'  {k}: {v}')
 
-    print('\nPurge completed. Uploads moved:' if moved else '\nPurge completed. No uploads moved.')
-    for src, dest in moved:
-        print(f'  {src} -> {dest}')
+    print('\nPurge completed. Upload files no row references are left in place '
+          '(move them aside with --orphans-only).')
 
-    print('\nNext: verify endpoints /api/articles /api/photos /api/videos and check that static uploads are empty.')
+    print('\nNext: verify endpoints /api/articles /api/photos /api/videos.')
     return 0
 
 
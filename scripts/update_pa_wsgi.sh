@@ -56,7 +56,7 @@ if project_home not in sys.path:
     sys.path.insert(0, project_home)
 
 # Import the backend Flask app (adjust if your app location differs)
-from backend.app import app as application
+from backend.wsgi import application
 PY
 
 chmod 644 "$WSGI_PATH" || true
@@ -17,7 +17,7 @@ from io import BytesIO
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from backend import app as flask_app
+from backend.app import app as flask_app
 
 
 def ensure_admin(db_path, email='smoketest@example.com'):
@@ -34,6 +34,6 @@ project_home = '/home/DrancyInsoumis/DrancyInsoumis'
 if project_home not in sys.path:
     sys.path.insert(0, project_home)
 
-# If your app module is named `app.py` and exposes `app` (Flask), import it.
-# Adjust the import below if your Flask application object is located elsewhere.
-from app import app as application
+# backend.wsgi builds the app with backend.app.create_app(); importing it does
+# no Redis or SMTP work, so worker restarts stay cheap.
+from backend.wsgi import application